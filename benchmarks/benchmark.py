@@ -0,0 +1,216 @@
+import argparse
+import asyncio
+import json
+import logging
+import platform
+import random
+import shutil
+import statistics
+import tempfile
+import time
+from datetime import datetime
+from benchmarks.environment import BenchmarkEnvironment
+from benchmarks.standinbackend import generateCompetition
+
+# End-to-end benchmark for the bot's handlers, run in-process against a fake Discord guild and a stand-in backend.
+# Usage: python -m benchmarks.benchmark --output results.json [--compare previous.json]
+
+'''
+Returns the value at the given percentile (0-100) of a sorted list
+'''
+def percentile(sortedValues, pct):
+  if(len(sortedValues) == 0):
+    return None
+  index = min(len(sortedValues) - 1, max(0, round(pct / 100 * len(sortedValues)) - 1))
+  return sortedValues[index]
+
+'''
+Summarizes the latencies (in seconds) of a scenario
+'''
+def summarize(latencies, wallTime, backendCalls, discordCalls, errors):
+  latencies = sorted(latencies)
+  count = len(latencies)
+  return {
+    'operations': count,
+    'errors': errors,
+    'throughputPerSecond': count / wallTime if wallTime > 0 else None,
+    'meanMs': statistics.fmean(latencies) * 1000 if count else None,
+    'p50Ms': percentile(latencies, 50) * 1000 if count else None,
+    'p99Ms': percentile(latencies, 99) * 1000 if count else None,
+    'maxMs': latencies[-1] * 1000 if count else None,
+    'backendCallsPerOperation': backendCalls / count if count else None,
+    'discordCallsPerOperation': discordCalls / count if count else None
+  }
+
+'''
+Runs an operation repeatedly, returning its summary. The operation returns True if it succeeded.
+'''
+async def runScenario(environment, iterations, operation):
+  environment.backend.resetCounts()
+  environment.calls.reset()
+  latencies = []
+  errors = 0
+  wallStart = time.perf_counter()
+  for i in range(iterations):
+    start = time.perf_counter()
+    succeeded = await operation(i)
+    latencies.append(time.perf_counter() - start)
+    if(not succeeded):
+      errors += 1
+  wallTime = time.perf_counter() - wallStart
+  return summarize(latencies, wallTime, environment.backend.totalCalls(), environment.calls.total(), errors)
+
+'''
+Builds the scenarios to run: a name mapped to an operation taking the iteration number
+'''
+def buildScenarios(environment):
+  clogItems = [item['name'] for item in environment.competition['collectionLogItems']]
+  monsters = [method['name'] for method in environment.competition['contributionMethods'] if method['contributionMethodType'] == 'SUBMISSION_KC']
+  drops = [method['name'] for method in environment.competition['contributionMethods'] if method['contributionMethodType'] == 'SUBMISSION_ITEM_DROP']
+  speedruns = [challenge['name'] for challenge in environment.competition['challenges'] if challenge['type'] == 'SPEEDRUN']
+  rsns = [rsn for rsn, member, team in environment.players]
+
+  def succeeded(interaction):
+    return not interaction.command_failed
+
+  async def loadCompetitionInfo(i):
+    await environment.showdownBot.loadCompetitionInfo()
+    return environment.showdownBot.competitionLoaded
+
+  async def reloadCommands(i):
+    await environment.showdownBot.reloadExtensions()
+    return True
+
+  async def clogAutocomplete(i):
+    item = random.choice(clogItems)
+    await environment.runAutocomplete('submit_collection_log', 'item', item[:random.randint(1, len(item))].lower())
+    return True
+
+  async def playerAutocomplete(i):
+    await environment.runAutocomplete('submit_team_speedrun', 'rsn_1', random.choice(rsns)[:4].lower())
+    return True
+
+  async def submitMonsterKillcount(i):
+    rsn, member, team = environment.randomPlayer()
+    return succeeded(await environment.runCommand('submit_monster_killcount', {'screenshot': environment.screenshot(), 'monster': random.choice(monsters), 'kc': random.randint(1, 5000)}, member))
+
+  async def submitCollectionLog(i):
+    rsn, member, team = environment.randomPlayer()
+    return succeeded(await environment.runCommand('submit_collection_log', {'screenshot': environment.screenshot(), 'item': random.choice(clogItems)}, member))
+
+  async def submitItemDrops(i):
+    rsn, member, team = environment.randomPlayer()
+    return succeeded(await environment.runCommand('submit_item_drops', {'screenshot': environment.screenshot(), 'item_type': random.choice(drops)}, member))
+
+  async def submitTeamSpeedrun(i):
+    rsn, member, team = environment.randomPlayer()
+    options = {'screenshot': environment.screenshot(), 'minutes': 12, 'seconds': 34, 'tenths_of_seconds': 5, 'challenge': random.choice(speedruns)}
+    for n, teammate in enumerate(random.sample(rsns, 5)):
+      options[f'rsn_{n + 1}'] = teammate
+    return succeeded(await environment.runCommand('submit_team_speedrun', options, member))
+
+  async def decide(customId):
+    message = environment.oldestQueuedMessage()
+    interaction = await environment.clickButton(message, customId)
+    if(message.id in environment.queueChannel.messages): # Failed; move it to the back of the queue so the next iteration picks a new one
+      environment.queueChannel.removeMessage(message)
+      environment.queueChannel.messages[message.id] = message
+    else:
+      environment.seedQueue(1) # Keep the queue at a constant depth
+    return not interaction.command_failed
+
+  async def approveSubmission(i):
+    return await decide('approve')
+
+  async def denySubmission(i):
+    return await decide('deny')
+
+  return {
+    'loadCompetitionInfo': loadCompetitionInfo,
+    'reloadCommands': reloadCommands,
+    'autocomplete.clog': clogAutocomplete,
+    'autocomplete.player': playerAutocomplete,
+    'submit_monster_killcount': submitMonsterKillcount,
+    'submit_collection_log': submitCollectionLog,
+    'submit_item_drops': submitItemDrops,
+    'submit_team_speedrun': submitTeamSpeedrun,
+    'approve': approveSubmission,
+    'deny': denySubmission
+  }
+
+async def runBenchmarks(args):
+  competition = generateCompetition(players = args.players, teams = args.teams, clogItems = args.clog_items)
+  attachmentDir = tempfile.mkdtemp(prefix='showdown-attachments-') if args.mirror_attachments else None
+  environment = BenchmarkEnvironment(competition, latency = args.latency, jitter = args.jitter, errorRate = args.error_rate, attachmentDir = attachmentDir)
+  try:
+    await environment.load()
+    environment.seedQueue(args.queue_depth)
+    scenarios = buildScenarios(environment)
+    selected = args.scenarios.split(',') if args.scenarios else list(scenarios)
+    results = {}
+    for name in selected:
+      iterations = args.reload_iterations if name in ('loadCompetitionInfo', 'reloadCommands') else args.iterations
+      results[name] = await runScenario(environment, iterations, scenarios[name])
+      print(f'{name:<28} p50 {results[name]['p50Ms']:8.2f} ms  p99 {results[name]['p99Ms']:8.2f} ms  {results[name]['throughputPerSecond']:9.1f} ops/s')
+    if(attachmentDir is not None):
+      start = time.perf_counter()
+      await environment.drainAttachments()
+      mirror = environment.showdownBot.attachmentMirror
+      print(f'Mirrored {len(mirror.filesByUrl)} attachments ({environment.cdn.bytesServed} bytes downloaded) in a further {time.perf_counter() - start:.2f}s after the last scenario')
+    return results
+  finally:
+    environment.stop()
+    if(attachmentDir is not None):
+      shutil.rmtree(attachmentDir, ignore_errors=True)
+
+'''
+Prints the change in p50/p99 latency and throughput between a previous results file and the current results
+'''
+def compareResults(previous, current):
+  print('\nComparison with ' + previous['timestamp'] + ':')
+  for name, result in current['scenarios'].items():
+    if(name not in previous['scenarios']):
+      continue
+    old = previous['scenarios'][name]
+    changes = []
+    for key in ['p50Ms', 'p99Ms', 'throughputPerSecond']:
+      if(old[key] and result[key]):
+        changes.append(f'{key} {(result[key] - old[key]) / old[key] * 100:+.1f}%')
+    print(f'{name:<28} ' + '  '.join(changes))
+
+def main():
+  parser = argparse.ArgumentParser(description='End-to-end benchmark of the Showdown bot handlers')
+  parser.add_argument('--players', type=int, default=500)
+  parser.add_argument('--teams', type=int, default=10)
+  parser.add_argument('--clog-items', type=int, default=2000)
+  parser.add_argument('--queue-depth', type=int, default=1000, help='Number of pending submissions in the queue channel')
+  parser.add_argument('--iterations', type=int, default=200)
+  parser.add_argument('--reload-iterations', type=int, default=20)
+  parser.add_argument('--latency', type=float, default=0.0, help='Stand-in backend latency per request, in seconds')
+  parser.add_argument('--jitter', type=float, default=0.0, help='Random extra backend latency (uniform, up to this many seconds)')
+  parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of backend requests that fail with a 500')
+  parser.add_argument('--mirror-attachments', action='store_true', help='Enable attachment mirroring, with screenshots served by a stand-in CDN')
+  parser.add_argument('--scenarios', help='Comma-separated list of scenarios to run (default: all)')
+  parser.add_argument('--seed', type=int, default=0)
+  parser.add_argument('--output', default='benchmark-results.json', help='File to write the results to')
+  parser.add_argument('--compare', help='Previous results file to compare against')
+  args = parser.parse_args()
+
+  logging.getLogger('showdown').setLevel(logging.CRITICAL) # Failures are counted in the results instead
+  random.seed(args.seed)
+  results = asyncio.run(runBenchmarks(args))
+  output = {
+    'timestamp': datetime.now().astimezone().isoformat(timespec='seconds'),
+    'python': platform.python_version(),
+    'parameters': vars(args),
+    'scenarios': results
+  }
+  with open(args.output, 'w') as outputFile:
+    json.dump(output, outputFile, indent=2)
+  print('Results written to ' + args.output)
+  if(args.compare):
+    with open(args.compare) as previousFile:
+      compareResults(json.load(previousFile), output)
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,192 @@
+import argparse
+import configparser
+import logging
+import random
+from discord import InteractionType
+from discord.app_commands import CommandInvokeError
+import showdownbot.showdownbot as showdownbot
+import showdownbot.submissions as submissions
+from benchmarks.fakes import DiscordCallCounter, FakeGuild, FakeInteraction, FakeAttachment, installFakeGuild
+from benchmarks.standinbackend import StandinBackend, generateCompetition
+from benchmarks.standincdn import StandinCdn
+
+log = logging.getLogger('showdown')
+
+'''
+A ShowdownBot wired to a fake Discord guild and a stand-in backend, with helpers to drive slash commands, autocomplete
+callbacks and button clicks through the bot's real handlers
+'''
+class BenchmarkEnvironment():
+
+  def __init__(self, competition = None, latency = 0.0, jitter = 0.0, errorRate = 0.0, extraConfig = None, attachmentDir = None):
+    self.competition = competition or generateCompetition()
+    self.backend = StandinBackend(self.competition, latency, jitter, errorRate).start()
+    self.cdn = None # Screenshots are only downloaded if attachment mirroring is enabled
+    if(attachmentDir is not None):
+      self.cdn = StandinCdn().start()
+    self.calls = DiscordCallCounter()
+
+    # Set up the guild: team channels, queue/log/errors channels, a member per player, and staff
+    self.guild = FakeGuild(self.calls)
+    self.approverRole = self.guild.addRole('Screenshot Approver')
+    self.staffRole = self.guild.addRole('Event staff')
+    self.queueChannel = self.guild.addChannel('submission-queue')
+    self.logChannel = self.guild.addChannel('submission-log')
+    self.errorsChannel = self.guild.addChannel('bot-errors')
+    self.teamChannels = {}
+    self.players = [] # (rsn, member, team) tuples
+    for team in self.competition['teams']:
+      self.teamChannels[team['name']] = self.guild.addChannel(team['abbreviation'].lower() + '-bot-submissions')
+      for player in team['players']:
+        self.players.append((player['rsn'], self.guild.addMember(player['discordName']), team['name']))
+    self.approver = self.guild.addMember('approver', [self.approverRole])
+    self.staff = self.guild.addMember('staff', [self.staffRole, self.approverRole])
+
+    config = configparser.ConfigParser()
+    config.read_dict({'CompetitionProperties': {
+      'token': 'benchmark',
+      'submissionQueueChannelId': str(self.queueChannel.id),
+      'submissionLogChannelId': str(self.logChannel.id),
+      'errorsChannelId': str(self.errorsChannel.id),
+      'guildId': str(self.guild.id),
+      'backendUrl': self.backend.url
+    }, 'CommandSync': {
+      'enabled': 'false' # There is no Discord API to sync reloaded commands to
+    }, 'DecisionJournal': {
+      'file': ':memory:'
+    }, 'AdmissionControl': { # Still runs on every submission, but the benchmarks submit far faster than players can
+      'userRate': '1000000',
+      'userBurst': '1000000',
+      'globalRate': '1000000',
+      'globalBurst': '1000000',
+      'maxQueued': '1000000'
+    }})
+    if(attachmentDir is not None):
+      config.read_dict({'AttachmentMirror': {'directory': attachmentDir}})
+    if(extraConfig):
+      config.read_dict(extraConfig)
+    self.showdownBot = showdownbot.ShowdownBot(argparse.Namespace(clearcommands=False, updatecommands=False), config)
+    installFakeGuild(self.showdownBot, self.guild)
+    self.showdownBot.bot.tree.invoke = self.invokeCallback
+
+  async def load(self):
+    await self.showdownBot.loadExtensions()
+    await self.showdownBot.loadCompetitionInfo()
+    if(not self.showdownBot.competitionLoaded):
+      raise Exception('Failed to load competition info from the stand-in backend')
+    if(self.showdownBot.attachmentMirror is not None):
+      self.showdownBot.attachmentMirror.start()
+
+  '''
+  Waits for the attachment mirror to finish the downloads it has queued, then stops it
+  '''
+  async def drainAttachments(self):
+    if(self.showdownBot.attachmentMirror is not None):
+      await self.showdownBot.attachmentMirror.queue.join()
+      await self.showdownBot.attachmentMirror.stop()
+
+  def stop(self):
+    self.backend.stop()
+    if(self.cdn is not None):
+      self.cdn.stop()
+
+  def randomPlayer(self):
+    return random.choice(self.players)
+
+  def screenshot(self):
+    if(self.cdn is not None):
+      return FakeAttachment(self.cdn.attachmentUrl(random.getrandbits(48)))
+    return FakeAttachment(f'https://cdn.example.com/attachments/{random.getrandbits(48)}/screenshot.png')
+
+  '''
+  Runs a slash command through the bot's command tree, so admission control, metrics and tracing are measured along with
+  the handler. Returns the interaction, so callers can inspect the response.
+  '''
+  async def runCommand(self, commandName, options, member, channel = None):
+    if(channel is None):
+      channel = self.channelForMember(member)
+    interaction = FakeInteraction(self.calls, member, channel, commandName, options, client=self.showdownBot.bot)
+    await self.showdownBot.bot.tree._call(interaction)
+    return interaction
+
+  '''
+  Stands in for ShowdownCommandTree.invoke (discord.py's dispatch): calls the command's callback with the fake
+  interaction's options, which are already Python values, and sends errors to the bot's error handler like discord.py
+  does. Option parsing by discord.py is the only part of handling a command that isn't measured.
+  '''
+  async def invokeCallback(self, interaction):
+    command = self.showdownBot.bot.tree.get_command(interaction.data['name'])
+    try:
+      await command.callback(command.binding, interaction, **interaction.options) # Commands are cog methods, bound to their cog
+    except Exception as e:
+      interaction.command_failed = True
+      await self.showdownBot.bot.tree.on_error(interaction, CommandInvokeError(command, e))
+
+  '''
+  Runs an autocomplete callback for an option of a slash command, returning the choices
+  '''
+  async def runAutocomplete(self, commandName, option, current, member = None):
+    member = member or self.players[0][1]
+    interaction = FakeInteraction(self.calls, member, self.channelForMember(member), commandName, interactionType=InteractionType.autocomplete, client=self.showdownBot.bot)
+    command = self.showdownBot.bot.tree.get_command(commandName)
+    return await command._params[option].autocomplete(interaction, current)
+
+  '''
+  Clicks a button (approve/deny/undo/claim) on a message through the review cog's interaction listener
+  '''
+  async def clickButton(self, message, customId, member = None):
+    interaction = FakeInteraction(self.calls, member or self.approver, message.channel, customId=customId, message=message, client=self.showdownBot.bot)
+    try:
+      await self.showdownBot.bot.get_cog('ReviewCommands').on_interaction(interaction)
+    except Exception as e: # discord.py would log these via Client.on_error
+      log.error('Error in on_interaction', exc_info=e)
+      interaction.command_failed = True
+    return interaction
+
+  def channelForMember(self, member):
+    for rsn, playerMember, team in self.players:
+      if(playerMember is member):
+        return self.teamChannels[team]
+    return self.queueChannel
+
+  '''
+  Adds a submission message to a channel without going through the backend or counting Discord calls
+  '''
+  def seedSubmission(self, channel, header, member, rsn, team, commandName, params, shortDesc, ids):
+    submission = submissions.Submission(
+      showdownBot = self.showdownBot,
+      user = member,
+      shortDesc = shortDesc,
+      rsn = rsn,
+      team = team,
+      commandName = commandName,
+      params = params,
+      ids = ids
+    )
+    return channel.addMessage(header + str(submission))
+
+  '''
+  Adds pending submissions to the queue channel without going through the backend or counting Discord calls
+  '''
+  def seedQueue(self, count):
+    messages = []
+    for i in range(count):
+      rsn, member, team = self.randomPlayer()
+      params = {'screenshot': self.screenshot().url, 'monster': 'Monster 0', 'kc': '1'}
+      messages.append(self.trackQueued(self.seedSubmission(self.queueChannel, '# New submission:\n', member, rsn, team, 'submit_monster_killcount', params, '1 KC of Monster 0', [next(self.backend.submissionIds)])))
+    return messages
+
+  '''
+  Registers a seeded queue message with the bot's queue depth and review dispatcher, like a submission made through the
+  bot would be
+  '''
+  def trackQueued(self, message):
+    self.showdownBot.submissionQueue.shardForChannel(message.channel.id).depth += 1
+    self.showdownBot.dispatcher.add(message.id, message.channel.id)
+    return message
+
+  '''
+  Returns the oldest submission message in the queue channel
+  '''
+  def oldestQueuedMessage(self):
+    return next(iter(self.queueChannel.messages.values()))
@@ -0,0 +1,260 @@
+import itertools
+from collections import Counter
+from discord import InteractionType
+
+# In-process stand-ins for the discord.py objects the bot touches, so command handlers and the interaction hook can be
+# driven without connecting to Discord. Every call that would hit the Discord API is counted in a DiscordCallCounter.
+
+snowflakes = itertools.count(10**17)
+
+'''
+Returns a new unique Discord-style ID
+'''
+def nextSnowflake():
+  return next(snowflakes)
+
+# Counts the Discord API calls the bot would have made, by operation
+class DiscordCallCounter():
+
+  def __init__(self):
+    self.counts = Counter()
+
+  def record(self, operation):
+    self.counts[operation] += 1
+
+  def total(self):
+    return sum(self.counts.values())
+
+  def reset(self):
+    self.counts.clear()
+
+class FakeRole():
+
+  def __init__(self, name):
+    self.id = nextSnowflake()
+    self.name = name
+
+class FakeMember():
+
+  def __init__(self, name, roles = None):
+    self.id = nextSnowflake()
+    self.name = name
+    self.display_name = name
+    self.global_name = name
+    self.roles = roles or []
+    self.mention = f'<@{self.id}>'
+
+class FakeMessageReference():
+
+  def __init__(self, messageId):
+    self.message_id = messageId
+
+class FakeMessage():
+
+  def __init__(self, channel, content, author = None, reference = None, embed = None, view = None):
+    self.id = nextSnowflake()
+    self.channel = channel
+    self.content = content
+    self.author = author
+    self.reference = reference
+    self.embed = embed
+    self.embeds = [embed] if embed else []
+    self.view = view
+    self.jump_url = f'https://discord.com/channels/0/{channel.id}/{self.id}'
+
+  async def delete(self):
+    self.channel.calls.record('message.delete')
+    self.channel.removeMessage(self)
+
+  async def edit(self, content = None, embed = None, view = None, **kwargs):
+    self.channel.calls.record('message.edit')
+    if(content is not None):
+      self.content = content
+    if(embed is not None):
+      self.embed = embed
+      self.embeds = [embed]
+
+  async def reply(self, content = None, **kwargs):
+    return await self.channel.send(content, reference = self, **kwargs)
+
+class FakeTextChannel():
+
+  def __init__(self, name, calls, guild = None):
+    self.id = nextSnowflake()
+    self.name = name
+    self.calls = calls
+    self.guild = guild
+    self.messages = {} # Message ID -> message, in the order they were sent
+
+  async def send(self, content = None, view = None, embed = None, reference = None, file = None, files = None, **kwargs):
+    self.calls.record('channel.send')
+    messageReference = None
+    if(reference is not None):
+      messageReference = FakeMessageReference(reference.id if hasattr(reference, 'id') else reference.message_id)
+    message = FakeMessage(self, content, reference = messageReference, embed = embed, view = view)
+    self.messages[message.id] = message
+    return message
+
+  '''
+  Adds a message without counting an API call (used to seed the channel)
+  '''
+  def addMessage(self, content, reference = None):
+    message = FakeMessage(self, content, reference = reference)
+    self.messages[message.id] = message
+    return message
+
+  def removeMessage(self, message):
+    self.messages.pop(message.id, None)
+
+  def get_partial_message(self, messageId):
+    return self.messages.get(messageId)
+
+  async def fetch_message(self, messageId):
+    self.calls.record('channel.fetch_message')
+    return self.messages[messageId]
+
+  async def history(self, limit = 100, oldest_first = False, **kwargs):
+    messages = list(self.messages.values())
+    if(not oldest_first):
+      messages.reverse()
+    if(limit is not None):
+      messages = messages[:limit]
+    for i, message in enumerate(messages):
+      if(i % 100 == 0): # Discord returns history in pages of 100 messages
+        self.calls.record('channel.history')
+      yield message
+
+class FakeGuild():
+
+  def __init__(self, calls):
+    self.id = nextSnowflake()
+    self.calls = calls
+    self.channels = []
+    self.members = []
+    self.roles = []
+
+  def addChannel(self, name):
+    channel = FakeTextChannel(name, self.calls, self)
+    self.channels.append(channel)
+    return channel
+
+  def addMember(self, name, roles = None):
+    member = FakeMember(name, roles)
+    self.members.append(member)
+    return member
+
+  def addRole(self, name):
+    role = FakeRole(name)
+    self.roles.append(role)
+    return role
+
+  def get_member(self, memberId):
+    for member in self.members:
+      if(member.id == memberId):
+        return member
+    return None
+
+  def get_member_named(self, name):
+    for member in self.members:
+      if(member.name == name):
+        return member
+    return None
+
+  def get_channel(self, channelId):
+    for channel in self.channels:
+      if(channel.id == channelId):
+        return channel
+    return None
+
+class FakeResponse():
+
+  def __init__(self, calls):
+    self.calls = calls
+    self.responded = False
+    self.messages = []
+
+  async def send_message(self, content = None, ephemeral = False, **kwargs):
+    if(self.responded):
+      raise Exception('Interaction has already been responded to')
+    self.calls.record('interaction.response')
+    self.responded = True
+    self.messages.append(content)
+
+  async def defer(self, ephemeral = False, thinking = False):
+    self.calls.record('interaction.response')
+    self.responded = True
+
+  def is_done(self):
+    return self.responded
+
+class FakeFollowup():
+
+  def __init__(self, calls):
+    self.calls = calls
+    self.messages = []
+
+  async def send(self, content = None, ephemeral = False, **kwargs):
+    self.calls.record('interaction.followup')
+    self.messages.append(content)
+
+class FakeCommand():
+
+  def __init__(self, name):
+    self.name = name
+    self.qualified_name = name
+
+class FakeAttachment():
+
+  def __init__(self, url, filename = 'screenshot.png', size = 0):
+    self.id = nextSnowflake()
+    self.url = url
+    self.filename = filename
+    self.size = size
+
+'''
+A fake Interaction. For slash commands, "options" maps parameter names to values the way Discord sends them
+(attachments are passed as FakeAttachment objects and resolved the way Discord does it), and is kept as the arguments
+to call the command's callback with.
+'''
+class FakeInteraction():
+
+  def __init__(self, calls, user, channel, commandName = None, options = None, customId = None, message = None, interactionType = None, client = None):
+    self.id = nextSnowflake()
+    self.client = client
+    self.user = user
+    self.channel = channel
+    self.guild = channel.guild if channel else None
+    self.message = message
+    self.extras = {}
+    self.command_failed = False
+    self.response = FakeResponse(calls)
+    self.followup = FakeFollowup(calls)
+    self.calls = calls
+    self.options = options or {}
+    if(customId is not None):
+      self.type = InteractionType.component
+      self.command = None
+      self.data = {'component_type': 2, 'custom_id': customId}
+    else:
+      self.type = interactionType or InteractionType.application_command
+      self.command = FakeCommand(commandName)
+      self.data = {'name': commandName, 'options': [], 'resolved': {'attachments': {}}}
+      for name, value in (options or {}).items():
+        if(value is None):
+          continue
+        if(isinstance(value, FakeAttachment)):
+          self.data['resolved']['attachments'][str(value.id)] = {'url': value.url, 'filename': value.filename}
+          self.data['options'].append({'name': name, 'value': str(value.id), 'type': 11})
+        else:
+          self.data['options'].append({'name': name, 'value': value})
+
+  async def delete_original_response(self):
+    self.calls.record('interaction.delete_original_response')
+
+'''
+Points a ShowdownBot's discord.py client at a fake guild instead of the Discord gateway cache
+'''
+def installFakeGuild(showdownBot, guild):
+  showdownBot.guildId = guild.id
+  showdownBot.bot.get_guild = lambda guildId: guild if guildId == guild.id else None
+  showdownBot.bot.get_channel = guild.get_channel
@@ -0,0 +1,355 @@
+import argparse
+import asyncio
+import gzip
+import json
+import logging
+import random
+import re
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from discord import AppCommandOptionType
+from benchmarks.benchmark import summarize
+from benchmarks.environment import BenchmarkEnvironment
+from benchmarks.fakes import FakeAttachment
+from benchmarks.standinbackend import FIXED_METHODS
+from showdownbot.autoapproval import REVIEWER_NAME
+
+# Replays the submissions and decisions recorded in showdown.log against the bot, using the benchmark environment
+# (fake Discord guild and stand-in backend).
+# Usage: python -m benchmarks.replay showdown.log [more log files...] --speed 10 --output replay-results.json
+
+log = logging.getLogger('showdown')
+
+TEXT_LINE = re.compile(r'^(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}\.\d{3}) \w+ \S+ - \S+: (.*)$')
+SUBMISSION_JSON = re.compile(r'Submission json: `(.*)`\s*$', re.MULTILINE)
+SUBMISSION_IDS = re.compile(r'^IDs: (\[.*\])$', re.MULTILINE)
+DECISION = re.compile(r'^Submission (approved|denied|undone) by (.+?):\n(.*)$', re.DOTALL)
+AUTO_APPROVAL = re.compile(r'^Submission auto-approved:\n(.*)$', re.DOTALL)
+
+# A single submission or decision from the log
+class WorkloadEvent():
+
+  def __init__(self, timestamp, kind, submission, reviewer = None):
+    self.timestamp = timestamp
+    self.kind = kind # 'submit', 'approve', 'deny' or 'undo'
+    self.submission = submission # The submission's json object, as logged
+    self.reviewer = reviewer
+
+  def key(self):
+    return tuple(self.submission['ids'])
+
+  '''
+  Returns a copy of this event for a synthetic player, used to scale up the number of players
+  '''
+  def clone(self, index):
+    submission = dict(self.submission)
+    submission['user'] = f'{submission['user']}-{index}'
+    submission['rsn'] = f'{submission['rsn']} ({index})'
+    submission['ids'] = [f'{id}-{index}' for id in submission['ids']]
+    return WorkloadEvent(self.timestamp, self.kind, submission, self.reviewer)
+
+'''
+Reads (timestamp, message) records from a log file, in either the text or the JSON log format. Messages spanning
+several lines in the text format are joined back together.
+'''
+def readLogRecords(path):
+  opener = gzip.open if path.endswith('.gz') else open
+  timestamp = None
+  lines = []
+  with opener(path, 'rt', encoding='utf-8', errors='replace') as logFile:
+    for line in logFile:
+      line = line.rstrip('\n')
+      if(line.startswith('{')):
+        try:
+          record = json.loads(line)
+        except ValueError:
+          record = None
+        if(record and 'time' in record and 'message' in record):
+          if(timestamp):
+            yield timestamp, '\n'.join(lines)
+          yield datetime.fromisoformat(record['time']).timestamp(), record['message']
+          timestamp, lines = None, []
+          continue
+      match = TEXT_LINE.match(line)
+      if(match):
+        if(timestamp):
+          yield timestamp, '\n'.join(lines)
+        timestamp = datetime.strptime(match.group(1), '%Y-%m-%d %H:%M:%S.%f').timestamp()
+        lines = [match.group(2)]
+      elif(timestamp):
+        lines.append(line)
+  if(timestamp):
+    yield timestamp, '\n'.join(lines)
+
+'''
+Parses log files into a list of workload events, ordered by time. Replays don't auto-approve: a submission left for
+auto-approval is replayed as a submission to the queue, and its automatic approval as an approval by a reviewer.
+'''
+def parseWorkload(paths):
+  events = []
+  autoApproval = set() # Keys of the submissions left for auto-approval
+  for path in paths:
+    for timestamp, message in readLogRecords(path):
+      if(message.startswith('Submission created:') or message.startswith('Submission created for auto-approval:')):
+        match = SUBMISSION_JSON.search(message)
+        if(match):
+          event = WorkloadEvent(timestamp, 'submit', json.loads(match.group(1)))
+          events.append(event)
+          if(message.startswith('Submission created for auto-approval:')):
+            autoApproval.add(event.key())
+        continue
+      match = DECISION.match(message)
+      if(match):
+        kind = {'approved': 'approve', 'denied': 'deny', 'undone': 'undo'}[match.group(1)]
+        events.append(WorkloadEvent(timestamp, kind, json.loads(match.group(3)), match.group(2)))
+        continue
+      match = AUTO_APPROVAL.match(message)
+      if(match):
+        events.append(WorkloadEvent(timestamp, 'approve', json.loads(match.group(1)), REVIEWER_NAME))
+  events.sort(key=lambda event: event.timestamp)
+
+  # An undo sends the submission back to the queue, which logs "Submission created" again; the replayed undo does that
+  # itself, so those entries are dropped. So are the ones logged when a submission left for auto-approval is flagged and
+  # sent to the queue, since the replayed submission went to the queue in the first place.
+  undone = set()
+  offered = set()
+  workload = []
+  for event in events:
+    if(event.kind == 'undo'):
+      undone.add(event.key())
+    elif(event.kind == 'submit' and event.key() in undone):
+      undone.discard(event.key())
+      continue
+    elif(event.kind == 'submit' and event.key() in autoApproval):
+      if(event.key() in offered):
+        offered.discard(event.key())
+        continue
+      offered.add(event.key())
+    workload.append(event)
+  return workload
+
+'''
+Scales the workload up by adding copies of every event for synthetic players
+'''
+def scaleWorkload(workload, scale):
+  scaled = list(workload)
+  for index in range(2, scale + 1):
+    scaled.extend(event.clone(index) for event in workload)
+  scaled.sort(key=lambda event: event.timestamp)
+  return scaled
+
+'''
+Builds a stand-in competition containing every team, player and catalog entry referenced by the workload
+'''
+def competitionFromWorkload(workload):
+  teams = {}
+  methods = {name: {'name': name, 'contributionMethodType': 'SUBMISSION', 'purchaseItems': []} for name in FIXED_METHODS}
+  clogItems = {}
+  challenges = {}
+  records = {}
+  for event in workload:
+    submission = event.submission
+    team = teams.setdefault(submission['team'], {'name': submission['team'], 'abbreviation': f't{len(teams)}', 'color': '#ffffff', 'players': {}})
+    team['players'][submission['user']] = {'rsn': submission['rsn'], 'discordName': submission['user']}
+    params = submission['params']
+    command = submission['commandName']
+    if(command == 'submit_monster_killcount'):
+      methods.setdefault(params['monster'], {'name': params['monster'], 'contributionMethodType': 'SUBMISSION_KC', 'purchaseItems': []})
+    elif(command == 'submit_item_drops'):
+      methods.setdefault(params['item_type'], {'name': params['item_type'], 'contributionMethodType': 'SUBMISSION_ITEM_DROP', 'purchaseItems': []})
+    elif(command == 'submit_collection_log'):
+      clogItems[params['item']] = {'name': params['item'], 'itemOptions': []}
+    elif(command == 'submit_minigame_purchase'):
+      methods['Pest Control: Games']['purchaseItems'].append({'name': params['item_name'], 'cost': 1})
+    elif(command in ['submit_team_speedrun', 'submit_point_challenge', 'submit_relay_time']):
+      name, _, component = params['challenge'].partition('|')
+      challengeType = {'submit_team_speedrun': 'SPEEDRUN', 'submit_point_challenge': 'POINTS', 'submit_relay_time': 'RELAY'}[command]
+      challenge = challenges.setdefault(name, {'name': name, 'type': challengeType, 'relayComponents': []})
+      if(component and component != 'None' and {'name': component} not in challenge['relayComponents']):
+        challenge['relayComponents'].append({'name': component})
+    elif(command == 'submit_record'):
+      name, _, handicap = params['record'].partition('|')
+      record = records.setdefault(name.lower(), {'name': name.lower(), 'handicaps': []})
+      if(handicap and handicap != 'None' and {'name': handicap} not in record['handicaps']):
+        record['handicaps'].append({'name': handicap})
+  now = datetime.now().astimezone()
+  return {
+    'competitionInfo': {'startDatetime': (now - timedelta(days=7)).isoformat(), 'endDatetime': (now + timedelta(days=7)).isoformat()},
+    'teams': [dict(team, players=list(team['players'].values())) for team in teams.values()],
+    'tiles': [],
+    'contributionMethods': list(methods.values()),
+    'collectionLogItems': list(clogItems.values()),
+    'records': list(records.values()),
+    'challenges': list(challenges.values())
+  }
+
+# Drives a workload against a benchmark environment, keeping the events for each submission in order
+class Replayer():
+
+  def __init__(self, environment, workload, speed):
+    self.environment = environment
+    self.workload = workload
+    self.speed = speed # None means as fast as possible
+    self.members = {member.name: member for rsn, member, team in environment.players}
+    self.queueMessages = {} # Logged submission IDs -> current queue message
+    self.logMessages = {} # Logged submission IDs -> current log message
+    self.chains = {} # Logged submission IDs -> task handling the latest event for that submission
+    self.latencies = {}
+    self.errors = Counter()
+    self.lateness = []
+
+  '''
+  Finds the most recent message in a channel for a submission, by the submission IDs the bot was given by the backend
+  '''
+  def findMessage(self, channel, ids):
+    needle = '"ids":' + json.dumps(ids, separators=(',', ':')) # Submission json is compact
+    for message in reversed(list(channel.messages.values())):
+      if(message.content and needle in message.content):
+        return message
+    return None
+
+  '''
+  Converts the logged (stringified) parameters of a command back into callback arguments
+  '''
+  def commandArguments(self, command, params):
+    arguments = {}
+    for name, parameter in command._params.items():
+      if(name not in params):
+        arguments[name] = None if parameter.required else parameter.default
+      elif(parameter.type == AppCommandOptionType.attachment):
+        arguments[name] = FakeAttachment(params[name])
+      elif(parameter.type == AppCommandOptionType.integer):
+        arguments[name] = int(params[name])
+      elif(parameter.type == AppCommandOptionType.number):
+        arguments[name] = float(params[name])
+      elif(parameter.type == AppCommandOptionType.boolean):
+        arguments[name] = params[name] == 'True'
+      else:
+        arguments[name] = params[name]
+    return arguments
+
+  async def submit(self, event):
+    submission = event.submission
+    command = self.environment.showdownBot.bot.tree.get_command(submission['commandName'])
+    interaction = await self.environment.runCommand(submission['commandName'], self.commandArguments(command, submission['params']), self.members[submission['user']])
+    if(interaction.command_failed or len(interaction.response.messages) == 0):
+      return False
+    newIds = json.loads(SUBMISSION_IDS.search(interaction.response.messages[0]).group(1))
+    self.queueMessages[event.key()] = self.findMessage(self.environment.queueChannel, newIds)
+    return True
+
+  async def decide(self, event):
+    environment = self.environment
+    submission = event.submission
+    member = self.members[submission['user']]
+    if(event.kind == 'undo'):
+      message = self.logMessages.pop(event.key(), None)
+      if(message is None): # The decision happened before the log started
+        message = environment.seedSubmission(environment.logChannel, '# Submission approved:\n', member, submission['rsn'], submission['team'], submission['commandName'], submission['params'], submission['shortDesc'], [next(environment.backend.submissionIds)])
+    else:
+      message = self.queueMessages.pop(event.key(), None)
+      if(message is None): # The submission was made before the log started
+        message = environment.trackQueued(environment.seedSubmission(environment.queueChannel, '# New submission:\n', member, submission['rsn'], submission['team'], submission['commandName'], submission['params'], submission['shortDesc'], [next(environment.backend.submissionIds)]))
+    ids = json.loads(SUBMISSION_JSON.search(message.content).group(1))['ids']
+    interaction = await environment.clickButton(message, event.kind)
+    if(interaction.command_failed):
+      return False
+    if(event.kind == 'undo'):
+      self.queueMessages[event.key()] = self.findMessage(environment.queueChannel, ids)
+    else:
+      self.logMessages[event.key()] = self.findMessage(environment.logChannel, ids)
+    return True
+
+  async def execute(self, event, previous):
+    if(previous):
+      await previous
+    start = time.perf_counter()
+    try:
+      succeeded = await (self.submit(event) if event.kind == 'submit' else self.decide(event))
+    except Exception as e:
+      log.error('Error replaying event', exc_info=e)
+      succeeded = False
+    self.latencies.setdefault(event.kind, []).append(time.perf_counter() - start)
+    if(not succeeded):
+      self.errors[event.kind] += 1
+
+  async def run(self):
+    if(len(self.workload) == 0):
+      return 0.0
+    firstTimestamp = self.workload[0].timestamp
+    wallStart = time.perf_counter()
+    for event in self.workload:
+      if(self.speed):
+        delay = (event.timestamp - firstTimestamp) / self.speed - (time.perf_counter() - wallStart)
+        if(delay > 0):
+          await asyncio.sleep(delay)
+        self.lateness.append(max(0.0, -delay))
+      else:
+        await asyncio.sleep(0) # Let in-flight events make progress
+      key = event.key()
+      self.chains[key] = asyncio.create_task(self.execute(event, self.chains.get(key)))
+    await asyncio.gather(*self.chains.values())
+    return time.perf_counter() - wallStart
+
+  def report(self, wallTime):
+    environment = self.environment
+    operations = sum(len(latencies) for latencies in self.latencies.values())
+    lateness = sorted(self.lateness)
+    return {
+      'events': len(self.workload),
+      'wallTimeSeconds': wallTime,
+      'loggedTimeSeconds': self.workload[-1].timestamp - self.workload[0].timestamp if self.workload else 0,
+      'eventsPerSecond': operations / wallTime if wallTime > 0 else None,
+      'scheduleLatenessP99Ms': lateness[min(len(lateness) - 1, int(len(lateness) * 0.99))] * 1000 if lateness else None,
+      'scheduleLatenessMaxMs': lateness[-1] * 1000 if lateness else None,
+      'latency': {kind: summarize(latencies, wallTime, 0, 0, self.errors[kind]) for kind, latencies in self.latencies.items()},
+      'backendCalls': dict(environment.backend.calls),
+      'discordCalls': dict(environment.calls.counts)
+    }
+
+async def replay(args):
+  workload = parseWorkload(args.logs)
+  if(args.limit):
+    workload = workload[:args.limit]
+  if(args.scale > 1):
+    workload = scaleWorkload(workload, args.scale)
+  print(f'Parsed {len(workload)} events from {len(args.logs)} log file(s)')
+  environment = BenchmarkEnvironment(competitionFromWorkload(workload), latency = args.latency, jitter = args.jitter, errorRate = args.error_rate)
+  try:
+    await environment.load()
+    environment.backend.resetCounts()
+    environment.calls.reset()
+    replayer = Replayer(environment, workload, None if args.speed == 'max' else float(args.speed))
+    wallTime = await replayer.run()
+    return replayer.report(wallTime)
+  finally:
+    environment.stop()
+
+def main():
+  parser = argparse.ArgumentParser(description='Replay submissions and decisions from showdown.log against the bot')
+  parser.add_argument('logs', nargs='+', help='Log files to replay (text or JSON format, optionally gzipped)')
+  parser.add_argument('--speed', default='1', help='Replay speed multiplier (e.g. 1 or 10), or "max" to replay as fast as possible')
+  parser.add_argument('--scale', type=int, default=1, help='Multiply the number of players by this factor, replaying each event for every copy')
+  parser.add_argument('--limit', type=int, help='Only replay the first N events of the log')
+  parser.add_argument('--latency', type=float, default=0.0, help='Stand-in backend latency per request, in seconds')
+  parser.add_argument('--jitter', type=float, default=0.0, help='Random extra backend latency (uniform, up to this many seconds)')
+  parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of backend requests that fail with a 500')
+  parser.add_argument('--seed', type=int, default=0)
+  parser.add_argument('--output', default='replay-results.json', help='File to write the report to')
+  args = parser.parse_args()
+
+  logging.getLogger('showdown').setLevel(logging.CRITICAL) # Failures are counted in the report instead
+  random.seed(args.seed)
+  report = asyncio.run(replay(args))
+  report['parameters'] = vars(args)
+  with open(args.output, 'w') as outputFile:
+    json.dump(report, outputFile, indent=2)
+  for kind, summary in report['latency'].items():
+    print(f'{kind:<8} {summary['operations']:6} ops  p50 {summary['p50Ms']:8.2f} ms  p99 {summary['p99Ms']:8.2f} ms  errors {summary['errors']}')
+  print(f'Replayed {report['events']} events in {report['wallTimeSeconds']:.1f}s (logged span: {report['loggedTimeSeconds']:.1f}s)')
+  print(f'Backend calls: {sum(report['backendCalls'].values())}, Discord API calls: {sum(report['discordCalls'].values())}')
+  print('Report written to ' + args.output)
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,176 @@
+import argparse
+import asyncio
+import gc
+import json
+import logging
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from benchmarks.environment import BenchmarkEnvironment
+from benchmarks.standinbackend import generateCompetition
+
+# Memory soak test: drives the bot through many simulated hours of submissions, decisions and reloads against the fake
+# Discord guild and stand-in backend, taking tracemalloc snapshots as it goes, and fails if the memory the bot retains
+# grows beyond a budget. Simulated time is counted in rounds of work; clocks are not advanced.
+# Usage: python -m benchmarks.soak --hours 48 --budget-mb 2 --output soak-results.json
+
+'''
+Tracemalloc filters: allocations by tracemalloc itself and by the import system (reloaded cogs) aren't the bot's
+'''
+SNAPSHOT_FILTERS = (
+  tracemalloc.Filter(False, tracemalloc.__file__),
+  tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+  tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+  tracemalloc.Filter(False, '<unknown>')
+)
+
+def takeSnapshot():
+  gc.collect()
+  return tracemalloc.take_snapshot().filter_traces(SNAPSHOT_FILTERS)
+
+def tracedSize(snapshot):
+  return sum(statistic.size for statistic in snapshot.statistics('filename'))
+
+'''
+Runs one simulated hour: submissions through the submit commands, decisions on everything but `queueDepth` of the
+queue, a few undos, an auto-approval batch and a competition info reload
+'''
+async def simulateHour(environment, args, commands):
+  showdownBot = environment.showdownBot
+  errors = 0
+  for i in range(args.submissions_per_hour):
+    commandName, options = random.choice(commands)()
+    rsn, member, team = environment.randomPlayer()
+    interaction = await environment.runCommand(commandName, options, member)
+    errors += interaction.command_failed
+  if(showdownBot.autoApproval is not None):
+    await showdownBot.autoApproval.flush()
+  while(len(environment.queueChannel.messages) > args.queue_depth):
+    interaction = await environment.clickButton(environment.oldestQueuedMessage(), random.choice(('approve', 'approve', 'deny')))
+    errors += interaction.command_failed
+  for message in random.sample(list(environment.logChannel.messages.values()), min(args.undos_per_hour, len(environment.logChannel.messages))):
+    interaction = await environment.clickButton(message, 'undo')
+    errors += interaction.command_failed
+  await showdownBot.loadCompetitionInfo()
+  errors += not showdownBot.competitionLoaded
+
+  # Discord keeps the log and team channel messages, not the bot: forget them so the fakes don't count as growth
+  environment.logChannel.messages.clear()
+  for channel in environment.teamChannels.values():
+    channel.messages.clear()
+  environment.calls.reset()
+  environment.backend.resetCounts()
+  return errors
+
+'''
+Builds the submissions to make: functions returning (command name, options) for a random submission
+'''
+def buildCommands(environment):
+  clogItems = [item['name'] for item in environment.competition['collectionLogItems']]
+  monsters = [method['name'] for method in environment.competition['contributionMethods'] if method['contributionMethodType'] == 'SUBMISSION_KC']
+  drops = [method['name'] for method in environment.competition['contributionMethods'] if method['contributionMethodType'] == 'SUBMISSION_ITEM_DROP']
+  return [
+    lambda: ('submit_monster_killcount', {'screenshot': environment.screenshot(), 'monster': random.choice(monsters), 'kc': random.randint(1, 5000)}),
+    lambda: ('submit_collection_log', {'screenshot': environment.screenshot(), 'item': random.choice(clogItems)}),
+    lambda: ('submit_item_drops', {'screenshot': environment.screenshot(), 'item_type': random.choice(drops)})
+  ]
+
+async def runSoak(args):
+  competition = generateCompetition(players = args.players, teams = args.teams, clogItems = args.clog_items)
+  stateDir = tempfile.mkdtemp(prefix='showdown-soak-')
+  extraConfig = {'AutoApproval': {
+    'enabled': 'true',
+    'stateFile': os.path.join(stateDir, 'autoapproval.json'),
+    'pendingFile': os.path.join(stateDir, 'autoapproval-pending.json')
+  }} if args.auto_approval else None
+  environment = BenchmarkEnvironment(competition, extraConfig = extraConfig)
+  try:
+    await environment.load()
+    environment.seedQueue(args.queue_depth)
+    commands = buildCommands(environment)
+    errors = 0
+    for hour in range(args.warmup_hours): # Lets caches, interned strings and metric label sets reach their steady state
+      errors += await simulateHour(environment, args, commands)
+    baseline = takeSnapshot()
+    baselineSize = tracedSize(baseline)
+    samples = []
+    start = time.perf_counter()
+    for hour in range(1, args.hours + 1):
+      errors += await simulateHour(environment, args, commands)
+      if(hour % args.reload_every == 0):
+        await environment.showdownBot.reloadExtensions()
+      if(hour % args.snapshot_every == 0 or hour == args.hours):
+        snapshot = takeSnapshot()
+        size = tracedSize(snapshot)
+        samples.append({'hour': hour, 'tracedBytes': size, 'growthBytes': size - baselineSize})
+        print(f'Hour {hour:>4}: {size / 1024 / 1024:8.2f} MiB traced, {(size - baselineSize) / 1024:+10.1f} KiB since baseline')
+    growth = [
+      {'site': str(statistic.traceback), 'sizeDiffBytes': statistic.size_diff, 'countDiff': statistic.count_diff}
+      for statistic in snapshot.compare_to(baseline, 'traceback' if args.frames > 1 else 'lineno')[:args.top]
+      if statistic.size_diff > 0
+    ]
+    growthBytes = samples[-1]['growthBytes']
+    return {
+      'hours': args.hours,
+      'wallSeconds': time.perf_counter() - start,
+      'errors': errors,
+      'baselineBytes': baselineSize,
+      'growthBytes': growthBytes,
+      'budgetBytes': int(args.budget_mb * 1024 * 1024),
+      'passed': growthBytes <= args.budget_mb * 1024 * 1024,
+      'samples': samples,
+      'topGrowth': growth
+    }
+  finally:
+    environment.stop()
+    shutil.rmtree(stateDir, ignore_errors=True)
+
+def main():
+  parser = argparse.ArgumentParser(description='Memory soak test of the Showdown bot handlers')
+  parser.add_argument('--players', type=int, default=500)
+  parser.add_argument('--teams', type=int, default=10)
+  parser.add_argument('--clog-items', type=int, default=2000)
+  parser.add_argument('--queue-depth', type=int, default=100, help='Number of pending submissions left in the queue after each hour')
+  parser.add_argument('--hours', type=int, default=48, help='Simulated hours to measure, after the warmup')
+  parser.add_argument('--warmup-hours', type=int, default=2)
+  parser.add_argument('--submissions-per-hour', type=int, default=200)
+  parser.add_argument('--undos-per-hour', type=int, default=2)
+  parser.add_argument('--reload-every', type=int, default=12, help='Reload the command cogs every this many simulated hours')
+  parser.add_argument('--snapshot-every', type=int, default=6, help='Take a tracemalloc snapshot every this many simulated hours')
+  parser.add_argument('--budget-mb', type=float, default=2.0, help='Largest allowed growth of traced memory since the baseline, in MiB')
+  parser.add_argument('--frames', type=int, default=1, help='Stack frames recorded per allocation (more is slower but shows callers)')
+  parser.add_argument('--top', type=int, default=15, help='Number of growing allocation sites to report')
+  parser.add_argument('--auto-approval', action='store_true', help='Enable auto-approval, so its history caches are exercised too')
+  parser.add_argument('--seed', type=int, default=0)
+  parser.add_argument('--output', default='soak-results.json', help='File to write the results to')
+  args = parser.parse_args()
+
+  logging.getLogger('showdown').setLevel(logging.CRITICAL) # Failures are counted in the results instead
+  random.seed(args.seed)
+  tracemalloc.start(args.frames)
+  results = asyncio.run(runSoak(args))
+  tracemalloc.stop()
+  output = {
+    'timestamp': datetime.now().astimezone().isoformat(timespec='seconds'),
+    'python': platform.python_version(),
+    'parameters': vars(args),
+    'results': results
+  }
+  with open(args.output, 'w') as outputFile:
+    json.dump(output, outputFile, indent=2)
+  print(f'{results['errors']} errors. Traced memory grew {results['growthBytes'] / 1024:.1f} KiB over {args.hours} hours (budget {args.budget_mb * 1024:.0f} KiB)')
+  if(not results['passed']):
+    print('FAILED: memory growth is over budget. Top growing allocation sites:')
+    for site in results['topGrowth']:
+      print(f'  {site['sizeDiffBytes'] / 1024:+10.1f} KiB {site['countDiff']:+8d} blocks  {site['site']}')
+  print('Results written to ' + args.output)
+  sys.exit(0 if results['passed'] else 1)
+
+if __name__ == '__main__':
+  main()
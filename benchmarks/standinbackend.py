@@ -0,0 +1,147 @@
+import itertools
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# A local stand-in for the UIM Showdown backend, serving a generated competition of a configurable size. Every request
+# can be delayed by a configurable latency and failed at a configurable error rate.
+
+# Contribution methods the bot's commands submit to by name
+FIXED_METHODS = [
+  'Pest Control: Games', 'LMS: Kills', 'LMS: Wins', "MTA: Alchemist's Playground", 'MTA: Creature Graveyard',
+  'MTA: Enchanting Chamber', 'MTA: Telekinetic Theatre', 'Tithe Farm Points', 'Farming Contracts', 'Nex: Nihil Shards',
+  'Revenants: Ether', 'Hueycoatl: Hides', 'Mixology: Resin', 'Barbarian Assault Points'
+] + [f'Doom of Mokhaiotl - Delve Level {level}' for level in ['1', '2', '3', '4', '5', '6', '7', '8', '8+']]
+
+'''
+Generates the data for a competition of the given size
+'''
+def generateCompetition(players = 500, teams = 10, clogItems = 2000, monsters = 100, itemDrops = 50, tiles = 50, records = 20, challenges = 20, purchaseItems = 40):
+  teamList = []
+  for i in range(teams):
+    teamList.append({'name': f'Team {i}', 'abbreviation': f't{i}', 'color': '#ffffff', 'players': []})
+  for i in range(players):
+    teamList[i % teams]['players'].append({'rsn': f'Player {i}', 'discordName': f'player{i}'})
+  contributionMethods = []
+  for name in FIXED_METHODS:
+    contributionMethods.append({'name': name, 'contributionMethodType': 'SUBMISSION', 'purchaseItems': []})
+  for i in range(monsters):
+    contributionMethods.append({'name': f'Monster {i}', 'contributionMethodType': 'SUBMISSION_KC', 'purchaseItems': []})
+  for i in range(itemDrops):
+    contributionMethods.append({'name': f'Drop {i}', 'contributionMethodType': 'SUBMISSION_ITEM_DROP', 'purchaseItems': []})
+  for i in range(purchaseItems):
+    contributionMethods[i % len(FIXED_METHODS)]['purchaseItems'].append({'name': f'Purchase Item {i}', 'cost': 10 + i})
+  now = datetime.now().astimezone()
+  return {
+    'competitionInfo': {'startDatetime': (now - timedelta(days=7)).isoformat(), 'endDatetime': (now + timedelta(days=7)).isoformat()},
+    'teams': teamList,
+    'tiles': [{'name': f'Tile {i}'} for i in range(tiles)],
+    'contributionMethods': contributionMethods,
+    'collectionLogItems': [{'name': f'Clog Item {i}', 'itemOptions': []} for i in range(clogItems)],
+    'records': [{'name': f'record {i}', 'handicaps': [{'name': 'Handicap A'}, {'name': 'Handicap B'}] if i % 2 == 0 else []} for i in range(records)],
+    'challenges': [{'name': f'Challenge {i}', 'type': ['SPEEDRUN', 'POINTS', 'RELAY'][i % 3], 'relayComponents': [{'name': 'Leg 1'}, {'name': 'Leg 2'}] if i % 3 == 2 else []} for i in range(challenges)]
+  }
+
+class StandinBackend():
+
+  def __init__(self, competition = None, latency = 0.0, jitter = 0.0, errorRate = 0.0, host = '127.0.0.1', port = 0):
+    self.competition = competition or generateCompetition()
+    self.latency = latency
+    self.jitter = jitter
+    self.errorRate = errorRate
+    self.host = host
+    self.port = port
+    self.submissionIds = itertools.count(1)
+    self.calls = Counter() # "METHOD /endpoint" -> count
+    self.traceIds = Counter()
+    self.lock = threading.Lock()
+    self.server = None
+
+  @property
+  def url(self):
+    return f'http://{self.host}:{self.server.server_address[1]}'
+
+  def resetCounts(self):
+    with self.lock:
+      self.calls.clear()
+      self.traceIds.clear()
+
+  def totalCalls(self):
+    with self.lock:
+      return sum(self.calls.values())
+
+  '''
+  Handles a request, returning a (statusCode, body) tuple
+  '''
+  def handle(self, method, path, body):
+    path = path.split('?')[0]
+    if(method == 'GET'):
+      key = path.strip('/')
+      if(key in self.competition):
+        return 200, self.competition[key]
+      return 404, None
+    if(method == 'POST' and path.startswith('/submissions/')):
+      return 200, {'id': next(self.submissionIds)}
+    if(method == 'PATCH' and re.fullmatch(r'/submissions/[0-9]+(/undo)?', path)):
+      return 200, {}
+    if(path == '/admin/updateCompetitorRole'):
+      return 200, {'signupsNotFound': []}
+    if(path == '/admin/setupDiscordServer'):
+      return 200, {'namesNotFound': []}
+    if(path.startswith('/admin/')):
+      return 200, {}
+    return 404, None
+
+  def start(self):
+    backend = self
+
+    class RequestHandler(BaseHTTPRequestHandler):
+
+      protocol_version = 'HTTP/1.1'
+
+      def respond(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        body = json.loads(self.rfile.read(length)) if length > 0 else None
+        endpoint = self.command + ' ' + re.sub(r'/[0-9]+(?=/|$)', '/{id}', self.path.split('?')[0])
+        with backend.lock:
+          backend.calls[endpoint] += 1
+          if(self.headers.get('X-Trace-Id')):
+            backend.traceIds[self.headers.get('X-Trace-Id')] += 1
+        delay = backend.latency + random.uniform(0, backend.jitter)
+        if(delay > 0):
+          time.sleep(delay)
+        if(random.random() < backend.errorRate):
+          statusCode, responseBody = 500, None
+        else:
+          statusCode, responseBody = backend.handle(self.command, self.path, body)
+        encoded = json.dumps(responseBody).encode('utf-8')
+        self.send_response(statusCode)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(encoded)))
+        self.end_headers()
+        self.wfile.write(encoded)
+
+      do_GET = respond
+      do_POST = respond
+      do_PATCH = respond
+      do_PUT = respond
+      do_DELETE = respond
+
+      def log_message(self, format, *args):
+        pass
+
+    self.server = ThreadingHTTPServer((self.host, self.port), RequestHandler)
+    self.server.daemon_threads = True
+    threading.Thread(target=self.server.serve_forever, name='StandinBackend', daemon=True).start()
+    return self
+
+  def stop(self):
+    if(self.server):
+      self.server.shutdown()
+      self.server.server_close()
+      self.server = None
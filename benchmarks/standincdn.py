@@ -0,0 +1,85 @@
+import hashlib
+import random
+import re
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# A local stand-in for the Discord CDN, serving generated attachments at /attachments/<id>/<filename>. The content of an
+# attachment depends only on its ID modulo `distinctFiles`, so that some uploads are identical, as when a player submits
+# the same screenshot twice. Responses are streamed in chunks, with a configurable latency before the first byte.
+
+CHUNK_SIZE = 16 * 1024
+
+class StandinCdn():
+
+  def __init__(self, fileSize = 200 * 1024, distinctFiles = 100, latency = 0.0, errorRate = 0.0, host = '127.0.0.1', port = 0):
+    self.fileSize = fileSize
+    self.distinctFiles = distinctFiles
+    self.latency = latency
+    self.errorRate = errorRate
+    self.host = host
+    self.port = port
+    self.requests = 0
+    self.bytesServed = 0
+    self.lock = threading.Lock()
+    self.server = None
+
+  @property
+  def url(self):
+    return f'http://{self.host}:{self.server.server_address[1]}'
+
+  def attachmentUrl(self, attachmentId, filename = 'screenshot.png'):
+    return f'{self.url}/attachments/{attachmentId}/{filename}'
+
+  '''
+  Returns the content of an attachment: a deterministic pseudo-random byte string
+  '''
+  def content(self, attachmentId):
+    seed = hashlib.sha256(str(attachmentId % self.distinctFiles).encode('utf-8')).digest()
+    return (seed * (self.fileSize // len(seed) + 1))[:self.fileSize]
+
+  def start(self):
+    cdn = self
+
+    class RequestHandler(BaseHTTPRequestHandler):
+
+      protocol_version = 'HTTP/1.1'
+
+      def do_GET(self):
+        with cdn.lock:
+          cdn.requests += 1
+        if(cdn.latency > 0):
+          time.sleep(cdn.latency)
+        match = re.fullmatch(r'/attachments/([0-9]+)/[^/]+', self.path.split('?')[0])
+        statusCode = 200 if match else 404
+        if(match and random.random() < cdn.errorRate):
+          statusCode = 500
+        if(statusCode != 200):
+          self.send_response(statusCode)
+          self.send_header('Content-Length', '0')
+          self.end_headers()
+          return
+        body = cdn.content(int(match.group(1)))
+        self.send_response(200)
+        self.send_header('Content-Type', 'image/png')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        for offset in range(0, len(body), CHUNK_SIZE):
+          self.wfile.write(body[offset:offset + CHUNK_SIZE])
+        with cdn.lock:
+          cdn.bytesServed += len(body)
+
+      def log_message(self, format, *args):
+        pass
+
+    self.server = ThreadingHTTPServer((self.host, self.port), RequestHandler)
+    self.server.daemon_threads = True
+    threading.Thread(target=self.server.serve_forever, name='StandinCdn', daemon=True).start()
+    return self
+
+  def stop(self):
+    if(self.server):
+      self.server.shutdown()
+      self.server.server_close()
+      self.server = None
@@ -0,0 +1,167 @@
+import asyncio
+import contextlib
+import logging
+import math
+import time
+import showdownbot.errors as errors
+
+log = logging.getLogger('showdown')
+
+'''
+A token bucket: holds up to `burst` tokens, refilled at `rate` tokens per second
+'''
+class TokenBucket():
+
+  __slots__ = ('rate', 'burst', 'tokens', 'updatedAt')
+
+  def __init__(self, rate, burst, now):
+    self.rate = rate
+    self.burst = burst
+    self.tokens = burst
+    self.updatedAt = now
+
+  def refill(self, now):
+    self.tokens = min(self.burst, self.tokens + (now - self.updatedAt) * self.rate)
+    self.updatedAt = now
+
+  '''
+  Returns how many seconds until a token is available (0 if one is available now)
+  '''
+  def delay(self, now):
+    self.refill(now)
+    if(self.tokens >= 1):
+      return 0
+    return (1 - self.tokens) / self.rate
+
+  def take(self, now):
+    self.refill(now)
+    self.tokens -= 1
+
+  def give(self, now):
+    self.refill(now)
+    self.tokens = min(self.burst, self.tokens + 1)
+
+  '''
+  Returns whether the bucket has refilled completely, in which case it behaves like a new bucket and can be dropped
+  '''
+  def isFull(self, now):
+    return self.tokens + (now - self.updatedAt) * self.rate >= self.burst
+
+'''
+Admission control for submit commands: a token bucket per user and one for the whole server limit how fast
+submissions are accepted, and a bounded number of submissions are handled at once, with a bounded number more waiting
+their turn. Submissions over any limit are rejected with a RateLimitError telling the user when to retry.
+'''
+class AdmissionController():
+
+  def __init__(self, metrics, userRate = 0.2, userBurst = 5, globalRate = 5.0, globalBurst = 30, maxInFlight = 8, maxQueued = 32, queueTimeout = 2.0):
+    self.userRate = userRate
+    self.userBurst = userBurst
+    self.globalBucket = TokenBucket(globalRate, globalBurst, time.monotonic())
+    self.userBuckets = {} # User ID -> TokenBucket
+    self.maxInFlight = maxInFlight
+    self.maxQueued = maxQueued
+    self.queueTimeout = queueTimeout
+    self.inFlight = 0
+    self.waiters = [] # Futures of queued submissions, oldest first
+    self.lastPruned = time.monotonic()
+    self.rejections = metrics.counter('showdown_admission_rejections_total', 'Number of submit commands rejected by admission control', ('reason',))
+    metrics.gauge('showdown_admission_in_flight', 'Number of submit commands being handled').setFunction(lambda: self.inFlight)
+    metrics.gauge('showdown_admission_queued', 'Number of submit commands waiting to be handled').setFunction(lambda: len(self.waiters))
+
+  '''
+  Returns whether admission control applies to a command
+  '''
+  def appliesTo(self, commandName):
+    return commandName.startswith('submit_')
+
+  '''
+  Context manager that admits a submission from a user, waiting for a free slot if needed, and raises a RateLimitError
+  if the submission can't be admitted. `beforeWait` is awaited before waiting for a slot (e.g. to defer the interaction,
+  so that the wait doesn't count against Discord's response deadline). A submission that doesn't get a slot gets its
+  tokens back, so that retrying doesn't count against the user's rate.
+  '''
+  @contextlib.asynccontextmanager
+  async def admit(self, userId, beforeWait = None):
+    self.takeTokens(userId)
+    try:
+      await self.acquireSlot(beforeWait)
+    except BaseException:
+      self.refundTokens(userId)
+      raise
+    try:
+      yield
+    finally:
+      self.releaseSlot()
+
+  def takeTokens(self, userId):
+    now = time.monotonic()
+    self.pruneUserBuckets(now)
+    userBucket = self.userBuckets.get(userId)
+    if(userBucket is None):
+      userBucket = self.userBuckets[userId] = TokenBucket(self.userRate, self.userBurst, now)
+    userDelay = userBucket.delay(now)
+    if(userDelay > 0):
+      self.reject('user_rate', userDelay)
+    globalDelay = self.globalBucket.delay(now)
+    if(globalDelay > 0):
+      self.reject('global_rate', globalDelay)
+    userBucket.take(now)
+    self.globalBucket.take(now)
+
+  def refundTokens(self, userId):
+    now = time.monotonic()
+    userBucket = self.userBuckets.get(userId)
+    if(userBucket is not None): # Otherwise it was full again and was pruned
+      userBucket.give(now)
+    self.globalBucket.give(now)
+
+  async def acquireSlot(self, beforeWait = None):
+    if(self.inFlight < self.maxInFlight and len(self.waiters) == 0):
+      self.inFlight += 1
+      return
+    if(len(self.waiters) >= self.maxQueued):
+      self.reject('queue_full', self.queueTimeout)
+    waiter = asyncio.get_running_loop().create_future()
+    self.waiters.append(waiter)
+    try:
+      if(beforeWait is not None):
+        await beforeWait()
+      await asyncio.wait_for(asyncio.shield(waiter), self.queueTimeout)
+    except asyncio.TimeoutError:
+      self.abandonWait(waiter)
+      self.reject('queue_timeout', self.queueTimeout)
+    except BaseException: # beforeWait failed, or the command was cancelled while waiting
+      self.abandonWait(waiter)
+      raise
+
+  def abandonWait(self, waiter):
+    if(waiter.done()): # The slot was handed over just as the wait ended; give it back
+      self.releaseSlot()
+    else:
+      self.waiters.remove(waiter)
+
+  '''
+  Frees a slot, handing it straight to the oldest waiting submission if there is one
+  '''
+  def releaseSlot(self):
+    while(len(self.waiters) > 0):
+      waiter = self.waiters.pop(0)
+      if(not waiter.done()):
+        waiter.set_result(None)
+        return
+    self.inFlight -= 1
+
+  def reject(self, reason, retryAfter):
+    self.rejections.inc(reason=reason)
+    raise errors.RateLimitError(math.ceil(retryAfter))
+
+  '''
+  Drops the buckets of users who haven't submitted for long enough that their bucket is full again (at most once a
+  minute), so that the number of buckets is bounded by the number of recently active users
+  '''
+  def pruneUserBuckets(self, now):
+    if(now - self.lastPruned < 60):
+      return
+    self.lastPruned = now
+    self.userBuckets = {userId: bucket for userId, bucket in self.userBuckets.items() if not bucket.isFull(now)}
@@ -0,0 +1,235 @@
+import asyncio
+import hashlib
+import itertools
+import json
+import logging
+import os
+from urllib.parse import urlparse
+import aiohttp
+
+log = logging.getLogger('showdown')
+
+WRITE_SIZE = 1024 * 1024 # Bytes of a download buffered before they're hashed and written out on a worker thread
+
+'''
+Hashes and writes downloaded chunks to a file. Blocking: run it on a worker thread, so that hashing and writing
+screenshots of several MB doesn't stall the event loop.
+'''
+def writeChunks(file, digest, chunks):
+  for chunk in chunks:
+    digest.update(chunk)
+    file.write(chunk)
+
+'''
+Appends lines to a file. Blocking: run it on a worker thread.
+'''
+def appendLines(path, lines):
+  with open(path, 'a', encoding='utf-8') as file:
+    file.write(''.join(lines))
+
+# A mirrored attachment of a submission
+class MirroredFile():
+
+  __slots__ = ('paramName', 'url', 'sha256', 'filename', 'path')
+
+  def __init__(self, paramName, url, sha256, filename, path):
+    self.paramName = paramName
+    self.url = url
+    self.sha256 = sha256
+    self.filename = filename # File name from the original URL, e.g. screenshot.png
+    self.path = path # Absolute path of the file in the store
+
+'''
+Mirrors submission attachments (screenshots) from the Discord CDN, whose URLs expire, to a local content-addressed
+store, so that the evidence for a submission is still available if it's disputed weeks later.
+
+Attachments are queued as submissions are made and downloaded in the background by a fixed number of workers. Each
+download is streamed to a temporary file while its SHA-256 is computed, then moved to <directory>/ab/cd/<sha256>, so
+identical uploads are stored once. The hashing and file operations run on worker threads. An append-only index (index.jsonl) maps submission IDs to their files, and is
+reloaded on startup.
+'''
+class AttachmentMirror():
+
+  def __init__(self, directory, metrics, maxConcurrent = 4, maxQueued = 1000, maxBytes = 25 * 1024 * 1024, chunkSize = 64 * 1024, attempts = 3):
+    self.directory = os.path.abspath(directory)
+    self.indexFile = os.path.join(self.directory, 'index.jsonl')
+    self.tempDir = os.path.join(self.directory, 'tmp')
+    self.maxConcurrent = maxConcurrent
+    self.maxQueued = maxQueued
+    self.maxBytes = maxBytes
+    self.chunkSize = chunkSize
+    self.attempts = attempts
+    self.files = {} # Submission ID -> [MirroredFile]
+    self.filesByUrl = {} # URL -> MirroredFile, so that a resubmitted (e.g. undone) submission isn't downloaded again
+    self.tempNames = itertools.count()
+    self.queue = None
+    self.workers = []
+    self.session = None
+    self.onMirrored = None # Optional async function called with (submission, queue message, MirroredFile) for each new download
+    self.results = metrics.counter('showdown_attachments_mirrored_total', 'Number of submission attachments processed by the attachment mirror, by result', ('result',))
+    self.bytesCounter = metrics.counter('showdown_attachment_mirror_bytes_total', 'Number of bytes of new attachments written to the attachment store')
+    metrics.gauge('showdown_attachment_mirror_queued', 'Number of attachments waiting to be mirrored').setFunction(lambda: self.queue.qsize() if self.queue else 0)
+    self.loadIndex()
+
+  '''
+  Loads the index of mirrored files, and removes any temporary files left by downloads that were interrupted
+  '''
+  def loadIndex(self):
+    os.makedirs(self.tempDir, exist_ok=True)
+    for name in os.listdir(self.tempDir):
+      os.remove(os.path.join(self.tempDir, name))
+    if(not os.path.exists(self.indexFile)):
+      return
+    with open(self.indexFile, encoding='utf-8') as indexFile:
+      for line in indexFile:
+        if(line.strip() == ''):
+          continue
+        entry = json.loads(line)
+        mirrored = MirroredFile(entry['param'], entry['url'], entry['sha256'], entry['filename'], self.storePath(entry['sha256']))
+        self.files.setdefault(entry['id'], []).append(mirrored)
+        self.filesByUrl[mirrored.url] = mirrored
+    log.info(f'Loaded attachment index: {len(self.files)} submissions, {len(self.filesByUrl)} attachments')
+
+  def storePath(self, sha256):
+    return os.path.join(self.directory, sha256[:2], sha256[2:4], sha256)
+
+  '''
+  Starts the download workers (must be called from the event loop; does nothing if they're already running)
+  '''
+  def start(self):
+    if(len(self.workers) > 0):
+      return
+    self.queue = asyncio.Queue(self.maxQueued)
+    self.session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=300, sock_connect=10, sock_read=30))
+    self.workers = [asyncio.create_task(self.work(), name=f'AttachmentMirror-{i}') for i in range(self.maxConcurrent)]
+
+  async def stop(self):
+    for worker in self.workers:
+      worker.cancel()
+    await asyncio.gather(*self.workers, return_exceptions=True)
+    self.workers = []
+    if(self.session is not None):
+      await self.session.close()
+      self.session = None
+
+  '''
+  Queues the screenshots of a submission to be mirrored. Never waits: if the queue is full, the attachment is dropped.
+  '''
+  def enqueue(self, submission, message = None):
+    if(self.queue is None or not submission.ids):
+      return
+    for paramName, url in submission.params.items():
+      if('screenshot' not in paramName.lower()):
+        continue
+      try:
+        self.queue.put_nowait((submission, message, paramName, url))
+      except asyncio.QueueFull:
+        self.results.inc(result='dropped')
+        log.warning(f'Attachment mirror queue is full, not mirroring {url} for submission {submission.ids}')
+
+  async def work(self):
+    while(True):
+      submission, message, paramName, url = await self.queue.get()
+      try:
+        mirrored, downloaded = await self.mirror(submission.ids, paramName, url)
+        if(downloaded and self.onMirrored is not None):
+          await self.onMirrored(submission, message, mirrored)
+      except Exception as e:
+        self.results.inc(result='failed')
+        log.error(f'Failed to mirror attachment {url} for submission {submission.ids}', exc_info=e)
+      finally:
+        self.queue.task_done()
+
+  '''
+  Mirrors an attachment of a submission, returning the MirroredFile and whether it was downloaded (as opposed to
+  having been mirrored already, e.g. when an undone submission goes back to the queue)
+  '''
+  async def mirror(self, ids, paramName, url):
+    mirrored = self.filesByUrl.get(url)
+    downloaded = mirrored is None
+    if(downloaded):
+      sha256 = await self.download(url)
+      filename = os.path.basename(urlparse(url).path) or 'attachment'
+      mirrored = MirroredFile(paramName, url, sha256, filename, self.storePath(sha256))
+    else:
+      self.results.inc(result='already_mirrored')
+    self.filesByUrl[url] = mirrored
+    newIds = [submissionId for submissionId in ids if not any(existing.url == url for existing in self.files.get(submissionId, []))]
+    if(len(newIds) == 0):
+      return mirrored, downloaded
+    lines = [json.dumps({'id': submissionId, 'param': paramName, 'url': url, 'sha256': mirrored.sha256, 'filename': mirrored.filename}) + '\n' for submissionId in newIds]
+    await asyncio.to_thread(appendLines, self.indexFile, lines)
+    for submissionId in newIds:
+      self.files.setdefault(submissionId, []).append(MirroredFile(paramName, url, mirrored.sha256, mirrored.filename, mirrored.path))
+    return mirrored, downloaded
+
+  '''
+  Downloads a URL into the store, retrying connection errors and server errors, and returns its SHA-256
+  '''
+  async def download(self, url):
+    for attempt in range(self.attempts):
+      try:
+        return await self.fetch(url)
+      except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        retryable = not isinstance(e, aiohttp.ClientResponseError) or e.status >= 500 or e.status == 429
+        if(not retryable or attempt == self.attempts - 1):
+          raise
+        log.warning(f'Failed to download attachment {url} (attempt {attempt + 1}): {e}')
+        await asyncio.sleep(2 ** attempt)
+
+  '''
+  Streams a URL to a temporary file, hashing it as it goes (WRITE_SIZE bytes at a time, on a worker thread), then moves
+  it into the store unless the store already has the same content. Returns the SHA-256.
+  '''
+  async def fetch(self, url):
+    tempPath = os.path.join(self.tempDir, f'{next(self.tempNames)}.part')
+    digest = hashlib.sha256()
+    size = 0
+    try:
+      async with self.session.get(url) as response:
+        response.raise_for_status()
+        tempFile = await asyncio.to_thread(open, tempPath, 'wb')
+        try:
+          chunks = []
+          buffered = 0
+          async for chunk in response.content.iter_chunked(self.chunkSize):
+            size += len(chunk)
+            if(size > self.maxBytes):
+              raise Exception(f'Attachment {url} is larger than {self.maxBytes} bytes')
+            chunks.append(chunk)
+            buffered += len(chunk)
+            if(buffered >= WRITE_SIZE):
+              await asyncio.to_thread(writeChunks, tempFile, digest, chunks)
+              chunks = []
+              buffered = 0
+          await asyncio.to_thread(writeChunks, tempFile, digest, chunks)
+        finally:
+          await asyncio.to_thread(tempFile.close)
+      sha256 = digest.hexdigest()
+      if(await asyncio.to_thread(self.store, tempPath, sha256)):
+        self.results.inc(result='stored')
+        self.bytesCounter.inc(size)
+      else:
+        self.results.inc(result='duplicate')
+      return sha256
+    finally:
+      if(os.path.exists(tempPath)):
+        os.remove(tempPath)
+
+  '''
+  Moves a downloaded file into the store, returning False if the store already has the same content. Blocking: run it
+  on a worker thread.
+  '''
+  def store(self, tempPath, sha256):
+    path = self.storePath(sha256)
+    if(os.path.exists(path)):
+      return False
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    os.replace(tempPath, path)
+    return True
+
+  '''
+  Returns the mirrored files of a submission (empty if it has none, or they haven't been downloaded yet)
+  '''
+  def lookup(self, submissionId):
+    return [mirrored for mirrored in self.files.get(submissionId, []) if os.path.exists(mirrored.path)]
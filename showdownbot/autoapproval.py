@@ -0,0 +1,240 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import deque
+
+log = logging.getLogger('showdown')
+
+REVIEWER_NAME = 'Auto-approval'
+
+'''
+Parses a comma-separated config list into a list of stripped, non-empty entries
+'''
+def parseList(text):
+  return [entry.strip() for entry in text.split(',') if entry.strip() != '']
+
+'''
+Writes a value to a JSON file through a temporary file, so that a crash mid-write leaves the previous contents
+'''
+def writeJsonFile(path, value):
+  temporaryFile = path + '.tmp'
+  with open(temporaryFile, 'w', encoding='utf-8') as jsonFile:
+    json.dump(value, jsonFile)
+  os.replace(temporaryFile, path)
+
+'''
+Rules deciding which new submissions are low-risk enough to approve without a reviewer, evaluated against a cache of
+each player's approved history:
+* Trusted players: any eligible submission from a trusted player (by RSN)
+* Killcounts: a monster killcount that increases the player's last approved killcount for that monster by at most
+  `maxKcDelta` (the first killcount for each monster always needs a reviewer, to establish the baseline)
+* Item drops: up to `maxItemDropsPerHour` item drops per player per hour (each drop is a +1 increment)
+Only submissions of the `commands` listed are eligible. The approved killcounts are saved to `stateFile` so that the
+baselines survive a restart.
+'''
+class AutoApprovalRules():
+
+  def __init__(self, commands = ('submit_monster_killcount', 'submit_item_drops'), trustedPlayers = (), maxKcDelta = 50, maxItemDropsPerHour = 3, stateFile = None):
+    self.commands = frozenset(commands)
+    self.trustedPlayers = frozenset(rsn.lower() for rsn in trustedPlayers)
+    self.maxKcDelta = maxKcDelta
+    self.maxItemDropsPerHour = maxItemDropsPerHour
+    self.stateFile = stateFile
+    self.killcounts = {} # RSN -> {monster: last approved killcount}
+    self.itemDrops = {} # RSN -> deque of the times of the item drops auto-approved (or waiting to be) in the last hour
+    self.dirty = False
+    self.load()
+
+  def load(self):
+    if(self.stateFile is None or not os.path.exists(self.stateFile)):
+      return
+    with open(self.stateFile, encoding='utf-8') as stateFile:
+      self.killcounts = json.load(stateFile)['killcounts']
+    log.info(f'Loaded approved killcounts for {len(self.killcounts)} players')
+
+  '''
+  Saves the approved killcounts, if they changed since they were last saved
+  '''
+  def save(self):
+    if(self.stateFile is None or not self.dirty):
+      return
+    writeJsonFile(self.stateFile, {'killcounts': self.killcounts})
+    self.dirty = False
+
+  '''
+  Returns the name of the rule that auto-approves a submission, or None if it needs a reviewer. An item drop takes its
+  slot in the hourly limit right away, so that drops waiting for the same batch can't go over it; release() gives it back
+  if the submission ends up in the queue.
+  '''
+  def evaluate(self, submission):
+    if(submission.commandName not in self.commands):
+      return None
+    if(submission.rsn.lower() in self.trustedPlayers):
+      return 'trusted_player'
+    if(submission.commandName == 'submit_monster_killcount'):
+      previous = self.killcounts.get(submission.rsn, {}).get(submission.params['monster'])
+      if(previous is not None and 0 < int(submission.params['kc']) - previous <= self.maxKcDelta):
+        return 'kc_delta'
+    elif(submission.commandName == 'submit_item_drops'):
+      recent = self.itemDrops.setdefault(submission.rsn, deque())
+      now = time.monotonic()
+      while(len(recent) > 0 and now - recent[0] > 3600):
+        recent.popleft()
+      if(len(recent) < self.maxItemDropsPerHour):
+        recent.append(now)
+        return 'item_drop'
+    return None
+
+  '''
+  Undoes the effect of evaluate() for a submission that was accepted by a rule but sent to the queue instead of being
+  approved (it was flagged, or failed to be approved)
+  '''
+  def release(self, submission, rule):
+    if(rule != 'item_drop'):
+      return
+    recent = self.itemDrops.get(submission.rsn)
+    if(recent): # Slots are interchangeable, so the newest one is given back
+      recent.pop()
+
+  '''
+  Forgets the players with no item drops auto-approved in the last hour, so that the item drop history only holds
+  recently active players
+  '''
+  def pruneItemDrops(self):
+    cutoff = time.monotonic() - 3600
+    self.itemDrops = {rsn: recent for rsn, recent in self.itemDrops.items() if len(recent) > 0 and recent[-1] > cutoff}
+
+  '''
+  Updates the player's history with an approved submission (whether it was approved by a reviewer or automatically)
+  '''
+  def recordApproval(self, submission):
+    if(submission.commandName == 'submit_monster_killcount'):
+      killcounts = self.killcounts.setdefault(submission.rsn, {})
+      kc = int(submission.params['kc'])
+      if(kc > killcounts.get(submission.params['monster'], -1)):
+        killcounts[submission.params['monster']] = kc
+        self.dirty = True
+
+  '''
+  Updates the player's history when a decision on a submission is undone. Only the last approved killcount is kept, so
+  if the undone killcount is the baseline it is forgotten, and the player's next killcount for that monster goes to a
+  reviewer to establish a new one.
+  '''
+  def recordUndo(self, submission):
+    if(submission.commandName == 'submit_monster_killcount'):
+      killcounts = self.killcounts.get(submission.rsn, {})
+      if(killcounts.get(submission.params['monster']) == int(submission.params['kc'])):
+        del killcounts[submission.params['monster']]
+        self.dirty = True
+
+'''
+Approves the submissions accepted by the auto-approval rules in batches, every `batchInterval` seconds. Waiting a
+little before approving lets checks that finish after the submission (e.g. duplicate screenshot detection) flag it: a
+flagged submission, or one that fails to be approved, is sent to the submission queue instead.
+
+The submissions waiting to be approved are saved to `pendingFile` whenever they change, since the players have
+already been told they will be approved: the ones left when the bot stopped are sent to the queue when it restarts.
+'''
+class AutoApprover():
+
+  def __init__(self, rules, approve, sendToQueue, metrics, batchInterval = 10, pendingFile = None):
+    self.rules = rules
+    self.approve = approve # Async function that approves a submission, raising only if it wasn't approved
+    self.sendToQueue = sendToQueue # Async function that sends a submission to the queue for a reviewer
+    self.batchInterval = batchInterval
+    self.pendingFile = pendingFile
+    self.pending = []
+    self.batch = [] # The rest of the batch being approved
+    self.approving = None # The submission being approved, which can no longer be stopped by a flag
+    self.saveLock = asyncio.Lock()
+    self.interrupted = self.loadPending()
+    self.results = metrics.counter('showdown_auto_approvals_total', 'Number of submissions handled by auto-approval, by rule and result', ('rule', 'result'))
+    metrics.gauge('showdown_auto_approvals_pending', 'Number of submissions waiting for the next auto-approval batch').setFunction(lambda: len(self.pending))
+
+  '''
+  Returns the json of the submissions that were waiting to be approved when the bot last stopped
+  '''
+  def loadPending(self):
+    if(self.pendingFile is None or not os.path.exists(self.pendingFile)):
+      return []
+    with open(self.pendingFile, encoding='utf-8') as pendingFile:
+      interrupted = json.load(pendingFile)
+    if(len(interrupted) > 0):
+      log.info(f'Loaded {len(interrupted)} submissions that were waiting for auto-approval when the bot stopped')
+    return interrupted
+
+  '''
+  Saves the json of the submissions waiting to be approved (on a worker thread). A failure is logged rather than
+  raised, so that it doesn't fail the submission or the batch.
+  '''
+  async def savePending(self):
+    if(self.pendingFile is None):
+      return
+    async with self.saveLock: # Writes happen in order, each with the latest state
+      waiting = [submission.view('json') for submission, rule in self.batch + self.pending]
+      try:
+        await asyncio.to_thread(writeJsonFile, self.pendingFile, waiting)
+      except Exception as e:
+        log.error(f'Failed to save the submissions waiting for auto-approval to {self.pendingFile}', exc_info=e)
+
+  '''
+  Returns whether a submission is still waiting to be approved, i.e. whether a flag raised now will send it to the queue
+  '''
+  def isWaiting(self, submission):
+    return any(waiting is submission and waiting is not self.approving for waiting, rule in self.pending + self.batch)
+
+  '''
+  Offers a new submission to auto-approval, returning True if it will be approved automatically
+  '''
+  async def offer(self, submission):
+    rule = self.rules.evaluate(submission)
+    if(rule is None):
+      return False
+    self.pending.append((submission, rule))
+    await self.savePending()
+    return True
+
+  async def flush(self):
+    self.batch, self.pending = self.pending, []
+    while(len(self.batch) > 0):
+      submission, rule = self.batch[0]
+      try:
+        await self.process(submission, rule)
+      except Exception as e: # Don't lose the rest of the batch
+        log.error(f'Error auto-approving submission {submission.ids}', exc_info=e)
+      self.batch.pop(0)
+      await self.savePending()
+    self.rules.pruneItemDrops()
+    self.rules.save()
+
+  async def process(self, submission, rule):
+    if(len(submission.flags) > 0):
+      self.results.inc(rule=rule, result='flagged')
+      self.rules.release(submission, rule)
+      await self.sendToQueue(submission)
+      return
+    self.approving = submission
+    try:
+      await self.approve(submission)
+    except Exception as e:
+      log.error(f'Failed to auto-approve submission {submission.ids}, sending it to the queue', exc_info=e)
+      self.results.inc(rule=rule, result='failed')
+      self.rules.release(submission, rule)
+      await self.sendToQueue(submission)
+      return
+    finally:
+      self.approving = None
+    self.results.inc(rule=rule, result='approved')
+
+  '''
+  Approves a batch every batchInterval seconds; runs until cancelled
+  '''
+  async def run(self):
+    while(True):
+      await asyncio.sleep(self.batchInterval)
+      try:
+        await self.flush()
+      except Exception as e:
+        log.error('Error in auto-approval batch', exc_info=e)
@@ -1,41 +1,105 @@
+import re
+import threading
+import time
 import requests
+from showdownbot.catalog import CatalogRecord, CatalogChallenge
 
 # Client for interacting with the UIM Showdown backend
 
 class BackendClient():
   
-  def __init__(self, url):
+  def __init__(self, url, metrics = None, tracer = None, failureThreshold = 5, resetTimeout = 30, requestTimeout = 10):
     self.url = url
+    self.tracer = tracer
+    self.requestTimeout = requestTimeout # Seconds to wait for the backend to connect or to send data before failing
+    self.failureThreshold = failureThreshold
+    self.resetTimeout = resetTimeout
+    self.lock = threading.Lock() # Requests can also be made from worker threads (e.g. /import_roster)
+    self.inFlight = 0
+    self.consecutiveFailures = 0
+    self.openUntil = 0.0 # Monotonic time until which the circuit is open
+    self.requestDuration = None
+    if(metrics):
+      self.requestDuration = metrics.histogram('showdown_backend_request_duration_seconds', 'Time spent on a request to the backend', ('method', 'endpoint', 'status'))
+      metrics.gauge('showdown_backend_in_flight', 'Number of backend requests in progress').setFunction(lambda: self.inFlight)
+      metrics.gauge('showdown_backend_circuit_open', 'Whether requests to the backend are failing fast because it keeps failing (1) or not (0)').setFunction(lambda: int(self.circuitOpen()))
 
-  def get(self, uri):
+  '''
+  Returns True if the backend failed failureThreshold times in a row less than resetTimeout seconds ago. While the
+  circuit is open, requests fail immediately instead of waiting on a backend that is down; once the timeout passes,
+  requests go through again, and the first failure opens the circuit again.
+  '''
+  def circuitOpen(self):
+    return self.consecutiveFailures >= self.failureThreshold and time.monotonic() < self.openUntil
+
+  def recordResult(self, succeeded):
+    with self.lock:
+      if(succeeded):
+        self.consecutiveFailures = 0
+        return
+      self.consecutiveFailures += 1
+      if(self.consecutiveFailures >= self.failureThreshold):
+        self.openUntil = time.monotonic() + self.resetTimeout
+
+  '''
+  Reduces a request URI to a low-cardinality label for metrics (drops the query string and numeric IDs)
+  '''
+  def endpointLabel(self, uri):
+    return re.sub(r'/[0-9]+(?=/|$)', '/{id}', uri.split('?')[0])
+
+  def request(self, method, uri, data):
+    if(self.tracer is None):
+      return self.sendRequest(method, uri, data, {})
+    with self.tracer.span('backend ' + method + ' ' + self.endpointLabel(uri)) as span:
+      headers = {}
+      if(span):
+        headers['X-Trace-Id'] = span.trace.traceId
+      response = self.sendRequest(method, uri, data, headers)
+      if(span):
+        span.setAttribute('statusCode', response.status_code)
+      return response
+
+  def sendRequest(self, method, uri, data, headers):
+    if(self.circuitOpen()):
+      if(self.requestDuration):
+        self.requestDuration.observe(0.0, method=method, endpoint=self.endpointLabel(uri), status='circuit_open')
+      raise Exception(f'Backend is unavailable after {self.consecutiveFailures} failed requests, not retrying until the circuit closes')
+    start = time.perf_counter()
+    status = 'error'
+    with self.lock:
+      self.inFlight += 1
     try:
-      return requests.get(self.url + uri)
+      response = requests.request(method, self.url + uri, json=data, headers=headers, timeout=self.requestTimeout)
+      status = str(response.status_code)
+      self.recordResult(response.status_code < 500)
+      return response
+    except requests.Timeout as e: # A backend that accepts connections but never answers counts as failing
+      status = 'timeout'
+      self.recordResult(False)
+      raise Exception(f'Backend did not respond within {self.requestTimeout}s', e)
     except Exception as e:
+      self.recordResult(False)
       raise Exception('Failed to connect to backend', e)
+    finally:
+      with self.lock:
+        self.inFlight -= 1
+      if(self.requestDuration):
+        self.requestDuration.observe(time.perf_counter() - start, method=method, endpoint=self.endpointLabel(uri), status=status)
+
+  def get(self, uri):
+    return self.request('GET', uri, None)
   
   def post(self, uri, data):
-    try:
-      return requests.post(self.url + uri, json=data)
-    except Exception as e:
-      raise Exception('Failed to connect to backend', e)
+    return self.request('POST', uri, data)
   
   def patch(self, uri, data):
-    try:
-      return requests.patch(self.url + uri, json=data)
-    except Exception as e:
-      raise Exception('Failed to connect to backend', e)
+    return self.request('PATCH', uri, data)
 
   def put(self, uri, data):
-    try:
-      return requests.put(self.url + uri, json=data)
-    except Exception as e:
-      raise Exception('Failed to connect to backend', e)
+    return self.request('PUT', uri, data)
 
   def delete(self, uri, data):
-    try:
-      return requests.delete(self.url + uri, json=data)
-    except Exception as e:
-      raise Exception('Failed to connect to backend', e)
+    return self.request('DELETE', uri, data)
     
   def getCompetitionInfo(self):
     response = self.get('/competitionInfo')
@@ -208,10 +272,10 @@ class BackendClient():
     if(response.status_code != 200):
       raise Exception('Failed to get records')
     for record in response.json():
-      records.append({'nameAndHandicap': record['name'].title(), 'name': record['name'].title(), 'handicap': None})
-      if(len(record['handicaps']) > 0):
-        for handicap in record['handicaps']:
-          records.append({'nameAndHandicap': record['name'].title() + ' - ' + handicap['name'], 'name': record['name'].title(), 'handicap': handicap['name']})
+      name = record['name'].title()
+      records.append(CatalogRecord(name, None))
+      for handicap in record['handicaps']:
+        records.append(CatalogRecord(name, handicap['name']))
     return records
   
   def getChallenges(self):
@@ -222,9 +286,9 @@ class BackendClient():
     for challenge in response.json():
       if(len(challenge['relayComponents']) > 0):
         for component in challenge['relayComponents']:
-          challenges.append({'nameAndRelayComponent': challenge['name'] + ' - ' + component['name'], 'name': challenge['name'], 'relayComponent': component['name'], 'type': challenge['type']})
+          challenges.append(CatalogChallenge(challenge['name'], component['name'], challenge['type']))
       else:
-        challenges.append({'nameAndRelayComponent': challenge['name'], 'name': challenge['name'], 'relayComponent': None, 'type': challenge['type']})
+        challenges.append(CatalogChallenge(challenge['name'], None, challenge['type']))
     return challenges
   
   def approveSubmission(self, id, reviewer):
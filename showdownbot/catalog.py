@@ -0,0 +1,73 @@
+import sys
+
+# Typed entries for the competition catalog (records, challenges and purchase items). Each entry is a slotted record
+# with interned strings, and precomputes its autocomplete display name, autocomplete value and lowercase search key
+# once per load, so that autocomplete callbacks and submit handlers only read attributes.
+
+'''
+Interns a string (or returns None)
+'''
+def intern(value):
+  if(value is None):
+    return None
+  return sys.intern(value)
+
+# A record, or one handicap of a record
+class CatalogRecord():
+
+  __slots__ = ('name', 'handicap', 'displayName', 'value', 'searchKey')
+
+  def __init__(self, name, handicap):
+    self.name = intern(name)
+    self.handicap = intern(handicap)
+    self.displayName = self.name if handicap is None else intern(name + ' - ' + handicap)
+    self.value = intern(name + '|' + str(handicap)) # Parsed by BackendClient.submitRecord
+    self.searchKey = self.displayName.lower()
+
+# A challenge, or one relay component of a relay challenge
+class CatalogChallenge():
+
+  __slots__ = ('name', 'relayComponent', 'type', 'displayName', 'value', 'searchKey', 'nameSearchKey')
+
+  def __init__(self, name, relayComponent, type):
+    self.name = intern(name)
+    self.relayComponent = intern(relayComponent)
+    self.type = intern(type)
+    self.displayName = self.name if relayComponent is None else intern(name + ' - ' + relayComponent)
+    self.value = intern(name + '|' + str(relayComponent)) # Parsed by BackendClient.submitSpeedChallenge
+    self.searchKey = self.displayName.lower()
+    self.nameSearchKey = self.name.lower()
+
+# An item that can be purchased in a minigame, and the contribution method (and cost) it counts towards
+class CatalogPurchaseItem():
+
+  __slots__ = ('name', 'cost', 'methodName')
+
+  def __init__(self, name, cost, methodName):
+    self.name = intern(name)
+    self.cost = cost
+    self.methodName = intern(methodName)
+
+'''
+Hash-indexed view of a competition snapshot, used to validate submit and admin command input in constant time. Built
+once each time competition info is loaded; an empty catalog (the default) rejects everything.
+'''
+class ValidationCatalog():
+
+  __slots__ = ('players', 'teams', 'tiles', 'monsters', 'itemDrops', 'clogItems', 'discordNames', 'methods', 'purchaseMethods', 'challengeTypes')
+
+  def __init__(self, players = (), teams = (), tiles = (), monsters = (), itemDrops = (), clogItems = (), discordNames = (), methods = (), purchaseItems = (), challenges = ()):
+    self.players = frozenset(players)
+    self.teams = frozenset(teams)
+    self.tiles = frozenset(tiles)
+    self.monsters = frozenset(monsters)
+    self.itemDrops = frozenset(itemDrops)
+    self.clogItems = frozenset(clogItems)
+    self.discordNames = frozenset(discordNames)
+    self.methods = frozenset(methods)
+    # Purchase item name -> [(methodName, cost)], since an item can count towards several contribution methods
+    self.purchaseMethods = {}
+    for item in purchaseItems:
+      self.purchaseMethods.setdefault(item.name, []).append((item.methodName, item.cost))
+    # Challenge name -> challenge type (relay challenges appear once per component, all with the same type)
+    self.challengeTypes = {challenge.name: challenge.type for challenge in challenges}
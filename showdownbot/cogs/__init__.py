@@ -0,0 +1,7 @@
+# The bot's slash commands and button handlers, split into discord.py extensions by audience so that each can be
+# reloaded on its own (see ShowdownBot.reloadExtensions)
+EXTENSIONS = (
+  'showdownbot.cogs.admin',
+  'showdownbot.cogs.submit',
+  'showdownbot.cogs.review'
+)
@@ -0,0 +1,275 @@
+import asyncio
+import io
+import logging
+import threading
+import time
+from typing import Optional
+from discord import app_commands, Attachment, File, Interaction
+from discord.ext import commands
+import showdownbot.cogs as cogs
+import showdownbot.cogs.autocomplete as autocomplete
+import showdownbot.errors as errors
+import showdownbot.rosterimport as rosterimport
+from showdownbot.profiler import SamplingProfiler
+
+log = logging.getLogger('showdown')
+
+'''
+Staff-only commands for setting up the event and managing the backend and rosters
+'''
+class AdminCommands(commands.Cog):
+
+  def __init__(self, showdownBot):
+    self.showdownBot = showdownBot
+
+  @app_commands.command(name='initialize_backend', description='ADMIN ONLY: Initialize the backend (will not work if the event is in progress)')
+  async def initialize_backend(self, interaction: Interaction):
+    await self.showdownBot.adminCheck(interaction)
+    if(not self.showdownBot.competitionLoaded):
+      raise errors.UserError('Competition not loaded')
+    if(self.showdownBot.eventInProgress()):
+      raise errors.UserError('The event is currently in progress')
+    await interaction.response.send_message('Initializing backend...')
+    self.showdownBot.backendClient.initializeBackend()
+    await self.showdownBot.loadCompetitionInfo()
+    await interaction.followup.send('Success: Backend initialized')
+
+  @app_commands.command(name='update_competitor_role', description='ADMIN ONLY: Update the Competitor role (This happens automatically every 60 minutes)')
+  async def update_competitor_role(self, interaction: Interaction):
+    await self.showdownBot.adminCheck(interaction)
+    if(not self.showdownBot.competitionLoaded):
+      raise errors.UserError('Competition not loaded')
+    await interaction.response.send_message('Updating competitor role...')
+    response = self.showdownBot.backendClient.updateCompetitorRole()
+    if(len(response['signupsNotFound']) == 0):
+      await interaction.followup.send('Success: Competitor role updated. All Discord names were found on the server.')
+    elif(len(response['signupsNotFound']) > 50):
+      await interaction.followup.send(f'Success: Competitor role updated. {str(len(response['namesNotFound']))} names were not found on the server.')
+    else:
+      message = 'Success: Competitor role updated. The following signups were not found on the server:\n'
+      for signup in response['signupsNotFound']:
+        message += f'RSN: "{signup['rsn']}" / Discord name: "{signup['discordName']}"\n'
+      message = message[:-1]
+      await interaction.followup.send(message)
+
+  @app_commands.command(name='setup_discord_server', description='ADMIN ONLY: Create team channels and create/assign team roles')
+  async def setup_discord_server(self, interaction: Interaction):
+    await self.showdownBot.adminCheck(interaction)
+    if(not self.showdownBot.competitionLoaded):
+      raise errors.UserError('Competition not loaded')
+    if(self.showdownBot.eventInProgress()):
+      raise errors.UserError('The event is currently in progress')
+    await interaction.response.send_message('Setting up Discord server...')
+    response = self.showdownBot.backendClient.setupDiscordServer()
+    if(len(response['namesNotFound']) == 0):
+      await interaction.followup.send('Success: Team roles/channels created. All Discord names were found on the server.')
+    elif(len(response['namesNotFound']) > 50):
+      await interaction.followup.send('Success: Team roles/channels created. ' + str(len(response['namesNotFound'])) + ' names were not found on the server.')
+    else:
+      message = 'Success: Team roles/channels created. The following Discord names were not found on the server:\n'
+      for name in response['namesNotFound']:
+        message += name + "\n"
+      message = message[:-1]
+      await interaction.followup.send(message)
+
+  @app_commands.command(name='teardown_discord_server', description='ADMIN ONLY: Delete team channels/roles and de-assign Competitor/Captain roles')
+  async def teardown_discord_server(self, interaction: Interaction):
+    await self.showdownBot.adminCheck(interaction)
+    if(not self.showdownBot.competitionLoaded):
+      raise errors.UserError('Competition not loaded')
+    if(self.showdownBot.eventInProgress()):
+      raise errors.UserError('The event is currently in progress')
+    await interaction.response.send_message('Tearing down Discord server...')
+    self.showdownBot.backendClient.teardownDiscordServer()
+    await interaction.followup.send('Success: Team roles/channels deleted; Competitor/Captain roles de-assigned.')
+
+  @app_commands.command(name='update_backend', description='ADMIN ONLY: Update the backend (This happens automatically every 60 seconds)')
+  async def update_backend(self, interaction: Interaction, force: Optional[bool] = False):
+    await self.showdownBot.adminCheck(interaction)
+    if(not self.showdownBot.competitionLoaded):
+      raise errors.UserError('Competition not loaded')
+    if(not force and not self.showdownBot.eventInProgress()):
+      raise errors.UserError('The event is not currently in progress')
+    await interaction.response.send_message('Updating backend...')
+    self.showdownBot.backendClient.updateBackend(force)
+    await interaction.followup.send('Success: Backend updated')
+
+  @app_commands.command(name='sychronize_temple_comp', description='ADMIN ONLY: Synchronize the team rosters in the Temple comp')
+  async def sychronize_temple_comp(self, interaction: Interaction):
+    await self.showdownBot.adminCheck(interaction)
+    if(not self.showdownBot.competitionLoaded):
+      raise errors.UserError('Competition not loaded')
+    await interaction.response.send_message('Sychronizing Temple comp...')
+    self.showdownBot.backendClient.synchronizeTempleComp()
+    await interaction.followup.send('Success: Temple comp synchronized')
+
+  @app_commands.command(name='reload_competition_info', description='ADMIN ONLY: Reload competition info from the backend')
+  async def reload_competition_info(self, interaction: Interaction):
+    await self.showdownBot.adminCheck(interaction)
+    await interaction.response.send_message('Reloading competition info...')
+    await self.showdownBot.loadCompetitionInfo()
+    if(self.showdownBot.competitionLoaded):
+      await interaction.followup.send('Successfully reloaded competition info')
+    else:
+      await interaction.followup.send('Failed to reload competition info. The backend might not be running.')
+
+  @app_commands.command(name='reinitialize_tile', description='ADMIN ONLY: Reinitialize a tile in the backend')
+  @app_commands.autocomplete(tile=autocomplete.tile_autocomplete)
+  async def reinitialize_tile(self, interaction: Interaction, tile: str):
+    await self.showdownBot.adminCheck(interaction)
+    if(not self.showdownBot.competitionLoaded):
+      raise errors.UserError('Competition not loaded')
+    if(tile not in self.showdownBot.catalog.tiles):
+      raise errors.UserError('Tile not found - Make sure to click the autocomplete option')
+    await interaction.response.send_message('Reinitializing tile...')
+    self.showdownBot.backendClient.reinitializeTile(tile)
+    await interaction.followup.send('Success: Tile ' + tile + ' has been reinitialized')
+
+  @app_commands.command(name='add_player', description='ADMIN ONLY: Add a player to the competition, and assign the relevant role.')
+  @app_commands.autocomplete(team=autocomplete.team_autocomplete)
+  async def add_player(self, interaction: Interaction, rsn: str, discord_name: str, team: str, synchronize_temple_comp: Optional[bool] = True):
+    await self.showdownBot.adminCheck(interaction)
+    if(not self.showdownBot.competitionLoaded):
+      raise errors.UserError('Competition not loaded')
+    guild = self.showdownBot.bot.get_guild(self.showdownBot.guildId)
+    if(not guild.get_member_named(discord_name.lower())):
+      raise errors.UserError('Discord member not found')
+    if(team not in self.showdownBot.catalog.teams):
+      raise errors.UserError('Team not found - Make sure to click the autocomplete option')
+    await interaction.response.send_message('Adding player...')
+    self.showdownBot.backendClient.addPlayer(rsn, discord_name, team, synchronize_temple_comp)
+    await self.showdownBot.loadCompetitionInfo()
+    await interaction.followup.send('Success: Player ' + rsn + ' added on team: ' + team)
+
+  @app_commands.command(name='import_roster', description='ADMIN ONLY: Add players from a CSV file of rsn, discord name, team. Validates every row first.')
+  async def import_roster(self, interaction: Interaction, roster: Attachment, dry_run: Optional[bool] = False):
+    await self.showdownBot.adminCheck(interaction)
+    if(not self.showdownBot.competitionLoaded):
+      raise errors.UserError('Competition not loaded')
+    if(roster.size > 1024 * 1024):
+      raise errors.UserError('Roster file is too large')
+    try:
+      rows = rosterimport.parseRosterCsv((await roster.read()).decode('utf-8-sig'))
+    except Exception as e:
+      raise errors.UserError(f'Failed to read roster file: {e}')
+    if(len(rows) == 0):
+      raise errors.UserError('Roster file has no rows')
+    guild = self.showdownBot.bot.get_guild(self.showdownBot.guildId)
+    rosterimport.validateRows(rows, {member.name.lower(): member for member in guild.members}, self.showdownBot.catalog)
+    valid = sum(1 for row in rows if row.status == 'valid')
+    if(dry_run or valid == 0):
+      await interaction.response.send_message(f'Validated {len(rows)} rows: {valid} valid, {len(rows) - valid} invalid. No changes were made.', file=self.rosterReport(rows))
+      return
+    await interaction.response.send_message(f'Adding {valid} players ({len(rows) - valid} invalid rows skipped)...')
+
+    # Add the players, then synchronize the Temple comp and reload competition info once for the whole file
+    await asyncio.to_thread(rosterimport.addPlayers, self.showdownBot.backendClient, rows)
+    added = sum(1 for row in rows if row.status == 'added')
+    templeNote = ''
+    if(added > 0):
+      try:
+        await asyncio.to_thread(self.showdownBot.backendClient.synchronizeTempleComp)
+      except Exception as e:
+        log.error('Failed to synchronize Temple comp after roster import', exc_info=e)
+        templeNote = '\nThe Temple comp failed to synchronize; run /sychronize_temple_comp to retry.'
+      await self.showdownBot.loadCompetitionInfo()
+    log.info(f'Roster import by {interaction.user.name}: {added} added, {valid - added} failed, {len(rows) - valid} invalid')
+    await interaction.followup.send(f'Success: {added} players added, {valid - added} failed, {len(rows) - valid} invalid{templeNote}', file=self.rosterReport(rows))
+
+  def rosterReport(self, rows):
+    return File(io.BytesIO(rosterimport.reportCsv(rows).encode('utf-8')), filename='roster-import-report.csv')
+
+  @app_commands.command(name='change_player_team', description='ADMIN ONLY: Change the team of a player. Also handles role changes.')
+  @app_commands.autocomplete(player=autocomplete.player_autocomplete, team=autocomplete.team_autocomplete)
+  async def change_player_team(self, interaction: Interaction, player: str, team: str, synchronize_temple_comp: Optional[bool] = True):
+    await self.showdownBot.adminCheck(interaction)
+    if(not self.showdownBot.competitionLoaded):
+      raise errors.UserError('Competition not loaded')
+    if(player not in self.showdownBot.catalog.players):
+      raise errors.UserError('Player not found - Make sure to click the autocomplete option')
+    if(team not in self.showdownBot.catalog.teams):
+      raise errors.UserError('Team not found - Make sure to click the autocomplete option')
+    await interaction.response.send_message('Changing player team...')
+    self.showdownBot.backendClient.changePlayerTeam(player, team, synchronize_temple_comp)
+    await self.showdownBot.loadCompetitionInfo()
+    await interaction.followup.send('Success: Player ' + player + ' is now on team ' + team)
+
+  @app_commands.command(name='change_player_rsn', description='ADMIN ONLY: Change the RSN of a player.')
+  @app_commands.autocomplete(old_rsn=autocomplete.player_autocomplete)
+  async def change_player_rsn(self, interaction: Interaction, old_rsn: str, new_rsn: str, synchronize_temple_comp: Optional[bool] = True):
+    await self.showdownBot.adminCheck(interaction)
+    if(not self.showdownBot.competitionLoaded):
+      raise errors.UserError('Competition not loaded')
+    if(old_rsn not in self.showdownBot.catalog.players):
+      raise errors.UserError('Player not found - Make sure to click the autocomplete option')
+    await interaction.response.send_message('Changing player RSN...')
+    self.showdownBot.backendClient.changePlayerRsn(old_rsn, new_rsn, synchronize_temple_comp)
+    await self.showdownBot.loadCompetitionInfo()
+    await interaction.followup.send('Success: The RSN ' + old_rsn + ' has been changed to ' + new_rsn)
+
+  @app_commands.command(name='change_player_discord_name', description='ADMIN ONLY: Change the Discord name of a player.')
+  @app_commands.autocomplete(old_discord_name=autocomplete.discord_name_autocomplete)
+  async def change_player_discord_name(self, interaction: Interaction, old_discord_name: str, new_discord_name: str):
+    await self.showdownBot.adminCheck(interaction)
+    if(not self.showdownBot.competitionLoaded):
+      raise errors.UserError('Competition not loaded')
+    if(old_discord_name not in self.showdownBot.catalog.discordNames):
+      raise errors.UserError('Player not found - Make sure to click the autocomplete option')
+    await interaction.response.send_message('Changing player Discord name...')
+    self.showdownBot.backendClient.changePlayerDiscordName(old_discord_name, new_discord_name)
+    await self.showdownBot.loadCompetitionInfo()
+    await interaction.followup.send('Success: The Discord name ' + old_discord_name + ' has been changed to ' + new_discord_name)
+
+  @app_commands.command(name='set_staff_adjustment', description='ADMIN ONLY: Set the staff adjustment for a contribution method on a player')
+  @app_commands.autocomplete(player=autocomplete.player_autocomplete, method=autocomplete.method_autocomplete)
+  async def set_staff_adjustment(self, interaction: Interaction, player: str, method: str, adjustment: int):
+    await self.showdownBot.adminCheck(interaction)
+    if(not self.showdownBot.competitionLoaded):
+      raise errors.UserError('Competition not loaded')
+    if(player not in self.showdownBot.catalog.players):
+      raise errors.UserError('Player not found - Make sure to click the autocomplete option')
+    if(method not in self.showdownBot.catalog.methods):
+      raise errors.UserError('Contribution method not found - Make sure to click the autocomplete option')
+    await interaction.response.send_message('Setting staff adjustment...')
+    self.showdownBot.backendClient.setStaffAdjustment(player, method, adjustment)
+    await self.showdownBot.loadCompetitionInfo()
+    await interaction.followup.send('Success: Player ' + player + ' now has a staff adjustment of ' + str(adjustment) + ' for ' + method)
+
+  @app_commands.command(name='profile', description='ADMIN ONLY: Profile the bot for a few seconds and upload the report and a flamegraph file')
+  async def profile(self, interaction: Interaction, seconds: app_commands.Range[int, 1, 300]):
+    await self.showdownBot.adminCheck(interaction)
+    if(seconds > self.showdownBot.profileMaxSeconds):
+      raise errors.UserError(f'Profiles are limited to {self.showdownBot.profileMaxSeconds} seconds')
+    if(self.showdownBot.profiling):
+      raise errors.UserError('A profile is already running')
+    self.showdownBot.profiling = True
+    try:
+      await interaction.response.send_message(f'Profiling for {seconds} seconds...')
+      profiler = SamplingProfiler(threading.get_ident(), self.showdownBot.profileInterval) # Commands run on the event loop's thread
+      log.info(f'Profiling requested by {interaction.user.name} for {seconds}s')
+      await asyncio.to_thread(profiler.run, seconds)
+    finally:
+      self.showdownBot.profiling = False
+    files = [
+      File(io.BytesIO(profiler.report().encode('utf-8')), filename='profile.txt'),
+      File(io.BytesIO(profiler.collapsedStacks().encode('utf-8')), filename='profile.collapsed')
+    ]
+    await interaction.followup.send(f'Success: {profiler.samples} samples in {profiler.elapsed:.1f}s (sampling overhead {profiler.samplingTime / max(profiler.elapsed, 1e-9):.1%}). profile.collapsed can be opened in speedscope or rendered with flamegraph.pl.', files=files)
+
+  @app_commands.command(name='reload_commands', description='ADMIN ONLY: Reload the bot\'s commands from disk without restarting')
+  @app_commands.choices(extension=[app_commands.Choice(name=name, value=name) for name in ('all', 'admin', 'submit', 'review')])
+  async def reload_commands(self, interaction: Interaction, extension: Optional[str] = 'all'):
+    await self.showdownBot.adminCheck(interaction)
+    await interaction.response.send_message(f'Reloading {extension} commands...')
+    extensions = cogs.EXTENSIONS if extension == 'all' else ['showdownbot.cogs.' + extension]
+    start = time.perf_counter()
+    try:
+      await self.showdownBot.reloadExtensions(extensions)
+    except commands.ExtensionError as error:
+      log.error('Error reloading commands', exc_info=error)
+      await interaction.followup.send(f'Error: {str(error)}. The previously loaded commands are still in use.')
+      return
+    await interaction.followup.send(f'Success: Reloaded {extension} commands in {round((time.perf_counter() - start) * 1000)} ms')
+
+async def setup(bot):
+  await bot.add_cog(AdminCommands(bot.showdownBot))
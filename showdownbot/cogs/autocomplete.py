@@ -0,0 +1,166 @@
+import itertools
+from discord import app_commands, Interaction
+
+# Autocomplete callbacks shared by the command cogs. They are plain functions rather than cog methods so that several
+# cogs can use them; the ShowdownBot is reached through the interaction's client.
+
+async def tile_autocomplete(
+  interaction: Interaction,
+  current: str
+) -> list[app_commands.Choice[str]]:
+  showdownBot = interaction.client.showdownBot
+  results = [
+    app_commands.Choice(name = tile, value = tile)
+    for tile in showdownBot.tiles if current.lower() in tile.lower()
+  ]
+  if(len(results) > 25):
+    results = results[:25]
+  return results
+
+async def team_autocomplete(
+  interaction: Interaction,
+  current: str
+) -> list[app_commands.Choice[str]]:
+  showdownBot = interaction.client.showdownBot
+  results = [
+    app_commands.Choice(name = team, value = team)
+    for team in showdownBot.teams if current.lower() in team.lower()
+  ]
+  if(len(results) > 25):
+    results = results[:25]
+  return results
+
+async def player_autocomplete(
+  interaction: Interaction,
+  current: str
+) -> list[app_commands.Choice[str]]:
+  showdownBot = interaction.client.showdownBot
+  results = [
+    app_commands.Choice(name = player, value = player)
+    for player in showdownBot.players if current.lower() in player.lower()
+  ]
+  if(len(results) > 25):
+    results = results[:25]
+  return results
+
+async def discord_name_autocomplete(
+  interaction: Interaction,
+  current: str
+) -> list[app_commands.Choice[str]]:
+  showdownBot = interaction.client.showdownBot
+  results = [
+    app_commands.Choice(name = discordName, value = discordName)
+    for discordName in showdownBot.discordNames if current.lower() in discordName.lower()
+  ]
+  if(len(results) > 25):
+    results = results[:25]
+  return results
+
+async def method_autocomplete(
+  interaction: Interaction,
+  current: str
+) -> list[app_commands.Choice[str]]:
+  showdownBot = interaction.client.showdownBot
+  results = [
+    app_commands.Choice(name = method, value = method)
+    for method in showdownBot.contributionMethodNames if current.lower() in method.lower()
+  ]
+  if(len(results) > 25):
+    results = results[:25]
+  return results
+
+async def monster_autocomplete(
+  interaction: Interaction,
+  current: str
+) -> list[app_commands.Choice[str]]:
+  showdownBot = interaction.client.showdownBot
+  results = [
+    app_commands.Choice(name = monster, value = monster)
+    for monster in showdownBot.monsters if current.lower() in monster.lower()
+  ]
+  if(len(results) > 25):
+    results = results[:25]
+  return results
+
+async def item_drop_autocomplete(
+  interaction: Interaction,
+  current: str
+) -> list[app_commands.Choice[str]]:
+  showdownBot = interaction.client.showdownBot
+  results = [
+    app_commands.Choice(name = drop, value = drop)
+    for drop in showdownBot.itemDrops if current.lower() in drop.lower()
+  ]
+  if(len(results) > 25):
+    results = results[:25]
+  return results
+
+async def purchase_item_autocomplete(
+    interaction: Interaction,
+    current: str
+) -> list[app_commands.Choice[str]]:
+  showdownBot = interaction.client.showdownBot
+  results = [
+    app_commands.Choice(name = itemName, value = itemName)
+    for itemName in showdownBot.purchaseItemNames if current.lower() in itemName.lower()
+  ]
+  if(len(results) > 25):
+    results = results[:25]
+  return results
+
+async def clog_autocomplete(
+  interaction: Interaction,
+  current: str
+) -> list[app_commands.Choice[str]]:
+  showdownBot = interaction.client.showdownBot
+  results = [
+    app_commands.Choice(name = item, value = item)
+    for item in showdownBot.clogItems if current.lower() in item.lower()
+  ]
+  if(len(results) > 25):
+    results = results[:25]
+  return results
+
+async def record_autocomplete(
+  interaction: Interaction,
+  current: str
+) -> list[app_commands.Choice[str]]:
+  showdownBot = interaction.client.showdownBot
+  current = current.lower()
+  return [
+    app_commands.Choice(name = record.displayName, value = record.value)
+    for record in itertools.islice((record for record in showdownBot.records if current in record.searchKey), 25)
+  ]
+
+async def team_speedrun_autocomplete(
+  interaction: Interaction,
+  current: str
+) -> list[app_commands.Choice[str]]:
+  showdownBot = interaction.client.showdownBot
+  current = current.lower()
+  return [
+    app_commands.Choice(name = challenge.name, value = challenge.name)
+    for challenge in itertools.islice((challenge for challenge in showdownBot.speedrunChallenges if current in challenge.nameSearchKey), 25)
+  ]
+
+async def point_challenge_autocomplete(
+  interaction: Interaction,
+  current: str
+) -> list[app_commands.Choice[str]]:
+  showdownBot = interaction.client.showdownBot
+  current = current.lower()
+  return [
+    app_commands.Choice(name = challenge.name, value = challenge.name)
+    for challenge in itertools.islice((challenge for challenge in showdownBot.pointChallenges if current in challenge.nameSearchKey), 25)
+  ]
+
+async def relay_autocomplete(
+  interaction: Interaction,
+  current: str
+) -> list[app_commands.Choice[str]]:
+  showdownBot = interaction.client.showdownBot
+  current = current.lower()
+  return [
+    app_commands.Choice(name = challenge.displayName, value = challenge.value)
+    for challenge in itertools.islice((challenge for challenge in showdownBot.relayChallenges if current in challenge.searchKey), 25)
+  ]
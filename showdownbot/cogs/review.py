@@ -0,0 +1,185 @@
+import logging
+import math
+import time
+from typing import Optional
+from discord import app_commands, File, Interaction, InteractionType
+from discord.ext import commands
+import showdownbot.cogs.autocomplete as autocomplete
+import showdownbot.errors as errors
+import showdownbot.submissions as submissions
+
+HISTORY_PAGE_SIZE = 10
+
+log = logging.getLogger('showdown')
+
+'''
+Commands and buttons for reviewing submissions: claiming, approving, denying and undoing decisions
+'''
+class ReviewCommands(commands.Cog):
+
+  def __init__(self, showdownBot):
+    self.showdownBot = showdownBot
+
+  @app_commands.command(name='next_submission', description='Claim the oldest unclaimed submission in the queue to review')
+  async def next_submission(self, interaction: Interaction):
+    await self.showdownBot.checkForScreenshotApprover(interaction)
+    lease = self.showdownBot.dispatcher.claimNext(interaction.user.id)
+    if(lease is None):
+      await interaction.response.send_message('There are no unclaimed submissions in the queue', ephemeral=True)
+      return
+    message = self.showdownBot.bot.get_channel(lease.channelId).get_partial_message(lease.messageId)
+    await interaction.response.send_message(f'Your next submission to review (claimed for {round(self.showdownBot.dispatcher.leaseSeconds / 60)} minutes): {message.jump_url}', ephemeral=True)
+
+  @app_commands.command(name='submission_evidence', description='Get the mirrored screenshots of a submission, even after the Discord links have expired')
+  async def submission_evidence(self, interaction: Interaction, submission_id: int):
+    await self.showdownBot.checkForScreenshotApprover(interaction)
+    if(self.showdownBot.attachmentMirror is None):
+      raise errors.UserError('Attachment mirroring is not enabled')
+    mirroredFiles = self.showdownBot.attachmentMirror.lookup(submission_id)
+    if(len(mirroredFiles) == 0):
+      raise errors.UserError(f'No mirrored screenshots for submission {submission_id} (it may not have been downloaded yet)')
+    files = [File(mirrored.path, filename=mirrored.filename) for mirrored in mirroredFiles[:10]]
+    description = '\n'.join(f'{mirrored.paramName}: `{mirrored.sha256}`' for mirrored in mirroredFiles[:10])
+    await interaction.response.send_message(f'Screenshots of submission {submission_id}:\n{description}', files=files, ephemeral=True)
+
+  @app_commands.command(name='decision_history', description='Search the approvals, denials and undos of submissions, newest first')
+  @app_commands.autocomplete(rsn=autocomplete.player_autocomplete, team=autocomplete.team_autocomplete)
+  @app_commands.choices(decision=[app_commands.Choice(name=name, value=name) for name in ('approved', 'denied', 'undone')])
+  async def decision_history(self, interaction: Interaction, rsn: Optional[str] = None, team: Optional[str] = None, reviewer: Optional[str] = None, method: Optional[str] = None, decision: Optional[str] = None, since_hours: Optional[float] = None, page: Optional[int] = 1):
+    await self.showdownBot.checkForScreenshotApprover(interaction)
+    if(self.showdownBot.decisionJournal is None):
+      raise errors.UserError('The decision journal is not enabled')
+    if(page < 1):
+      raise errors.UserError('Page must be at least 1')
+    start = time.perf_counter()
+    since = time.time() - since_hours * 3600 if since_hours is not None else None
+    entries, total = self.showdownBot.decisionJournal.search(rsn, team, reviewer, method, decision, since, HISTORY_PAGE_SIZE, (page - 1) * HISTORY_PAGE_SIZE)
+    elapsed = (time.perf_counter() - start) * 1000
+    if(total == 0):
+      await interaction.response.send_message('No decisions match these filters', ephemeral=True)
+      return
+    pages = math.ceil(total / HISTORY_PAGE_SIZE)
+    if(page > pages):
+      raise errors.UserError(f'There are only {pages} pages')
+    lines = [f'<t:{int(entry.time)}:f> **{entry.decision}** by {entry.reviewer}: {entry.rsn} ({entry.team}) {entry.shortDesc} (IDs: {entry.ids})' for entry in entries]
+    while(True): # Drop the oldest entries of the page until the message fits in Discord's 2000 characters
+      hidden = f', {len(entries) - len(lines)} older entries on this page not shown' if len(lines) < len(entries) else ''
+      text = '\n'.join(lines + [f'-# Page {page} of {pages} ({total} decisions, {elapsed:.1f} ms{hidden})'])
+      if(len(text) <= 2000 or len(lines) == 0):
+        break
+      lines.pop()
+    await interaction.response.send_message(text, ephemeral=True)
+
+  @commands.Cog.listener()
+  async def on_interaction(self, interaction):
+    data = interaction.data
+    if(interaction.type == InteractionType.component and data['component_type'] == 2): # This is a button click interaction
+      with self.showdownBot.componentDuration.time(action=data['custom_id']), self.showdownBot.tracer.trace('button ' + data['custom_id'], interactionId=interaction.id, user=interaction.user.name):
+        await self.handleButtonClick(interaction)
+
+  '''
+  Handles a click on one of the buttons on a submission message (approve/deny/claim in the queue, undo in the log)
+  '''
+  async def handleButtonClick(self, interaction):
+    data = interaction.data
+    if(not self.showdownBot.competitionLoaded):
+      await interaction.response.send_message('Event not loaded')
+      return
+    # Parse the Submission out of the message contents
+    message = interaction.message.content
+    submissionJson = None
+    for line in message.splitlines():
+      if(line.startswith('Submission json: `')): # This is the line that has our json on it
+        submissionJson = line.replace('Submission json: ', '').replace('`', '')
+        break
+    if(submissionJson == None):
+      return # Not a submission message
+    if(data['custom_id'] == 'approve'): # User has clicked the "Approve" button
+
+      # Make sure the user is a screenshot approver
+      try:
+        await self.showdownBot.checkForScreenshotApprover(interaction)
+      except errors.UserError as error:
+        log.error('Error', exc_info=error)
+        await interaction.response.send_message(f'Error: {interaction.user.display_name} tried to approve this submission but is not a screenshot approver')
+        return
+      try:
+        await self.showdownBot.checkForClaim(interaction)
+      except errors.UserError as error:
+        await interaction.response.send_message(f'Error: {str(error)}', ephemeral=True)
+        return
+      
+      # Log the approval
+      submission = submissions.fromJson(submissionJson, self.showdownBot)
+      log.info('Submission approved by ' + interaction.user.name + ':\n' + submissionJson)
+
+      # Send the approval to the backend, remove the submission from the queue and post it to the log and the team channel
+      await self.showdownBot.decideSubmission(submission, True, interaction.user.display_name, interaction.message)
+      
+    elif(data['custom_id'] == 'deny'): # User has clicked the "Deny" button
+
+      # Make sure the user is a screenshot approver
+      try:
+        await self.showdownBot.checkForScreenshotApprover(interaction)
+      except errors.UserError as error:
+        log.error('Error', exc_info=error)
+        await interaction.response.send_message(f'Error: {interaction.user.display_name} tried to deny this submission but is not a screenshot approver')
+        return
+      try:
+        await self.showdownBot.checkForClaim(interaction)
+      except errors.UserError as error:
+        await interaction.response.send_message(f'Error: {str(error)}', ephemeral=True)
+        return
+      
+      # Log the denial
+      submission = submissions.fromJson(submissionJson, self.showdownBot)
+      log.info('Submission denied by ' + interaction.user.name + ':\n' + submissionJson)
+
+      # Send the denial to the backend, remove the submission from the queue and post it to the log and the team channel
+      await self.showdownBot.decideSubmission(submission, False, interaction.user.display_name, interaction.message)
+
+    elif(data['custom_id'] == 'undo'): # User has clicked the "Undo" button in the submission log
+
+      # Make sure the user is a screenshot approver
+      try:
+        await self.showdownBot.checkForScreenshotApprover(interaction)
+      except errors.UserError as error:
+        log.error('Error', exc_info=error)
+        await interaction.response.send_message(f'Error: {interaction.user.display_name} tried to undo this decision but is not a screenshot approver')
+        return
+      
+      # Log the undo
+      submission = submissions.fromJson(submissionJson, self.showdownBot)
+      log.info('Submission undone by ' + interaction.user.name + ':\n' + submissionJson)
+
+      # Send the undo to the backend
+      for id in submission.ids:
+        self.showdownBot.backendClient.undoDecision(id)
+      await self.showdownBot.journalDecision('undone', submission, interaction.user.display_name)
+      if(self.showdownBot.autoApproval is not None):
+        self.showdownBot.autoApproval.rules.recordUndo(submission)
+
+      # Delete the log message
+      await interaction.message.delete()
+
+      # Send the submission back to the queue
+      await self.showdownBot.sendSubmissionToQueue(submission)
+
+    elif(data['custom_id'] == 'claim'): # User has clicked the "Claim" button on a submission in the queue
+
+      # Make sure the user is a screenshot approver and nobody else has claimed the submission
+      try:
+        await self.showdownBot.checkForScreenshotApprover(interaction)
+        await self.showdownBot.checkForClaim(interaction)
+      except errors.UserError as error:
+        await interaction.response.send_message(f'Error: {str(error)}', ephemeral=True)
+        return
+
+      self.showdownBot.dispatcher.claim(interaction.message.id, interaction.message.channel.id, interaction.user.id)
+      await interaction.response.send_message(f'You have claimed this submission for {round(self.showdownBot.dispatcher.leaseSeconds / 60)} minutes', ephemeral=True)
+
+    else: # Something unexpected
+      pass
+
+async def setup(bot):
+  await bot.add_cog(ReviewCommands(bot.showdownBot))
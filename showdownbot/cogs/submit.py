@@ -0,0 +1,314 @@
+import logging
+from typing import Optional
+from discord import app_commands, Interaction, Attachment
+from discord.ext import commands
+import showdownbot.cogs.autocomplete as autocomplete
+import showdownbot.errors as errors
+import showdownbot.submissions as submissions
+
+log = logging.getLogger('showdown')
+
+'''
+Commands for competitors to submit their progress to the submission queue
+'''
+class SubmitCommands(commands.Cog):
+
+  def __init__(self, showdownBot):
+    self.showdownBot = showdownBot
+
+  @app_commands.command(name='submit_monster_killcount', description='Submit a monster killcount for the competition!')
+  @app_commands.autocomplete(monster=autocomplete.monster_autocomplete)
+  async def submit_monster_killcount(self, interaction: Interaction, screenshot: Attachment, monster: str, kc: int):
+    await self.showdownBot.submissionPreChecks(interaction)
+    if(kc < 0):
+      raise errors.UserError('KC cannot be negative')
+    if(monster not in self.showdownBot.catalog.monsters):
+      raise errors.UserError('Invalid monster name (make sure to click on the autocomplete option)')
+    description = f'{kc} KC of {monster}'
+    ids = [self.showdownBot.backendClient.submitContribution(self.showdownBot.roster.rsns[interaction.user.id], monster, kc, [screenshot.url], description)]
+    submission = submissions.Submission(self.showdownBot, interaction, ids, description)
+    await self.showdownBot.acceptSubmission(interaction, submission)
+
+  @app_commands.command(name='submit_collection_log', description='Submit a collection log item for the competition! (Make sure the drop is in the screenshot)')
+  @app_commands.autocomplete(item=autocomplete.clog_autocomplete)
+  async def submit_collection_log(self, interaction: Interaction, screenshot: Attachment, item: str):
+    await self.showdownBot.submissionPreChecks(interaction)
+    if(item not in self.showdownBot.catalog.clogItems):
+      raise errors.UserError('Invalid item name (make sure to click on the autocomplete option)')
+    description = f'Collection log item "{item}"'
+    ids = [self.showdownBot.backendClient.submitCollectionLogItem(self.showdownBot.roster.rsns[interaction.user.id], item, [screenshot.url], description)]
+    submission = submissions.Submission(self.showdownBot, interaction, ids, description)
+    await self.showdownBot.acceptSubmission(interaction, submission)
+
+  @app_commands.command(name='submit_pest_control', description='Submit your pest control games for the competition!')
+  async def submit_pest_control(self, interaction: Interaction, screenshot: Attachment, novice_games: int, intermediate_games: int, veteran_games: int):
+    await self.showdownBot.submissionPreChecks(interaction)
+    if(novice_games < 0 or intermediate_games < 0 or veteran_games < 0):
+      raise errors.UserError('Number of PC games cannot be negative')
+    total_games = novice_games + intermediate_games + veteran_games
+    description = f'{total_games} games of pest control'
+    ids = [self.showdownBot.backendClient.submitContribution(self.showdownBot.roster.rsns[interaction.user.id], 'Pest Control: Games', total_games, [screenshot.url], description)]
+    submission = submissions.Submission(self.showdownBot, interaction, ids, description)
+    await self.showdownBot.acceptSubmission(interaction, submission)
+
+  @app_commands.command(name='submit_lms', description='Submit your LMS kills for the competition!')
+  async def submit_lms(self, interaction: Interaction, screenshot: Attachment, kills: int, wins: int):
+    await self.showdownBot.submissionPreChecks(interaction)
+    if(kills < 0):
+      raise errors.UserError('Kills cannot be negative')
+    if(wins < 0):
+      raise errors.UserError('Wins cannot be negative')
+    description = f'{kills} kills and {wins} wins in LMS'
+    ids = []
+    ids.append(self.showdownBot.backendClient.submitContribution(self.showdownBot.roster.rsns[interaction.user.id], 'LMS: Kills', kills, [screenshot.url], description))
+    ids.append(self.showdownBot.backendClient.submitContribution(self.showdownBot.roster.rsns[interaction.user.id], 'LMS: Wins', wins, [screenshot.url], description))
+    submission = submissions.Submission(self.showdownBot, interaction, ids, description)
+    await self.showdownBot.acceptSubmission(interaction, submission)
+
+  @app_commands.command(name='submit_mta', description='Submit your MTA points for the competition!')
+  async def submit_mta(self, interaction: Interaction, screenshot: Attachment, telekinetic_points: int, alchemy_points: int, enchanting_points: int, graveyard_points: int):
+    await self.showdownBot.submissionPreChecks(interaction)
+    if(alchemy_points < 0 or graveyard_points < 0 or enchanting_points < 0 or telekinetic_points < 0):
+      raise errors.UserError('Points cannot be negative')
+    description = f'{alchemy_points}/{graveyard_points}/{enchanting_points}/{telekinetic_points} MTA points'
+    ids = []
+    ids.append(self.showdownBot.backendClient.submitContribution(self.showdownBot.roster.rsns[interaction.user.id], "MTA: Alchemist's Playground", alchemy_points, [screenshot.url], description))
+    ids.append(self.showdownBot.backendClient.submitContribution(self.showdownBot.roster.rsns[interaction.user.id], "MTA: Creature Graveyard", graveyard_points, [screenshot.url], description))
+    ids.append(self.showdownBot.backendClient.submitContribution(self.showdownBot.roster.rsns[interaction.user.id], "MTA: Enchanting Chamber", enchanting_points, [screenshot.url], description))
+    ids.append(self.showdownBot.backendClient.submitContribution(self.showdownBot.roster.rsns[interaction.user.id], "MTA: Telekinetic Theatre", telekinetic_points, [screenshot.url], description))
+    submission = submissions.Submission(self.showdownBot, interaction, ids, description)
+    await self.showdownBot.acceptSubmission(interaction, submission)
+
+  @app_commands.command(name='submit_tithe_farm', description='Submit your tithe farm points for the competition!')
+  async def submit_tithe_farm(self, interaction: Interaction, screenshot: Attachment, points: int):
+    await self.showdownBot.submissionPreChecks(interaction)
+    if(points < 0):
+      raise errors.UserError('Points cannot be negative')
+    description = f'{points} tithe farm points'
+    ids = [self.showdownBot.backendClient.submitContribution(self.showdownBot.roster.rsns[interaction.user.id], 'Tithe Farm Points', points, [screenshot.url], description)]
+    submission = submissions.Submission(self.showdownBot, interaction, ids, description)
+    await self.showdownBot.acceptSubmission(interaction, submission)
+
+  @app_commands.command(name='submit_farming_contracts', description='Submit your farming contracts for the competition!')
+  async def submit_farming_contracts(self, interaction: Interaction, screenshot: Attachment, contracts: int):
+    await self.showdownBot.submissionPreChecks(interaction)
+    if(contracts < 0):
+      raise errors.UserError('Contracts cannot be negative')
+    description = f'{contracts} farming contracts'
+    ids = [self.showdownBot.backendClient.submitContribution(self.showdownBot.roster.rsns[interaction.user.id], 'Farming Contracts', contracts, [screenshot.url], description)]
+    submission = submissions.Submission(self.showdownBot, interaction, ids, description)
+    await self.showdownBot.acceptSubmission(interaction, submission)
+
+  @app_commands.command(name='submit_nex_nihil_shards', description='Submit your nihil shards from Nex for the competition!')
+  async def submit_nex_nihil_shards(self, interaction: Interaction, screenshot: Attachment, shards: int):
+    await self.showdownBot.submissionPreChecks(interaction)
+    if(shards < 0):
+      raise errors.UserError('Shards cannot be negative')
+    description = f'{shards} nihil shards'
+    ids = [self.showdownBot.backendClient.submitContribution(self.showdownBot.roster.rsns[interaction.user.id], 'Nex: Nihil Shards', shards, [screenshot.url], description)]
+    submission = submissions.Submission(self.showdownBot, interaction, ids, description)
+    await self.showdownBot.acceptSubmission(interaction, submission)
+
+  @app_commands.command(name='submit_revenant_ether', description='Submit your revenant ether for the competition!')
+  async def submit_revenant_ether(self, interaction: Interaction, screenshot: Attachment, ether: int):
+    await self.showdownBot.submissionPreChecks(interaction)
+    if(ether < 0):
+      raise errors.UserError('Ether cannot be negative')
+    description = f'{ether} revenant ether'
+    ids = [self.showdownBot.backendClient.submitContribution(self.showdownBot.roster.rsns[interaction.user.id], 'Revenants: Ether', ether, [screenshot.url], description)]
+    submission = submissions.Submission(self.showdownBot, interaction, ids, description)
+    await self.showdownBot.acceptSubmission(interaction, submission)
+
+  @app_commands.command(name='submit_hueycoatl_hides', description='Submit your Hueycoatl hides for the competition!')
+  async def submit_hueycoatl_hides(self, interaction: Interaction, screenshot: Attachment, hides: int):
+    await self.showdownBot.submissionPreChecks(interaction)
+    if(hides < 0):
+      raise errors.UserError('Hides cannot be negative')
+    description = f'{hides} Hueycoatl hides'
+    ids = [self.showdownBot.backendClient.submitContribution(self.showdownBot.roster.rsns[interaction.user.id], 'Hueycoatl: Hides', hides, [screenshot.url], description)]
+    submission = submissions.Submission(self.showdownBot, interaction, ids, description)
+    await self.showdownBot.acceptSubmission(interaction, submission)
+
+  @app_commands.command(name='submit_mixology', description='Submit your mixology resin counts for the competition!')
+  async def submit_mixology(self, interaction: Interaction, screenshot: Attachment, mox_resin: int, aga_resin: int, lye_resin: int):
+    await self.showdownBot.submissionPreChecks(interaction)
+    if(mox_resin < 0 or aga_resin < 0 or lye_resin < 0):
+      raise errors.UserError('Resin counts cannot be negative')
+    totalResin = mox_resin + aga_resin + lye_resin
+    description = f'{totalResin} mixology resin'
+    ids = [self.showdownBot.backendClient.submitContribution(self.showdownBot.roster.rsns[interaction.user.id], 'Mixology: Resin', totalResin, [screenshot.url], description)]
+    submission = submissions.Submission(self.showdownBot, interaction, ids, description)
+    await self.showdownBot.acceptSubmission(interaction, submission)
+
+  @app_commands.command(name='submit_barbarian_assault', description='Submit your BA points for the competition!')
+  async def submit_barbarian_assault(self, interaction: Interaction, screenshot: Attachment,
+    attacker_level: int,
+    defender_level: int,
+    collector_level: int,
+    healer_level: int,
+    attacker_points: int,
+    defender_points: int,
+    collector_points: int,
+    healer_points: int,
+  ):
+    await self.showdownBot.submissionPreChecks(interaction)
+    for param in self.submit_barbarian_assault.parameters:
+      argName = param.name
+      argValue = locals()[argName]
+      if(isinstance(argValue, int) and argValue < 0):
+        raise errors.UserError('BA arguments cannot be negative')
+      if("level" in argName and (argValue < 1 or argValue > 5)):
+        raise errors.UserError('BA levels must be between 1 and 5')
+    points = attacker_points + defender_points + collector_points + healer_points
+    for level in [attacker_level, defender_level, collector_level, healer_level]:
+      if(level > 1):
+        points += 200
+      if(level > 2):
+        points += 300
+      if(level > 3):
+        points += 400
+      if(level > 4):
+        points += 500
+    description = f'{points} BA points'
+    ids = [self.showdownBot.backendClient.submitContribution(self.showdownBot.roster.rsns[interaction.user.id], 'Barbarian Assault Points', points, [screenshot.url], description)]
+    submission = submissions.Submission(self.showdownBot, interaction, ids, description)
+    await self.showdownBot.acceptSubmission(interaction, submission)
+
+  @app_commands.command(name='submit_doom_of_mokhaiotl', description='Submit your delve completions for the Doom of Mokhaiotl boss!')
+  async def submit_doom_of_mokhaiotl(self, interaction: Interaction, screenshot: Attachment,
+    delve_1: int,
+    delve_2: int,
+    delve_3: int,
+    delve_4: int,
+    delve_5: int,
+    delve_6: int,
+    delve_7: int,
+    delve_8: int,
+    delve_8_plus: int
+  ):
+    await self.showdownBot.submissionPreChecks(interaction)
+    totalDelves = 0
+    for param in self.submit_doom_of_mokhaiotl.parameters:
+      argName = param.name
+      argValue = locals()[argName]
+      if(isinstance(argValue, int) and argValue < 0):
+        raise errors.UserError('Delve completions cannot be negative')
+      if(isinstance(argValue, int)):
+        totalDelves += argValue
+    description = f'{totalDelves} total delves at Doom of Mokhaiotl'
+    ids = []
+    ids.append(self.showdownBot.backendClient.submitContribution(self.showdownBot.roster.rsns[interaction.user.id], 'Doom of Mokhaiotl - Delve Level 1', delve_1, [screenshot.url], description))
+    ids.append(self.showdownBot.backendClient.submitContribution(self.showdownBot.roster.rsns[interaction.user.id], 'Doom of Mokhaiotl - Delve Level 2', delve_2, [screenshot.url], description))
+    ids.append(self.showdownBot.backendClient.submitContribution(self.showdownBot.roster.rsns[interaction.user.id], 'Doom of Mokhaiotl - Delve Level 3', delve_3, [screenshot.url], description))
+    ids.append(self.showdownBot.backendClient.submitContribution(self.showdownBot.roster.rsns[interaction.user.id], 'Doom of Mokhaiotl - Delve Level 4', delve_4, [screenshot.url], description))
+    ids.append(self.showdownBot.backendClient.submitContribution(self.showdownBot.roster.rsns[interaction.user.id], 'Doom of Mokhaiotl - Delve Level 5', delve_5, [screenshot.url], description))
+    ids.append(self.showdownBot.backendClient.submitContribution(self.showdownBot.roster.rsns[interaction.user.id], 'Doom of Mokhaiotl - Delve Level 6', delve_6, [screenshot.url], description))
+    ids.append(self.showdownBot.backendClient.submitContribution(self.showdownBot.roster.rsns[interaction.user.id], 'Doom of Mokhaiotl - Delve Level 7', delve_7, [screenshot.url], description))
+    ids.append(self.showdownBot.backendClient.submitContribution(self.showdownBot.roster.rsns[interaction.user.id], 'Doom of Mokhaiotl - Delve Level 8', delve_8, [screenshot.url], description))
+    ids.append(self.showdownBot.backendClient.submitContribution(self.showdownBot.roster.rsns[interaction.user.id], 'Doom of Mokhaiotl - Delve Level 8+', delve_8_plus, [screenshot.url], description))
+    submission = submissions.Submission(self.showdownBot, interaction, ids, description)
+    await self.showdownBot.acceptSubmission(interaction, submission)
+
+  @app_commands.command(name='submit_team_speedrun', description='Submit your team speedruns for the competition! (Make sure to have precise timing enabled.)')
+  @app_commands.autocomplete(challenge=autocomplete.team_speedrun_autocomplete, rsn_1=autocomplete.player_autocomplete, rsn_2=autocomplete.player_autocomplete, rsn_3=autocomplete.player_autocomplete, rsn_4=autocomplete.player_autocomplete, rsn_5=autocomplete.player_autocomplete)
+  async def submit_team_speedrun(self, interaction: Interaction, screenshot: Attachment, minutes: int, seconds: int, tenths_of_seconds: int, challenge: str, rsn_1: str, rsn_2: Optional[str], rsn_3: Optional[str], rsn_4: Optional[str], rsn_5: Optional[str]):
+    await self.showdownBot.submissionPreChecks(interaction)
+    if(minutes < 0 or seconds < 0 or tenths_of_seconds < 0):
+      raise errors.UserError('Times cannot be negative')
+    if(tenths_of_seconds > 9):
+      raise errors.UserError('tenths_of_seconds cannot be greater than 9')
+    if(self.showdownBot.catalog.challengeTypes.get(challenge) != 'SPEEDRUN'):
+      raise errors.UserError('Invalid challenge name (make sure to click on the autocomplete option)')
+    finalSeconds = (minutes * 60) + seconds + (tenths_of_seconds * 0.1)
+    description = '{0} time of {1:0>2}:{2:0>2}.{3}'.format(challenge, minutes, seconds, tenths_of_seconds)
+    ids = [self.showdownBot.backendClient.submitSpeedChallenge(rsn_1, challenge, finalSeconds, [screenshot.url], description)]
+    if(rsn_2 is not None):
+      ids.append(self.showdownBot.backendClient.submitSpeedChallenge(rsn_2, challenge, finalSeconds, [screenshot.url], description))
+    if(rsn_3 is not None):
+      ids.append(self.showdownBot.backendClient.submitSpeedChallenge(rsn_3, challenge, finalSeconds, [screenshot.url], description))
+    if(rsn_4 is not None):
+      ids.append(self.showdownBot.backendClient.submitSpeedChallenge(rsn_4, challenge, finalSeconds, [screenshot.url], description))
+    if(rsn_5 is not None):
+      ids.append(self.showdownBot.backendClient.submitSpeedChallenge(rsn_5, challenge, finalSeconds, [screenshot.url], description))
+    submission = submissions.Submission(self.showdownBot, interaction, ids, description)
+    await self.showdownBot.acceptSubmission(interaction, submission)
+
+  @app_commands.command(name='submit_relay_time', description='Submit your relay times for the competition! (Make sure to have precise timing enabled.)')
+  @app_commands.autocomplete(challenge=autocomplete.relay_autocomplete)
+  async def submit_relay_time(self, interaction: Interaction, screenshot: Attachment, minutes: int, seconds: int, tenths_of_seconds: int, challenge: str):
+    await self.showdownBot.submissionPreChecks(interaction)
+    if(minutes < 0 or seconds < 0 or tenths_of_seconds < 0):
+      raise errors.UserError('Times cannot be negative')
+    if(tenths_of_seconds > 9):
+      raise errors.UserError('tenths_of_seconds cannot be greater than 9')
+    finalSeconds = (minutes * 60) + seconds + (tenths_of_seconds * 0.1)
+    challengeName = challenge.split('|')[0]
+    if(challenge.split('|')[1] != 'None'):
+      challengeName += ' - ' + challenge.split('|')[1]
+    description = '{0} time of {1:0>2}:{2:0>2}.{3}'.format(challengeName, minutes, seconds, tenths_of_seconds)
+    ids = [self.showdownBot.backendClient.submitSpeedChallenge(self.showdownBot.roster.rsns[interaction.user.id], challenge, finalSeconds, [screenshot.url], description)]
+    submission = submissions.Submission(self.showdownBot, interaction, ids, description)
+    await self.showdownBot.acceptSubmission(interaction, submission)
+
+  @app_commands.command(name='submit_point_challenge', description='Submit your point-based challenge entry for the competition!')
+  @app_commands.autocomplete(challenge=autocomplete.point_challenge_autocomplete, rsn_1=autocomplete.player_autocomplete, rsn_2=autocomplete.player_autocomplete, rsn_3=autocomplete.player_autocomplete, rsn_4=autocomplete.player_autocomplete, rsn_5=autocomplete.player_autocomplete)
+  async def submit_point_challenge(self, interaction: Interaction, screenshot: Attachment, points: int, challenge: str, rsn_1: str, rsn_2: Optional[str], rsn_3: Optional[str], rsn_4: Optional[str], rsn_5: Optional[str]):
+    await self.showdownBot.submissionPreChecks(interaction)
+    if(points < 0):
+      raise errors.UserError('Points cannot be negative')
+    if(self.showdownBot.catalog.challengeTypes.get(challenge) != 'POINTS'):
+      raise errors.UserError('Invalid challenge name (make sure to click on the autocomplete option)')
+    description = '{0} entry of {1}'.format(challenge, points)
+    ids = [self.showdownBot.backendClient.submitPointChallenge(rsn_1, challenge, points, [screenshot.url], description)]
+    if(rsn_2 is not None):
+      ids.append(self.showdownBot.backendClient.submitPointChallenge(rsn_2, challenge, points, [screenshot.url], description))
+    if(rsn_3 is not None):
+      ids.append(self.showdownBot.backendClient.submitPointChallenge(rsn_3, challenge, points, [screenshot.url], description))
+    if(rsn_4 is not None):
+      ids.append(self.showdownBot.backendClient.submitPointChallenge(rsn_4, challenge, points, [screenshot.url], description))
+    if(rsn_5 is not None):
+      ids.append(self.showdownBot.backendClient.submitPointChallenge(rsn_5, challenge, points, [screenshot.url], description))
+    submission = submissions.Submission(self.showdownBot, interaction, ids, description)
+    await self.showdownBot.acceptSubmission(interaction, submission)
+
+  @app_commands.command(name='submit_record', description='Submit your record values for the competition!')
+  @app_commands.autocomplete(record=autocomplete.record_autocomplete)
+  async def submit_record(self, interaction: Interaction, video_url: str, value: int, record: str):
+    await self.showdownBot.submissionPreChecks(interaction)
+    if(value < 0):
+      raise errors.UserError('Value cannot be negative')
+    description = 'Record of {0} XP in {1}'.format(value, record.split('|')[0])
+    if(record.split('|')[1] != 'None'):
+      description += ' with handicap ' + record.split('|')[1]
+    ids = [self.showdownBot.backendClient.submitRecord(self.showdownBot.roster.rsns[interaction.user.id], record, value, video_url, description)]
+    submission = submissions.Submission(self.showdownBot, interaction, ids, description)
+    await self.showdownBot.acceptSubmission(interaction, submission)
+
+  @app_commands.command(name='submit_item_drops', description='Submit an item drop from an activity!')
+  @app_commands.autocomplete(item_type=autocomplete.item_drop_autocomplete)
+  async def submit_item_drops(self, interaction: Interaction, screenshot: Attachment, item_type: str):
+    await self.showdownBot.submissionPreChecks(interaction)
+    if(item_type not in self.showdownBot.catalog.itemDrops):
+      raise errors.UserError('Invalid item name (make sure to click on the autocomplete option)')
+    description = 'Item drop for {0}'.format(item_type)
+    ids = [self.showdownBot.backendClient.submitContributionIncrement(self.showdownBot.roster.rsns[interaction.user.id], item_type, 1, [screenshot.url], description)]
+    submission = submissions.Submission(self.showdownBot, interaction, ids, description)
+    await self.showdownBot.acceptSubmission(interaction, submission)
+
+  @app_commands.command(name='submit_minigame_purchase', description='Submit an item purchase for a minigame!')
+  @app_commands.autocomplete(item_name=autocomplete.purchase_item_autocomplete)
+  async def submit_minigame_purchase(self, interaction: Interaction, before_screenshot: Attachment, after_screenshot: Attachment, item_name: str, quantity: int):
+    await self.showdownBot.submissionPreChecks(interaction)
+    if(quantity < 1):
+      raise errors.UserError('Quantity cannot be 0 or negative')
+    if(item_name not in self.showdownBot.catalog.purchaseMethods):
+      raise errors.UserError('Invalid item name (make sure to click on the autocomplete option)')
+    description = 'Purchase of {0} {1}'.format(quantity, item_name)
+    ids = []
+    for methodName, cost in self.showdownBot.catalog.purchaseMethods[item_name]:
+      ids.append(self.showdownBot.backendClient.submitContributionPurchase(self.showdownBot.roster.rsns[interaction.user.id], methodName, quantity * cost, [before_screenshot.url, after_screenshot.url], description))
+    submission = submissions.Submission(self.showdownBot, interaction, ids, description)
+    await self.showdownBot.acceptSubmission(interaction, submission)
+
+async def setup(bot):
+  await bot.add_cog(SubmitCommands(bot.showdownBot))
@@ -0,0 +1,89 @@
+import hashlib
+import json
+import logging
+import os
+
+log = logging.getLogger('showdown')
+
+# Above this many changed commands, a single bulk sync is cheaper than updating commands one at a time
+MAX_INDIVIDUAL_UPDATES = 5
+
+'''
+Computes a stable hash of each global command in the tree (name, description, parameters, choices and autocomplete
+flags), keyed by command name
+'''
+def commandHashes(tree):
+  hashes = {}
+  for command in tree.get_commands():
+    payload = json.dumps(command.to_dict(tree), sort_keys=True, separators=(',', ':'))
+    hashes[command.name] = hashlib.sha256(payload.encode('utf-8')).hexdigest()
+  return hashes
+
+'''
+Loads the command hashes persisted by the last sync, or None if there aren't any
+'''
+def loadHashes(stateFile):
+  if(not os.path.exists(stateFile)):
+    return None
+  try:
+    with open(stateFile, encoding='utf-8') as state:
+      return json.load(state)
+  except Exception as e:
+    log.warning(f'Ignoring unreadable command sync state file {stateFile}: {e}')
+    return None
+
+def saveHashes(stateFile, hashes):
+  with open(stateFile, 'w', encoding='utf-8') as state:
+    json.dump(hashes, state, indent=2, sort_keys=True)
+
+'''
+Forgets the persisted command hashes, so that the next sync is a full one
+'''
+def clearHashes(stateFile):
+  if(os.path.exists(stateFile)):
+    os.remove(stateFile)
+
+'''
+Does a full sync of the command tree and persists the resulting hashes
+'''
+async def fullSync(tree, stateFile):
+  synced = await tree.sync()
+  saveHashes(stateFile, commandHashes(tree))
+  return synced
+
+'''
+Syncs only the commands whose hash changed since the last sync: new and changed commands are upserted one at a time
+and removed commands are deleted. Does nothing (and makes no requests) if nothing changed. Falls back to a full sync if
+there is no record of a previous sync, or if many commands changed.
+'''
+async def syncChangedCommands(tree, stateFile):
+  current = commandHashes(tree)
+  previous = loadHashes(stateFile)
+  if(previous is None):
+    log.info('No record of a previous command sync, syncing all commands...')
+    synced = await fullSync(tree, stateFile)
+    log.info(f'Synced {len(synced)} commands.')
+    return
+  changed = [name for name in current if previous.get(name) != current[name]]
+  removed = [name for name in previous if name not in current]
+  if(len(changed) == 0 and len(removed) == 0):
+    log.info('Command tree unchanged, skipping command sync')
+    return
+  if(len(changed) + len(removed) > MAX_INDIVIDUAL_UPDATES):
+    log.info(f'{len(changed)} commands changed and {len(removed)} removed, syncing all commands...')
+    await fullSync(tree, stateFile)
+    return
+
+  http = tree.client.http
+  applicationId = tree.client.application_id
+  for name in changed:
+    log.info(f'Updating command /{name}')
+    await http.upsert_global_command(applicationId, tree.get_command(name).to_dict(tree))
+  if(len(removed) > 0):
+    registeredCommands = {command.name: command for command in await tree.fetch_commands()}
+    for name in removed:
+      if(name in registeredCommands):
+        log.info(f'Deleting command /{name}')
+        await http.delete_global_command(applicationId, registeredCommands[name].id)
+  saveHashes(stateFile, current)
+  log.info(f'Command sync complete: {len(changed)} updated, {len(removed)} removed')
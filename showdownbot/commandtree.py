@@ -0,0 +1,96 @@
+import time
+from discord import app_commands, InteractionType
+import showdownbot.errors as errors
+
+'''
+Replies to an interaction: with its response if it hasn't been responded to yet, otherwise with a followup (a submit
+command that had to wait for admission control has already been deferred)
+'''
+async def respond(interaction, content = None, **kwargs):
+  if(interaction.response.is_done()):
+    await interaction.followup.send(content, **kwargs)
+  else:
+    await interaction.response.send_message(content, **kwargs)
+
+'''
+A CommandTree that records latency and a trace for every slash command and autocomplete callback it dispatches, and
+applies admission control to submit commands
+'''
+class ShowdownCommandTree(app_commands.CommandTree):
+
+  def __init__(self, client, **kwargs):
+    super().__init__(client, **kwargs)
+    self.commandDuration = None
+    self.autocompleteDuration = None
+    self.tracer = None
+    self.admission = None
+
+  '''
+  Enables instrumentation, recording metrics into the given MetricsRegistry and a trace per interaction into the given Tracer
+  '''
+  def instrument(self, metrics, tracer):
+    self.tracer = tracer
+    self.commandDuration = metrics.histogram('showdown_command_duration_seconds', 'Time spent handling a slash command', ('command', 'status'))
+    self.autocompleteDuration = metrics.histogram('showdown_autocomplete_duration_seconds', 'Time spent handling an autocomplete callback', ('command', 'option'))
+
+  '''
+  Enables admission control, running every command it applies to through the given AdmissionController
+  '''
+  def limitSubmissions(self, admission):
+    self.admission = admission
+
+  '''
+  Returns the name of the option the user is currently typing in, for autocomplete interactions
+  '''
+  def focusedOption(self, interaction):
+    for option in interaction.data.get('options', []):
+      if(option.get('focused')):
+        return option['name']
+    return 'unknown'
+
+  # _call is the single entry point for both slash commands and autocomplete callbacks, so it is wrapped rather than
+  # each callback individually
+  async def _call(self, interaction):
+    if(self.commandDuration is None):
+      return await self.admitAndCall(interaction)
+    commandName = interaction.data.get('name', 'unknown')
+    start = time.perf_counter()
+    try:
+      with self.tracer.trace('/' + commandName, interactionId=interaction.id, interactionType=interaction.type.name, user=interaction.user.name):
+        await self.admitAndCall(interaction)
+    except Exception:
+      interaction.extras.setdefault('status', 'error')
+      raise
+    finally:
+      elapsed = time.perf_counter() - start
+      if(interaction.type is InteractionType.autocomplete):
+        self.autocompleteDuration.observe(elapsed, command=commandName, option=self.focusedOption(interaction))
+      else:
+        status = interaction.extras.get('status', 'error' if interaction.command_failed else 'success')
+        self.commandDuration.observe(elapsed, command=commandName, status=status)
+
+  '''
+  Dispatches an interaction, first passing it through admission control if that applies to the command. A command that
+  has to wait for a slot is deferred first, since the wait plus the handler could miss Discord's 3 second deadline for
+  the initial response; its handler then replies with a followup (see respond()). Rejected commands get an ephemeral
+  reply telling the user when to retry.
+  '''
+  async def admitAndCall(self, interaction):
+    commandName = interaction.data.get('name', 'unknown')
+    if(self.admission is None or interaction.type is not InteractionType.application_command or not self.admission.appliesTo(commandName)):
+      return await self.invoke(interaction)
+    try:
+      async with self.admission.admit(interaction.user.id, lambda: interaction.response.defer(thinking=True)):
+        await self.invoke(interaction)
+    except errors.RateLimitError as e:
+      interaction.extras['status'] = 'rate_limited'
+      if(interaction.response.is_done()): # Deferred while waiting: the deferred reply is public, so it's replaced
+        await interaction.delete_original_response()
+      await respond(interaction, f'Error: {str(e)}', ephemeral=True)
+
+  '''
+  Runs the command or autocomplete callback of an interaction: discord.py's own dispatch, which parses the options and
+  sends errors to the error handlers. The benchmarks replace it on their tree to call callbacks with fake options.
+  '''
+  async def invoke(self, interaction):
+    await super()._call(interaction)
@@ -0,0 +1,108 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+log = logging.getLogger('showdown')
+
+METHOD_PARAMS = ('monster', 'item', 'item_type', 'item_name', 'challenge', 'record') # Params naming what a submission is for
+
+'''
+Returns the contribution method, challenge or record a submission is for (e.g. the monster of a killcount), or the
+kind of submission for commands without one (e.g. "tithe_farm")
+'''
+def methodOf(submission):
+  for name in METHOD_PARAMS:
+    if(name in submission.params):
+      return submission.params[name]
+  return submission.commandName.removeprefix('submit_')
+
+# A decision read back from the journal
+class JournalEntry():
+
+  __slots__ = ('time', 'decision', 'ids', 'rsn', 'team', 'reviewer', 'method', 'shortDesc')
+
+  def __init__(self, time, decision, ids, rsn, team, reviewer, method, shortDesc):
+    self.time = time
+    self.decision = decision
+    self.ids = json.loads(ids)
+    self.rsn = rsn
+    self.team = team
+    self.reviewer = reviewer
+    self.method = method
+    self.shortDesc = shortDesc
+
+'''
+Append-only journal of every decision on a submission (approvals, denials and undos, by reviewers or auto-approval),
+stored in SQLite with an index per filter (RSN, team, reviewer, method and decision, each followed by time), so that
+filtered history queries read only the matching rows, newest first. Text filters are case-insensitive. Decisions are
+recorded from worker threads, so the connection is shared between threads and every use of it holds a lock.
+'''
+class DecisionJournal():
+
+  def __init__(self, path):
+    self.path = path
+    self.lock = threading.Lock()
+    self.connection = sqlite3.connect(path, check_same_thread=False)
+    self.connection.execute('PRAGMA journal_mode=WAL')
+    self.connection.execute('PRAGMA synchronous=NORMAL') # With WAL, a crash can lose the last few decisions but not corrupt the journal
+    self.connection.executescript('''
+      CREATE TABLE IF NOT EXISTS decisions (
+        id INTEGER PRIMARY KEY,
+        time REAL NOT NULL,
+        decision TEXT NOT NULL,
+        ids TEXT NOT NULL,
+        rsn TEXT COLLATE NOCASE,
+        team TEXT COLLATE NOCASE,
+        reviewer TEXT COLLATE NOCASE,
+        command TEXT,
+        method TEXT COLLATE NOCASE,
+        shortDesc TEXT,
+        submission TEXT NOT NULL
+      );
+      CREATE INDEX IF NOT EXISTS decisions_time ON decisions (time);
+      CREATE INDEX IF NOT EXISTS decisions_rsn ON decisions (rsn, time);
+      CREATE INDEX IF NOT EXISTS decisions_team ON decisions (team, time);
+      CREATE INDEX IF NOT EXISTS decisions_reviewer ON decisions (reviewer, time);
+      CREATE INDEX IF NOT EXISTS decisions_method ON decisions (method, time);
+      CREATE INDEX IF NOT EXISTS decisions_decision ON decisions (decision, time);
+    ''')
+    log.info(f'Opened decision journal {path}')
+
+  '''
+  Appends a decision ("approved", "denied" or "undone") on a submission
+  '''
+  def record(self, decision, submission, reviewer):
+    with self.lock, self.connection: # Commits
+      self.connection.execute(
+        'INSERT INTO decisions (time, decision, ids, rsn, team, reviewer, command, method, shortDesc, submission) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+        (time.time(), decision, json.dumps(submission.ids), submission.rsn, submission.team, reviewer, submission.commandName, methodOf(submission), submission.shortDesc, submission.view('json'))
+      )
+
+  '''
+  Returns a page of the decisions matching the given filters, newest first, as a list of JournalEntries, along with
+  the total number of matching decisions
+  '''
+  def search(self, rsn = None, team = None, reviewer = None, method = None, decision = None, since = None, limit = 10, offset = 0):
+    conditions = []
+    values = []
+    for column, value in (('rsn', rsn), ('team', team), ('reviewer', reviewer), ('method', method), ('decision', decision)):
+      if(value is not None):
+        conditions.append(f'{column} = ?')
+        values.append(value)
+    if(since is not None):
+      conditions.append('time >= ?')
+      values.append(since)
+    where = (' WHERE ' + ' AND '.join(conditions)) if len(conditions) > 0 else ''
+    with self.lock:
+      total = self.connection.execute('SELECT COUNT(*) FROM decisions' + where, values).fetchone()[0]
+      rows = self.connection.execute(
+        'SELECT time, decision, ids, rsn, team, reviewer, method, shortDesc FROM decisions' + where + ' ORDER BY time DESC, id DESC LIMIT ? OFFSET ?',
+        values + [limit, offset]
+      ).fetchall()
+    return [JournalEntry(*row) for row in rows], total
+
+  def close(self):
+    with self.lock:
+      self.connection.close()
@@ -0,0 +1,123 @@
+import heapq
+import logging
+import time
+
+log = logging.getLogger('showdown')
+
+# A reviewer's time-limited claim on a queued submission
+class Lease():
+
+  __slots__ = ('messageId', 'channelId', 'reviewerId', 'expiresAt')
+
+  def __init__(self, messageId, channelId, reviewerId, expiresAt):
+    self.messageId = messageId
+    self.channelId = channelId
+    self.reviewerId = reviewerId
+    self.expiresAt = expiresAt
+
+'''
+Hands out queued submissions to reviewers, oldest first, so that no two reviewers work on the same submission. A
+claimed submission is leased to the reviewer for a limited time; if it isn't decided before the lease expires, it goes
+back to the pool. Submissions are identified by their queue message, and since message IDs increase over time, the
+smallest ID is the oldest submission.
+'''
+class ReviewDispatcher():
+
+  def __init__(self, leaseSeconds = 300):
+    self.leaseSeconds = leaseSeconds
+    self.clear()
+
+  '''
+  Forgets every submission and lease (used before rebuilding from the queue channels)
+  '''
+  def clear(self):
+    self.pool = [] # Heap of (message ID, channel ID) of unclaimed submissions; may hold stale entries, skipped on pop
+    self.queued = {} # Message ID -> channel ID, for every queued submission (claimed or not)
+    self.leases = {} # Message ID -> Lease
+    self.reviewerLeases = {} # Reviewer ID -> Lease
+
+  def add(self, messageId, channelId):
+    self.queued[messageId] = channelId
+    heapq.heappush(self.pool, (messageId, channelId))
+
+  '''
+  Removes a submission that has been decided (or deleted), releasing its lease
+  '''
+  def remove(self, messageId):
+    self.queued.pop(messageId, None)
+    lease = self.leases.pop(messageId, None)
+    if(lease is not None and self.reviewerLeases.get(lease.reviewerId) is lease):
+      del self.reviewerLeases[lease.reviewerId]
+    if(len(self.pool) > 2 * len(self.queued) + 64): # Mostly stale entries, e.g. submissions claimed with the button
+      self.pool = [(messageId, channelId) for messageId, channelId in self.queued.items() if messageId not in self.leases]
+      heapq.heapify(self.pool)
+
+  '''
+  Returns the unexpired lease on a submission, or None if it's unclaimed
+  '''
+  def leaseFor(self, messageId):
+    self.expireLeases()
+    return self.leases.get(messageId)
+
+  '''
+  Leases the oldest unclaimed submission to a reviewer, returning the lease, or None if there are no unclaimed
+  submissions. A reviewer holds one lease at a time: a reviewer who already holds one gets it back, renewed.
+  '''
+  def claimNext(self, reviewerId):
+    self.expireLeases()
+    lease = self.reviewerLeases.get(reviewerId)
+    if(lease is not None):
+      lease.expiresAt = time.monotonic() + self.leaseSeconds
+      return lease
+    while(len(self.pool) > 0):
+      messageId, channelId = heapq.heappop(self.pool)
+      if(messageId in self.queued and messageId not in self.leases):
+        return self.lease(messageId, channelId, reviewerId)
+    return None
+
+  '''
+  Leases a specific submission to a reviewer, releasing any other lease the reviewer holds. Returns the lease, or None
+  if another reviewer holds an unexpired lease on it.
+  '''
+  def claim(self, messageId, channelId, reviewerId):
+    self.expireLeases()
+    lease = self.leases.get(messageId)
+    if(lease is not None and lease.reviewerId != reviewerId):
+      return None
+    if(messageId not in self.queued): # Queued while the dispatcher wasn't tracking it
+      self.queued[messageId] = channelId
+    self.release(reviewerId)
+    return self.lease(messageId, channelId, reviewerId)
+
+  '''
+  Returns a reviewer's claimed submission to the pool
+  '''
+  def release(self, reviewerId):
+    lease = self.reviewerLeases.pop(reviewerId, None)
+    if(lease is not None):
+      del self.leases[lease.messageId]
+      heapq.heappush(self.pool, (lease.messageId, lease.channelId))
+
+  def lease(self, messageId, channelId, reviewerId):
+    lease = Lease(messageId, channelId, reviewerId, time.monotonic() + self.leaseSeconds)
+    self.leases[messageId] = lease
+    self.reviewerLeases[reviewerId] = lease
+    return lease
+
+  '''
+  Returns the submissions whose lease has expired to the pool
+  '''
+  def expireLeases(self):
+    now = time.monotonic()
+    for lease in [lease for lease in self.leases.values() if lease.expiresAt <= now]:
+      log.info(f'Lease on submission message {lease.messageId} held by {lease.reviewerId} expired')
+      self.release(lease.reviewerId)
+
+  '''
+  Returns the number of queued submissions that nobody has claimed (or whose lease has expired). Read-only, so that it
+  can be called from the status server thread: expired leases are only released by calls on the event loop.
+  '''
+  def unclaimedCount(self):
+    now = time.monotonic()
+    leases = list(self.leases.values()) # Copied in one step, so the event loop can't change it while it's counted
+    return max(0, len(self.queued) - sum(1 for lease in leases if lease.expiresAt > now))
@@ -0,0 +1,159 @@
+import asyncio
+import json
+import logging
+import os
+from collections import OrderedDict
+try:
+  from PIL import Image
+except ImportError: # Pillow is optional; without it, only identical files are detected
+  Image = None
+
+log = logging.getLogger('showdown')
+
+HASH_BITS = 64
+
+'''
+Computes the difference hash (dHash) of an image file: the image is shrunk to 9x8 greyscale, and each bit records
+whether a pixel is brighter than its right neighbour. Resized, recompressed or slightly cropped copies of an image have
+hashes a few bits apart. Returns None if Pillow isn't installed or the file isn't an image.
+'''
+def differenceHash(path):
+  if(Image is None):
+    return None
+  try:
+    with Image.open(path) as image:
+      image.draft('L', (64, 64)) # Lets JPEG decoding skip most of the work
+      pixels = list(image.convert('L').resize((9, 8), Image.Resampling.LANCZOS).getdata())
+  except Exception as e:
+    log.warning(f'Failed to compute perceptual hash of {path}: {e}')
+    return None
+  value = 0
+  for row in range(8):
+    for column in range(8):
+      value = (value << 1) | (pixels[row * 9 + column] > pixels[row * 9 + column + 1])
+  return value
+
+# A screenshot in the index: the submission it was first seen in, and its perceptual hash (if any)
+class IndexedScreenshot():
+
+  __slots__ = ('submissionId', 'dhash')
+
+  def __init__(self, submissionId, dhash):
+    self.submissionId = submissionId
+    self.dhash = dhash
+
+'''
+Index of submitted screenshots by SHA-256 and by perceptual hash, used to flag screenshots that were already submitted.
+
+Identical files are found with a single dictionary lookup. Similar images (perceptual hashes at most `maxDistance` bits
+apart) are found by splitting each hash into maxDistance + 1 bands and indexing each band: two hashes that close must
+have at least one band in common, so a lookup only compares against the few screenshots sharing a band.
+
+The index holds at most `maxEntries` screenshots, evicting the least recently seen, and is persisted to an append-only
+file that is replayed (and compacted) on startup.
+'''
+class DuplicateIndex():
+
+  def __init__(self, indexFile, maxEntries = 100000, maxDistance = 3):
+    self.indexFile = indexFile
+    self.maxEntries = maxEntries
+    self.maxDistance = maxDistance
+    bandCount = maxDistance + 1
+    self.bandWidths = [HASH_BITS // bandCount + (1 if i < HASH_BITS % bandCount else 0) for i in range(bandCount)]
+    self.entries = OrderedDict() # SHA-256 digest (bytes) -> IndexedScreenshot, least recently seen first
+    self.bands = [{} for i in range(bandCount)] # Per band: band value -> set of SHA-256 digests
+    if(Image is None):
+      log.info('Pillow is not installed, duplicate screenshot detection will only find identical files')
+    self.load()
+
+  def bandValues(self, dhash):
+    values = []
+    shift = HASH_BITS
+    for width in self.bandWidths:
+      shift -= width
+      values.append((dhash >> shift) & ((1 << width) - 1))
+    return values
+
+  '''
+  Replays the index file, and rewrites it if it holds many more lines than entries (because of evictions and repeats)
+  '''
+  def load(self):
+    if(not os.path.exists(self.indexFile)):
+      return
+    lines = 0
+    with open(self.indexFile, encoding='utf-8') as indexFile:
+      for line in indexFile:
+        if(line.strip() == ''):
+          continue
+        lines += 1
+        entry = json.loads(line)
+        self.add(bytes.fromhex(entry['sha256']), entry['id'], entry['dhash'])
+    log.info(f'Loaded duplicate screenshot index: {len(self.entries)} screenshots')
+    if(lines > 2 * len(self.entries) + 1000):
+      temporaryFile = self.indexFile + '.tmp'
+      with open(temporaryFile, 'w', encoding='utf-8') as indexFile:
+        for digest, screenshot in self.entries.items():
+          indexFile.write(self.serialize(digest, screenshot) + '\n')
+      os.replace(temporaryFile, self.indexFile)
+
+  def serialize(self, digest, screenshot):
+    return json.dumps({'sha256': digest.hex(), 'id': screenshot.submissionId, 'dhash': screenshot.dhash})
+
+  def add(self, digest, submissionId, dhash):
+    if(digest in self.entries):
+      self.entries.move_to_end(digest)
+      return
+    self.entries[digest] = IndexedScreenshot(submissionId, dhash)
+    if(dhash is not None):
+      for band, value in zip(self.bands, self.bandValues(dhash)):
+        band.setdefault(value, set()).add(digest)
+    while(len(self.entries) > self.maxEntries):
+      self.evict()
+
+  def evict(self):
+    digest, screenshot = self.entries.popitem(last=False)
+    if(screenshot.dhash is not None):
+      for band, value in zip(self.bands, self.bandValues(screenshot.dhash)):
+        digests = band[value]
+        digests.discard(digest)
+        if(len(digests) == 0):
+          del band[value]
+
+  '''
+  Returns (submission ID, kind) for a previously submitted screenshot matching the given one, where kind is "identical"
+  or "similar", or None if there's no match. Screenshots from the given submission IDs are ignored.
+  '''
+  def find(self, digest, dhash, submissionIds):
+    screenshot = self.entries.get(digest)
+    if(screenshot is not None and screenshot.submissionId not in submissionIds):
+      return screenshot.submissionId, 'identical'
+    if(dhash is None):
+      return None
+    best = None
+    for band, value in zip(self.bands, self.bandValues(dhash)):
+      for candidate in band.get(value, ()):
+        other = self.entries[candidate]
+        if(other.submissionId in submissionIds):
+          continue
+        distance = (other.dhash ^ dhash).bit_count()
+        if(distance <= self.maxDistance and (best is None or distance < best[0])):
+          best = (distance, other.submissionId)
+    if(best is None):
+      return None
+    return best[1], 'similar'
+
+  '''
+  Checks a newly mirrored screenshot against the index, then adds it. The perceptual hash is computed on a worker
+  thread, since decoding the image is too slow for the event loop. Returns the same as find().
+  '''
+  async def check(self, sha256, path, submissionIds):
+    digest = bytes.fromhex(sha256)
+    dhash = await asyncio.to_thread(differenceHash, path)
+    match = self.find(digest, dhash, submissionIds)
+    if(digest not in self.entries):
+      self.add(digest, submissionIds[0], dhash)
+      with open(self.indexFile, 'a', encoding='utf-8') as indexFile:
+        indexFile.write(self.serialize(digest, self.entries[digest]) + '\n')
+    else:
+      self.entries.move_to_end(digest)
+    return match
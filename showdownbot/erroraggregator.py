@@ -0,0 +1,141 @@
+import asyncio
+import logging
+import os
+import time
+from showdownbot.watchdog import isOwnFrame
+
+log = logging.getLogger('showdown')
+
+MAX_MESSAGE_LENGTH = 1900 # Discord's limit is 2000 characters; leave room for formatting
+
+'''
+Fingerprints an error by its type and call site: the innermost frame from this package in its traceback (e.g. the
+BackendClient method that failed), so that the same failure reached from different commands counts as one error
+'''
+def fingerprint(error):
+  callSite = None
+  tb = error.__traceback__
+  while tb is not None:
+    if(callSite is None or isOwnFrame(tb.tb_frame)):
+      callSite = f'{tb.tb_frame.f_code.co_qualname} ({os.path.basename(tb.tb_frame.f_code.co_filename)}:{tb.tb_lineno})'
+    tb = tb.tb_next
+  return f'{type(error).__qualname__} in {callSite or 'unknown'}'
+
+# Everything seen of one fingerprint: totals since startup, plus the occurrences not yet included in a report
+class ErrorEntry():
+
+  __slots__ = ('fingerprint', 'message', 'count', 'firstSeen', 'lastSeen', 'pending', 'samples')
+
+  def __init__(self, fingerprint, message, now):
+    self.fingerprint = fingerprint
+    self.message = message # Message of the most recent occurrence
+    self.count = 0
+    self.firstSeen = now
+    self.lastSeen = now
+    self.pending = 0
+    self.samples = []
+
+'''
+Aggregates unexpected errors for the errors channel. The first occurrence of each error (by fingerprint) is posted
+immediately; repeats are only counted, and are posted as a digest every `digestInterval` seconds with counts, first and
+last seen times and a few samples, so that an outage doesn't flood the channel with near-identical messages.
+'''
+class ErrorAggregator():
+
+  def __init__(self, send, metrics, digestInterval = 300, maxSamples = 3):
+    self.send = send # Async function that posts a message to the errors channel
+    self.digestInterval = digestInterval
+    self.maxSamples = maxSamples
+    self.entries = {} # Fingerprint -> ErrorEntry
+    self.errorCounter = metrics.counter('showdown_errors_total', 'Number of unexpected errors, by whether they were posted immediately or aggregated into a digest', ('report',))
+    metrics.gauge('showdown_error_fingerprints', 'Number of distinct unexpected errors seen since startup').setFunction(lambda: len(self.entries))
+
+  '''
+  Records an error, posting it immediately if its fingerprint hasn't been seen before. `describeSample` is called to
+  describe what was being processed (a one-line summary of the submission) only if the sample is going to be kept.
+  '''
+  async def report(self, error, describeSample = None):
+    error = getattr(error, 'original', error) # Unwrap CommandInvokeError
+    key = fingerprint(error)
+    now = time.time()
+    entry = self.entries.get(key)
+    isNew = entry is None
+    if(isNew):
+      entry = self.entries[key] = ErrorEntry(key, str(error), now)
+    entry.count += 1
+    entry.lastSeen = now
+    entry.message = str(error)
+    sample = None
+    if(describeSample is not None and (isNew or len(entry.samples) < self.maxSamples)):
+      try:
+        sample = describeSample()
+      except Exception as e:
+        log.warning(f'Failed to describe sample for error {key}', exc_info=e)
+    if(isNew):
+      self.errorCounter.inc(report='immediate')
+      errorText = 'Unexpected error occurred:\n'
+      if(sample):
+        errorText += f'Processing submission: {sample}\n'
+      errorText += f'Error: {entry.message}\n-# {key}. Repeats are included in the next digest.'
+      await self.post(errorText[:MAX_MESSAGE_LENGTH])
+    else:
+      self.errorCounter.inc(report='digest')
+      entry.pending += 1
+      if(sample):
+        entry.samples.append(sample)
+
+  '''
+  Posts a digest of the errors that repeated since the last digest, if there were any
+  '''
+  async def flush(self):
+    entries = [entry for entry in self.entries.values() if entry.pending > 0]
+    if(len(entries) == 0):
+      return
+    entries.sort(key=lambda entry: entry.pending, reverse=True)
+    taken = [(entry, entry.pending, entry.samples) for entry in entries]
+    for entry in entries:
+      entry.pending = 0
+      entry.samples = []
+    try:
+      for message in self.digestMessages(taken):
+        await self.send(message)
+    except Exception as e:
+      log.error('Failed to post error digest, keeping its counts for the next one', exc_info=e)
+      for entry, pending, samples in taken:
+        entry.pending += pending
+        entry.samples = (samples + entry.samples)[:self.maxSamples]
+
+  '''
+  Renders a digest as one or more messages, each under Discord's message length limit
+  '''
+  def digestMessages(self, taken):
+    sections = []
+    for entry, pending, samples in taken:
+      section = f'**{pending}x** `{entry.fingerprint}` ({entry.count} total, first seen <t:{int(entry.firstSeen)}:f>, last seen <t:{int(entry.lastSeen)}:T>)\n'
+      section += f'Error: {entry.message[:300]}\n'
+      for sample in samples:
+        section += f'> {sample[:300]}\n'
+      sections.append(section[:MAX_MESSAGE_LENGTH])
+    messages = []
+    current = f'# Error digest ({sum(pending for entry, pending, samples in taken)} repeated errors)\n'
+    for section in sections:
+      if(len(current) + len(section) > MAX_MESSAGE_LENGTH):
+        messages.append(current)
+        current = ''
+      current += section
+    messages.append(current)
+    return messages
+
+  async def post(self, text):
+    try:
+      await self.send(text)
+    except Exception as e:
+      log.error('Failed to post to the errors channel', exc_info=e)
+
+  '''
+  Posts a digest every digestInterval seconds; runs until cancelled
+  '''
+  async def run(self):
+    while(True):
+      await asyncio.sleep(self.digestInterval)
+      await self.flush()
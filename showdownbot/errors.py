@@ -4,4 +4,11 @@ class UserError(Exception):
     self.message = message
     
   def __str__(self):
-    return self.message
\ No newline at end of file
+    return self.message
+
+# A UserError for a command that was rejected because the user (or the whole server) is submitting too fast
+class RateLimitError(UserError):
+
+  def __init__(self, retryAfter):
+    super().__init__(f'Too many submissions right now, please slow down and retry in {retryAfter}s')
+    self.retryAfter = retryAfter
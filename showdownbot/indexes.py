@@ -0,0 +1,151 @@
+import logging
+
+log = logging.getLogger('showdown')
+
+'''
+Index of a guild's channels by name. Built once from the guild's channel list, then kept current from the guild channel
+create/delete/update events, so that looking up a channel by name doesn't need to scan the guild or wait for a reload.
+'''
+class ChannelIndex():
+
+  def __init__(self):
+    self.channelsByName = {} # Name -> {channel ID: channel}, since channel names aren't unique
+    self.built = False
+
+  '''
+  Replaces the index with the given channels
+  '''
+  def rebuild(self, channels):
+    self.channelsByName = {}
+    for channel in channels:
+      self.add(channel)
+    self.built = True
+    log.info(f'Indexed {len(channels)} channels')
+
+  def add(self, channel):
+    self.channelsByName.setdefault(channel.name, {})[channel.id] = channel
+
+  def remove(self, channel):
+    channels = self.channelsByName.get(channel.name)
+    if(channels is None):
+      return
+    channels.pop(channel.id, None)
+    if(len(channels) == 0):
+      del self.channelsByName[channel.name]
+
+  '''
+  Updates the index for a channel that may have been renamed
+  '''
+  def update(self, before, after):
+    self.remove(before)
+    self.add(after)
+
+  '''
+  Returns the channel with the given name, or None if there isn't one. If several channels share the name, the most
+  recently created one is returned.
+  '''
+  def get(self, name):
+    channels = self.channelsByName.get(name)
+    if(not channels):
+      return None
+    return max(channels.values(), key=lambda channel: channel.id)
+
+'''
+Index of the competition roster by Discord user ID. The Discord names from the backend are resolved to member IDs once
+per load, so that players keep working when they change their Discord username. Username changes seen in member events
+are recorded as pending renames (coalesced per user) until they are pushed to the backend.
+'''
+class RosterIndex():
+
+  def __init__(self):
+    self.rsns = {} # User ID -> RSN
+    self.teams = {} # User ID -> team name
+    self.discordNames = {} # User ID -> Discord name, as the backend has it until the player is renamed
+    self.unresolved = {} # Lowercase Discord name -> (Discord name, RSN, team name), for players who aren't in the server yet
+    self.pendingRenames = {} # User ID -> (name the backend has, current name), for players renamed since the last push
+
+  '''
+  Replaces the index with the given roster, a list of (Discord name, RSN, team name) tuples, resolving each Discord
+  name to a member of the server
+  '''
+  def rebuild(self, roster, members):
+    membersByName = {member.name.lower(): member for member in members}
+    # Renames that haven't been pushed to the backend yet are still under their old name in the roster
+    if(len(self.pendingRenames) > 0):
+      membersById = {member.id: member for member in members}
+      for userId, (oldName, newName) in self.pendingRenames.items():
+        if(userId in membersById):
+          membersByName[oldName.lower()] = membersById[userId]
+    self.clear()
+    for discordName, rsn, team in roster:
+      member = membersByName.get(discordName.lower())
+      if(member is None):
+        self.unresolved[discordName.lower()] = (discordName, rsn, team)
+        continue
+      self.rsns[member.id] = rsn
+      self.teams[member.id] = team
+      self.discordNames[member.id] = discordName
+    self.pendingRenames = {userId: rename for userId, rename in self.pendingRenames.items() if userId in self.rsns}
+    if(len(self.unresolved) > 0):
+      log.warning(f'{len(self.unresolved)} players are not in the server: {', '.join(sorted(self.unresolved))}')
+
+  '''
+  Adds a member who joined the server to the index, if they're on the roster
+  '''
+  def resolve(self, member):
+    entry = self.unresolved.pop(member.name.lower(), None)
+    if(entry is None):
+      return False
+    self.discordNames[member.id], self.rsns[member.id], self.teams[member.id] = entry
+    return True
+
+  '''
+  Records a member's current username, returning True if it's a rename of a player
+  '''
+  def rename(self, member):
+    oldName = self.discordNames.get(member.id)
+    if(oldName is None or oldName.lower() == member.name.lower()):
+      return False
+    backendName = self.pendingRenames.get(member.id, (oldName, None))[0]
+    if(backendName.lower() == member.name.lower()): # Renamed back before the change was pushed
+      del self.pendingRenames[member.id]
+    else:
+      self.pendingRenames[member.id] = (backendName, member.name)
+    self.discordNames[member.id] = member.name
+    return True
+
+  '''
+  Removes and returns the pending renames, as a list of (user ID, old name, new name) tuples
+  '''
+  def takePendingRenames(self):
+    renames = [(userId, oldName, newName) for userId, (oldName, newName) in self.pendingRenames.items()]
+    self.pendingRenames = {}
+    return renames
+
+  '''
+  Puts back renames that failed to be pushed. The backend still has the old name, even if the user has been renamed
+  again since.
+  '''
+  def restorePendingRenames(self, renames):
+    for userId, oldName, newName in renames:
+      if(userId in self.pendingRenames):
+        newName = self.pendingRenames[userId][1]
+      if(newName.lower() == oldName.lower()):
+        self.pendingRenames.pop(userId, None)
+      else:
+        self.pendingRenames[userId] = (oldName, newName)
+
+  '''
+  Empties the index, keeping the renames that haven't been pushed yet
+  '''
+  def clear(self):
+    self.rsns = {}
+    self.teams = {}
+    self.discordNames = {}
+    self.unresolved = {}
+
+  '''
+  Returns whether a member (or user) is a player on the roster
+  '''
+  def contains(self, member):
+    return member.id in self.rsns
@@ -0,0 +1,97 @@
+import atexit
+import gzip
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import shutil
+from datetime import datetime
+
+TEXT_FORMAT = '%(asctime)s.%(msecs)03d %(levelname)s %(module)s - %(funcName)s: %(message)s'
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+activeListeners = []
+
+# Formats log records as one JSON object per line (tracebacks are already merged into the message by the QueueHandler)
+class JsonFormatter(logging.Formatter):
+
+  def format(self, record):
+    jsonObject = {
+      'time': datetime.fromtimestamp(record.created).astimezone().isoformat(timespec='milliseconds'),
+      'level': record.levelname,
+      'logger': record.name,
+      'module': record.module,
+      'funcName': record.funcName,
+      'message': record.getMessage()
+    }
+    return json.dumps(jsonObject)
+
+'''
+Names rotated log files with a .gz suffix
+'''
+def gzipNamer(name):
+  return name + '.gz'
+
+'''
+Compresses a rotated log file (runs on the listener thread, never on the event loop)
+'''
+def gzipRotator(source, dest):
+  with open(source, 'rb') as sourceFile, gzip.open(dest, 'wb') as destFile:
+    shutil.copyfileobj(sourceFile, destFile)
+  os.remove(source)
+
+'''
+Creates the file handler for the log file, rotating by size or by time depending on the config
+'''
+def createFileHandler(configProperties):
+  filename = configProperties.get('Logging', 'file', fallback='showdown.log')
+  rotation = configProperties.get('Logging', 'rotation', fallback='size').lower()
+  backupCount = configProperties.getint('Logging', 'backupCount', fallback=14)
+  if(rotation == 'time'):
+    handler = logging.handlers.TimedRotatingFileHandler(filename, when=configProperties.get('Logging', 'when', fallback='midnight'), backupCount=backupCount, encoding='utf-8')
+  elif(rotation == 'size'):
+    handler = logging.handlers.RotatingFileHandler(filename, maxBytes=configProperties.getint('Logging', 'maxBytes', fallback=50 * 1024 * 1024), backupCount=backupCount, encoding='utf-8')
+  else:
+    raise Exception(f'Unknown log rotation "{rotation}", expected "size" or "time"')
+  if(configProperties.getboolean('Logging', 'compress', fallback=True)):
+    handler.namer = gzipNamer
+    handler.rotator = gzipRotator
+  if(configProperties.get('Logging', 'format', fallback='text').lower() == 'json'):
+    handler.setFormatter(JsonFormatter())
+  else:
+    handler.setFormatter(logging.Formatter(TEXT_FORMAT, datefmt=DATE_FORMAT))
+  return handler
+
+'''
+Sets up non-blocking logging: loggers only put records on a queue, and a listener thread writes them to the rotating
+log file and (for the bot's own logger) the console. Returns the started QueueListener.
+'''
+def setupLogging(configProperties):
+  fileHandler = createFileHandler(configProperties)
+  streamHandler = logging.StreamHandler()
+  streamHandler.addFilter(logging.Filter('showdown'))
+  logQueue = queue.SimpleQueue()
+  listener = logging.handlers.QueueListener(logQueue, fileHandler, streamHandler, respect_handler_level=True)
+
+  rootLogger = logging.getLogger()
+  rootLogger.setLevel(logging.ERROR)
+  rootLogger.addHandler(logging.handlers.QueueHandler(logQueue))
+  logging.getLogger('discord.client').setLevel(logging.WARN)
+  logging.getLogger('discord.gateway').setLevel(logging.WARN)
+  logging.getLogger('discord.http').setLevel(logging.WARN)
+  logging.getLogger('showdown').setLevel(logging.INFO)
+
+  listener.start()
+  activeListeners.append(listener)
+  return listener
+
+'''
+Stops the logging listeners, writing out any queued records. Runs at exit, and is needed before os._exit(), which skips
+atexit handlers. Each listener is only stopped once (stopping a QueueListener twice raises an error).
+'''
+def stopLogging():
+  while(len(activeListeners) > 0):
+    activeListeners.pop().stop()
+
+atexit.register(stopLogging)
@@ -0,0 +1,213 @@
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+# In-process metrics registry, rendered in the Prometheus text exposition format
+
+# Default latency buckets (in seconds), from fast autocomplete callbacks up to slow backend calls
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+'''
+Escapes a label value for the Prometheus text format
+'''
+def escapeLabelValue(value):
+  return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+'''
+Formats a sample value for the Prometheus text format
+'''
+def formatValue(value):
+  if(value is None or (isinstance(value, float) and math.isnan(value))):
+    return 'NaN'
+  if(value == math.inf):
+    return '+Inf'
+  if(value == -math.inf):
+    return '-Inf'
+  if(isinstance(value, float) and value.is_integer()):
+    return str(int(value))
+  return str(value)
+
+'''
+Formats a label set (a tuple of (name, value) pairs) for the Prometheus text format
+'''
+def formatLabels(labelPairs):
+  if(len(labelPairs) == 0):
+    return ''
+  return '{' + ','.join(f'{name}="{escapeLabelValue(value)}"' for name, value in labelPairs) + '}'
+
+# Base class for a metric family with a fixed set of label names
+class Metric():
+
+  metricType = 'untyped'
+
+  def __init__(self, name, description, labelNames, lock):
+    self.name = name
+    self.description = description
+    self.labelNames = tuple(labelNames)
+    self.lock = lock
+    self.values = {}
+
+  def labelKey(self, labels):
+    if(set(labels) != set(self.labelNames)):
+      raise Exception(f'Metric {self.name} expects labels {self.labelNames}, got {tuple(labels)}')
+    return tuple(str(labels[name]) for name in self.labelNames)
+
+  def labelPairs(self, key):
+    return tuple(zip(self.labelNames, key))
+
+  def header(self):
+    return [f'# HELP {self.name} {self.description}', f'# TYPE {self.name} {self.metricType}']
+
+# A monotonically increasing count
+class Counter(Metric):
+
+  metricType = 'counter'
+
+  def inc(self, amount = 1, **labels):
+    key = self.labelKey(labels)
+    with self.lock:
+      self.values[key] = self.values.get(key, 0) + amount
+
+  def render(self):
+    lines = self.header()
+    for key, value in sorted(self.values.items()):
+      lines.append(f'{self.name}{formatLabels(self.labelPairs(key))} {formatValue(value)}')
+    return lines
+
+# A value that can go up and down, optionally computed by a callback at render time
+class Gauge(Metric):
+
+  metricType = 'gauge'
+
+  def __init__(self, name, description, labelNames, lock):
+    super().__init__(name, description, labelNames, lock)
+    self.functions = {}
+
+  def set(self, value, **labels):
+    key = self.labelKey(labels)
+    with self.lock:
+      self.values[key] = value
+
+  def inc(self, amount = 1, **labels):
+    key = self.labelKey(labels)
+    with self.lock:
+      self.values[key] = self.values.get(key, 0) + amount
+
+  def dec(self, amount = 1, **labels):
+    self.inc(-amount, **labels)
+
+  '''
+  Registers a callback that computes the gauge value whenever the metrics are rendered
+  '''
+  def setFunction(self, function, **labels):
+    key = self.labelKey(labels)
+    with self.lock:
+      self.functions[key] = function
+
+  def render(self):
+    lines = self.header()
+    samples = dict(self.values)
+    for key, function in self.functions.items():
+      try:
+        samples[key] = function()
+      except Exception:
+        samples[key] = math.nan
+    for key, value in sorted(samples.items()):
+      lines.append(f'{self.name}{formatLabels(self.labelPairs(key))} {formatValue(value)}')
+    return lines
+
+# A distribution of observed values (e.g. latencies) bucketed into cumulative buckets
+class Histogram(Metric):
+
+  metricType = 'histogram'
+
+  def __init__(self, name, description, labelNames, lock, buckets = DEFAULT_BUCKETS):
+    super().__init__(name, description, labelNames, lock)
+    self.buckets = tuple(sorted(buckets))
+
+  def observe(self, value, **labels):
+    key = self.labelKey(labels)
+    with self.lock:
+      series = self.values.get(key)
+      if(series is None):
+        series = {'buckets': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+        self.values[key] = series
+      for i, bound in enumerate(self.buckets):
+        if(value <= bound):
+          series['buckets'][i] += 1
+          break
+      series['sum'] += value
+      series['count'] += 1
+
+  '''
+  Context manager that observes the duration of the block it wraps. If the histogram has a "status" label, it is
+  filled in with "success" or "error" depending on whether the block raised.
+  '''
+  @contextmanager
+  def time(self, **labels):
+    start = time.perf_counter()
+    if('status' in self.labelNames and 'status' not in labels):
+      try:
+        yield
+      except BaseException:
+        self.observe(time.perf_counter() - start, status='error', **labels)
+        raise
+      self.observe(time.perf_counter() - start, status='success', **labels)
+    else:
+      try:
+        yield
+      finally:
+        self.observe(time.perf_counter() - start, **labels)
+
+  def render(self):
+    lines = self.header()
+    with self.lock:
+      snapshot = [(key, list(series['buckets']), series['sum'], series['count']) for key, series in self.values.items()]
+    for key, buckets, total, count in sorted(snapshot):
+      labelPairs = self.labelPairs(key)
+      cumulative = 0
+      for bound, bucketCount in zip(self.buckets, buckets):
+        cumulative += bucketCount
+        lines.append(f'{self.name}_bucket{formatLabels(labelPairs + (('le', formatValue(float(bound))),))} {cumulative}')
+      lines.append(f'{self.name}_bucket{formatLabels(labelPairs + (('le', '+Inf'),))} {count}')
+      lines.append(f'{self.name}_sum{formatLabels(labelPairs)} {formatValue(total)}')
+      lines.append(f'{self.name}_count{formatLabels(labelPairs)} {count}')
+    return lines
+
+# Holds every metric in the process; metrics are created on first use and shared afterwards
+class MetricsRegistry():
+
+  def __init__(self):
+    self.lock = threading.Lock()
+    self.metrics = {}
+
+  def getOrCreate(self, metricClass, name, description, labelNames, **kwargs):
+    with self.lock:
+      metric = self.metrics.get(name)
+      if(metric is None):
+        metric = metricClass(name, description, labelNames, threading.Lock(), **kwargs)
+        self.metrics[name] = metric
+    if(not isinstance(metric, metricClass) or metric.labelNames != tuple(labelNames)):
+      raise Exception(f'Metric {name} is already registered with a different type or labels')
+    return metric
+
+  def counter(self, name, description, labelNames = ()):
+    return self.getOrCreate(Counter, name, description, labelNames)
+
+  def gauge(self, name, description, labelNames = ()):
+    return self.getOrCreate(Gauge, name, description, labelNames)
+
+  def histogram(self, name, description, labelNames = (), buckets = DEFAULT_BUCKETS):
+    return self.getOrCreate(Histogram, name, description, labelNames, buckets = buckets)
+
+  '''
+  Renders every registered metric in the Prometheus text exposition format
+  '''
+  def render(self):
+    with self.lock:
+      metrics = list(self.metrics.values())
+    lines = []
+    for metric in sorted(metrics, key=lambda m: m.name):
+      lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,106 @@
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from showdownbot.watchdog import threadStack, isOwnFrame
+
+log = logging.getLogger('showdown')
+
+MIN_INTERVAL = 0.001
+MAX_OVERHEAD = 0.05 # Largest fraction of the time the sampler may hold the GIL; the interval is raised to stay under it
+IDLE_FUNCTIONS = {'select', 'poll', 'epoll', '_run_once', 'run_forever'} # Where the loop thread sits when it has nothing to do
+
+'''
+Names a frame for a profile: "qualified.name (file.py:first line)", so every sample of a function gets the same name
+'''
+def frameName(frame):
+  return f'{frame.f_code.co_qualname} ({os.path.basename(frame.f_code.co_filename)}:{frame.f_code.co_firstlineno})'
+
+'''
+Samples the stack of a thread (the event loop's) from a separate thread at a fixed interval, so that the running bot can
+be profiled without instrumenting it: command and button handlers, autocomplete callbacks and BackendClient calls all
+show up in the loop thread's stack while they run. Code running on worker threads (asyncio.to_thread) isn't sampled.
+
+Taking a sample holds the GIL briefly; the average time a sample takes is measured, and the interval is raised to at
+least that time divided by MAX_OVERHEAD, so that sampling takes at most about MAX_OVERHEAD of the time.
+'''
+class SamplingProfiler():
+
+  def __init__(self, threadId, interval = 0.01):
+    self.threadId = threadId
+    self.interval = max(interval, MIN_INTERVAL)
+    self.stacks = Counter() # Collapsed stack (outermost first, ";"-separated) -> samples
+    self.ownFunctions = set() # Names of the functions from this package, marked in the report
+    self.samples = 0
+    self.idleSamples = 0
+    self.samplingTime = 0.0
+    self.elapsed = 0.0
+
+  '''
+  Samples for the given number of seconds. Blocking: run it on a worker thread, never on the thread being sampled.
+  '''
+  def run(self, seconds):
+    if(threading.get_ident() == self.threadId):
+      raise Exception('The profiler cannot sample the thread it runs on')
+    start = time.perf_counter()
+    end = start + seconds
+    attempts = 0
+    while(True):
+      now = time.perf_counter()
+      if(now >= end):
+        break
+      self.sample()
+      self.samplingTime += time.perf_counter() - now
+      attempts += 1
+      if(attempts >= 20): # A few samples in, so the average means something
+        self.interval = max(self.interval, self.samplingTime / attempts / MAX_OVERHEAD)
+      self.elapsed = time.perf_counter() - start
+      time.sleep(min(self.interval, max(0.0, end - time.perf_counter())))
+    self.elapsed = time.perf_counter() - start
+
+  def sample(self):
+    stack = threadStack(self.threadId)
+    if(len(stack) == 0):
+      return
+    self.samples += 1
+    if(stack[-1].f_code.co_name in IDLE_FUNCTIONS):
+      self.idleSamples += 1
+      return
+    names = []
+    for frame in stack:
+      name = frameName(frame)
+      names.append(name)
+      if(isOwnFrame(frame)):
+        self.ownFunctions.add(name)
+    self.stacks[';'.join(names)] += 1
+
+  '''
+  Renders the samples in the collapsed stack format read by flamegraph.pl, speedscope and similar tools
+  '''
+  def collapsedStacks(self):
+    return ''.join(f'{stack} {count}\n' for stack, count in self.stacks.most_common())
+
+  '''
+  Renders a report of the functions seen in the samples, sorted by inclusive samples (the function or anything it
+  called was running), with self samples (the function itself was running). Functions from this package are marked *.
+  '''
+  def report(self, limit = 60):
+    inclusive = Counter()
+    exclusive = Counter()
+    for stack, count in self.stacks.items():
+      names = stack.split(';')
+      exclusive[names[-1]] += count
+      for name in set(names):
+        inclusive[name] += count
+    busy = self.samples - self.idleSamples
+    lines = [
+      f'Profiled the event loop for {self.elapsed:.1f}s: {self.samples} samples, final interval {self.interval * 1000:.1f} ms, sampling overhead {self.samplingTime / max(self.elapsed, 1e-9):.1%}',
+      f'Busy in {busy} samples ({busy / max(self.samples, 1):.1%}), idle in {self.idleSamples}',
+      '',
+      f'{"inclusive":>10} {"":>7} {"self":>10} {"":>7}  function'
+    ]
+    for name, count in inclusive.most_common(limit):
+      marker = '*' if name in self.ownFunctions else ' '
+      lines.append(f'{count:>10} {count / max(busy, 1):>7.1%} {exclusive[name]:>10} {exclusive[name] / max(busy, 1):>7.1%} {marker}{name}')
+    return '\n'.join(lines) + '\n'
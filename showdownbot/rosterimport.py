@@ -0,0 +1,103 @@
+import csv
+import io
+import logging
+
+log = logging.getLogger('showdown')
+
+MAX_ROWS = 1000
+HEADER = ('rsn', 'discord_name', 'team')
+
+# One row of a roster import, and what happened to it
+class RosterImportRow():
+
+  __slots__ = ('line', 'rsn', 'discordName', 'team', 'status', 'detail')
+
+  def __init__(self, line, rsn, discordName, team):
+    self.line = line # Line number in the CSV file, for the report
+    self.rsn = rsn
+    self.discordName = discordName
+    self.team = team
+    self.status = 'valid' # valid -> added or failed; or invalid
+    self.detail = ''
+
+  def reject(self, detail):
+    self.status = 'invalid'
+    self.detail = detail
+
+'''
+Parses a roster CSV (rsn, discord name, team per line, with an optional header line) into RosterImportRows
+'''
+def parseRosterCsv(text):
+  rows = []
+  for line, fields in enumerate(csv.reader(io.StringIO(text)), start=1):
+    fields = [field.strip() for field in fields]
+    if(len(fields) == 0 or all(field == '' for field in fields)):
+      continue
+    if(len(rows) == 0 and tuple(field.lower().replace(' ', '_') for field in fields) == HEADER):
+      continue
+    row = RosterImportRow(line, *(fields + ['', '', ''])[:3])
+    if(len(fields) != 3 or '' in fields):
+      row.reject('Expected 3 values: rsn, discord name, team')
+    rows.append(row)
+    if(len(rows) > MAX_ROWS):
+      raise Exception(f'Roster file has more than {MAX_ROWS} rows')
+  return rows
+
+'''
+Validates rows against the server's members (a dict of lowercase username -> member) and the loaded competition info,
+without calling the backend. Team names are matched case-insensitively and replaced with the backend's spelling.
+'''
+def validateRows(rows, membersByName, catalog):
+  teamsByName = {team.lower(): team for team in catalog.teams}
+  players = {rsn.lower() for rsn in catalog.players}
+  discordNames = {name.lower() for name in catalog.discordNames}
+  seenRsns = set()
+  seenDiscordNames = set()
+  for row in rows:
+    if(row.status != 'valid'):
+      continue
+    rsn = row.rsn.lower()
+    discordName = row.discordName.lower()
+    if(row.team.lower() not in teamsByName):
+      row.reject(f'Team {row.team} not found')
+    elif(discordName not in membersByName):
+      row.reject(f'Discord member {row.discordName} not found')
+    elif(rsn in players):
+      row.reject(f'RSN {row.rsn} is already registered')
+    elif(discordName in discordNames):
+      row.reject(f'Discord name {row.discordName} is already registered')
+    elif(rsn in seenRsns):
+      row.reject(f'RSN {row.rsn} appears more than once in the file')
+    elif(discordName in seenDiscordNames):
+      row.reject(f'Discord name {row.discordName} appears more than once in the file')
+    else:
+      row.team = teamsByName[row.team.lower()]
+    seenRsns.add(rsn)
+    seenDiscordNames.add(discordName)
+
+'''
+Adds the valid rows to the backend, without synchronizing the Temple comp (the caller does that once afterwards). A
+row that fails is marked failed and the rest are still added. Blocking: run it on a worker thread.
+'''
+def addPlayers(backendClient, rows):
+  for row in rows:
+    if(row.status != 'valid'):
+      continue
+    try:
+      backendClient.addPlayer(row.rsn, row.discordName, row.team, False)
+      row.status = 'added'
+    except Exception as e:
+      log.warning(f'Failed to add player {row.rsn} from roster import: {e}')
+      row.status = 'failed'
+      row.detail = str(e)
+
+'''
+Renders the per-row report as a CSV file
+'''
+def reportCsv(rows):
+  output = io.StringIO()
+  writer = csv.writer(output)
+  writer.writerow(('line', 'rsn', 'discord_name', 'team', 'status', 'detail'))
+  for row in rows:
+    writer.writerow((row.line, row.rsn, row.discordName, row.team, row.status, row.detail))
+  return output.getvalue()
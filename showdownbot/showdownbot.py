@@ -1,12 +1,35 @@
+import asyncio
+import importlib
+import json
 import logging
+import math
 import os
+import time
 from datetime import datetime
 from discord.ext import commands
-from discord import utils, Intents, ui, app_commands, Interaction, Attachment, Colour, CategoryChannel, TextChannel, VoiceChannel, PermissionOverwrite, InteractionType, ButtonStyle
-from typing import Optional
+from discord import utils, NotFound, Intents, ui, ButtonStyle, HTTPException
+import showdownbot.cogs as cogs
+import showdownbot.cogs.autocomplete as autocomplete
+import showdownbot.commandsync as commandsync
 import showdownbot.errors as errors
+import showdownbot.logsetup as logsetup
 import showdownbot.submissions as submissions
+from showdownbot.admission import AdmissionController
+from showdownbot.attachmentmirror import AttachmentMirror
+from showdownbot.autoapproval import AutoApprovalRules, AutoApprover, parseList, REVIEWER_NAME
 from showdownbot.backendclient import BackendClient
+from showdownbot.catalog import CatalogPurchaseItem, ValidationCatalog
+from showdownbot.commandtree import ShowdownCommandTree, respond
+from showdownbot.decisionjournal import DecisionJournal
+from showdownbot.dispatcher import ReviewDispatcher
+from showdownbot.duplicateindex import DuplicateIndex
+from showdownbot.erroraggregator import ErrorAggregator
+from showdownbot.indexes import ChannelIndex, RosterIndex
+from showdownbot.metrics import MetricsRegistry
+from showdownbot.statusserver import StatusServer
+from showdownbot.submissionqueue import QueueShard, SubmissionQueue, parseShards
+from showdownbot.tracing import Tracer
+from showdownbot.watchdog import LoopWatchdog
 
 log = logging.getLogger('showdown')
 
@@ -28,22 +51,132 @@ class ShowdownBot:
     self.errorsChannelId = int(competitionProperties['errorsChannelId'])
     self.guildId = int(competitionProperties['guildId'])
     self.backendUrl = competitionProperties['backendUrl']
-    self.backendClient = BackendClient(self.backendUrl)
+    self.commandSyncEnabled = configProperties.getboolean('CommandSync', 'enabled', fallback=True)
+    self.commandSyncStateFile = configProperties.get('CommandSync', 'stateFile', fallback='commandtree.json')
+    self.monitoringHost = configProperties.get('Monitoring', 'host', fallback='127.0.0.1')
+    self.monitoringPort = configProperties.getint('Monitoring', 'port', fallback=None)
+    self.livenessTimeout = configProperties.getfloat('Monitoring', 'livenessTimeout', fallback=10)
+    self.discordNameSyncInterval = configProperties.getfloat('Roster', 'discordNameSyncInterval', fallback=60)
+    self.submissionEmbeds = configProperties.getboolean('Submissions', 'embeds', fallback=False)
+    self.profileMaxSeconds = configProperties.getint('Profiling', 'maxSeconds', fallback=60)
+    self.profileInterval = configProperties.getfloat('Profiling', 'interval', fallback=0.01)
+    self.profiling = False # Only one /profile runs at a time
+
+    # Set up the submission queue: the configured shards, plus the original queue channel as the default shard
+    shards = parseShards(configProperties.get('SubmissionQueue', 'channels', fallback=''))
+    if(self.submissionQueueChannelId not in [shard.channelId for shard in shards]):
+      shards.append(QueueShard('default', self.submissionQueueChannelId))
+    self.submissionQueue = SubmissionQueue(shards, configProperties.get('SubmissionQueue', 'routing', fallback='type'))
+    self.dispatcher = ReviewDispatcher(configProperties.getfloat('SubmissionQueue', 'leaseSeconds', fallback=300))
+
+    # Set up metrics
+    self.metrics = MetricsRegistry()
+    self.componentDuration = self.metrics.histogram('showdown_component_duration_seconds', 'Time spent handling a button click', ('action', 'status'))
+    queueDepth = self.metrics.gauge('showdown_submission_queue_depth', 'Number of submissions waiting in the submission queue', ('shard',))
+    for shard in self.submissionQueue.shards:
+      queueDepth.setFunction(lambda shard=shard: shard.depth, shard=shard.name)
+    self.metrics.gauge('showdown_submissions_unclaimed', 'Number of queued submissions that no reviewer has claimed').setFunction(lambda: self.dispatcher.unclaimedCount())
+    self.metrics.gauge('showdown_competition_info_age_seconds', 'Time since competition info was last loaded from the backend').setFunction(self.competitionInfoAge)
+    self.tracer = Tracer(
+      exportPath = configProperties.get('Tracing', 'exportFile', fallback=None),
+      slowThreshold = configProperties.getfloat('Tracing', 'slowThreshold', fallback=1.0),
+      sampleRate = configProperties.getfloat('Tracing', 'sampleRate', fallback=0.0)
+    )
+    self.backendClient = BackendClient(
+      self.backendUrl,
+      self.metrics,
+      self.tracer,
+      failureThreshold = configProperties.getint('Backend', 'failureThreshold', fallback=5),
+      resetTimeout = configProperties.getfloat('Backend', 'resetTimeout', fallback=30),
+      requestTimeout = configProperties.getfloat('Backend', 'requestTimeout', fallback=10)
+    )
+    self.errorAggregator = ErrorAggregator(
+      self.sendToErrorsChannel,
+      self.metrics,
+      digestInterval = configProperties.getfloat('ErrorReporting', 'digestInterval', fallback=300),
+      maxSamples = configProperties.getint('ErrorReporting', 'maxSamples', fallback=3)
+    )
+    self.errorDigestTask = None
+    self.attachmentMirror = None
+    if(configProperties.get('AttachmentMirror', 'directory', fallback=None)):
+      self.attachmentMirror = AttachmentMirror(
+        configProperties.get('AttachmentMirror', 'directory'),
+        self.metrics,
+        maxConcurrent = configProperties.getint('AttachmentMirror', 'maxConcurrent', fallback=4),
+        maxQueued = configProperties.getint('AttachmentMirror', 'maxQueued', fallback=1000)
+      )
+    self.duplicateIndex = None # Needs the mirrored screenshots
+    if(self.attachmentMirror is not None and configProperties.getboolean('DuplicateDetection', 'enabled', fallback=True)):
+      self.duplicateIndex = DuplicateIndex(
+        os.path.join(self.attachmentMirror.directory, 'duplicates.jsonl'),
+        maxEntries = configProperties.getint('DuplicateDetection', 'maxEntries', fallback=100000),
+        maxDistance = configProperties.getint('DuplicateDetection', 'maxDistance', fallback=3)
+      )
+      self.attachmentMirror.onMirrored = self.checkForDuplicateScreenshot
+      self.duplicateScreenshots = self.metrics.counter('showdown_duplicate_screenshots_total', 'Number of submitted screenshots flagged as duplicates of an earlier submission, by kind', ('kind',))
+    self.decisionJournal = None
+    journalFile = configProperties.get('DecisionJournal', 'file', fallback='decisions.db')
+    if(journalFile):
+      self.decisionJournal = DecisionJournal(journalFile)
+    self.autoApproval = None
+    self.autoApprovalTask = None
+    if(configProperties.getboolean('AutoApproval', 'enabled', fallback=False)):
+      rules = AutoApprovalRules(
+        commands = parseList(configProperties.get('AutoApproval', 'commands', fallback='submit_monster_killcount, submit_item_drops')),
+        trustedPlayers = parseList(configProperties.get('AutoApproval', 'trustedPlayers', fallback='')),
+        maxKcDelta = configProperties.getint('AutoApproval', 'maxKcDelta', fallback=50),
+        maxItemDropsPerHour = configProperties.getint('AutoApproval', 'maxItemDropsPerHour', fallback=3),
+        stateFile = configProperties.get('AutoApproval', 'stateFile', fallback='autoapproval.json')
+      )
+      self.autoApproval = AutoApprover(
+        rules,
+        self.approveAutomatically,
+        self.sendSubmissionToQueue,
+        self.metrics,
+        batchInterval = configProperties.getfloat('AutoApproval', 'batchInterval', fallback=10),
+        pendingFile = configProperties.get('AutoApproval', 'pendingFile', fallback='autoapproval-pending.json')
+      )
+    self.watchdog = LoopWatchdog(
+      self.metrics,
+      stallThreshold = configProperties.getfloat('Watchdog', 'stallThreshold', fallback=1.0),
+      reportCooldown = configProperties.getfloat('Watchdog', 'reportCooldown', fallback=600),
+      reporter = self.reportEventLoopStall
+    )
 
     # Set up bot object
     intents = Intents.default()
     intents.members = True # Required for role assignments to work
     intents.message_content = True # Required for the commands extension to work
-    self.bot = commands.Bot(command_prefix='/', intents=intents)
+    self.bot = commands.Bot(command_prefix='/', intents=intents, tree_cls=ShowdownCommandTree)
+    self.bot.tree.instrument(self.metrics, self.tracer)
+    self.bot.showdownBot = self # The command cogs reach the ShowdownBot through the bot
+    self.bot.setup_hook = self.loadExtensions
+    self.admission = None
+    if(configProperties.getboolean('AdmissionControl', 'enabled', fallback=True)):
+      self.admission = AdmissionController(
+        self.metrics,
+        userRate = configProperties.getfloat('AdmissionControl', 'userRate', fallback=0.2),
+        userBurst = configProperties.getint('AdmissionControl', 'userBurst', fallback=5),
+        globalRate = configProperties.getfloat('AdmissionControl', 'globalRate', fallback=5.0),
+        globalBurst = configProperties.getint('AdmissionControl', 'globalBurst', fallback=30),
+        maxInFlight = configProperties.getint('AdmissionControl', 'maxInFlight', fallback=8),
+        maxQueued = configProperties.getint('AdmissionControl', 'maxQueued', fallback=32),
+        queueTimeout = configProperties.getfloat('AdmissionControl', 'queueTimeout', fallback=2.0)
+      )
+      self.bot.tree.limitSubmissions(self.admission)
+    self.instrumentDiscordHttp()
 
     self.registerErrorHandler()
     self.registerReadyHook(commandLineArgs)
-    self.registerCommands()
-    self.registerInteractionHook()
-
-    self.discordUserTeams = {}
-    self.discordUserRSNs = {}
-    self.teamSubmissionChannels = {}
+    self.registerConnectionHooks()
+    self.registerChannelHooks()
+    self.registerMemberHooks()
+    self.registerMessageHook()
+
+    self.roster = RosterIndex()
+    self.discordNameSyncTask = None
+    self.channelIndex = ChannelIndex()
+    self.teamChannelNames = {} # Team name -> name of the team's bot submission channel
     self.competitionInfo = {}
     self.players = []
     self.discordNames = []
@@ -53,9 +186,50 @@ class ShowdownBot:
     self.monsters = []
     self.itemDrops = []
     self.clogItems = []
+    self.purchaseItems = []
+    self.purchaseItemNames = []
     self.records = []
     self.challenges = []
+    self.speedrunChallenges = []
+    self.pointChallenges = []
+    self.relayChallenges = []
+    self.catalog = ValidationCatalog()
     self.competitionLoaded = False
+    self.competitionLoadedAt = None
+    self.startupComplete = False # Set once on_ready has loaded everything
+    self.gatewayConnected = False
+    self.lastSubmissionAt = None # Wall clock time of the last submission accepted from a player
+
+  '''
+  Wraps the Discord HTTP client so that every Discord API call (including time spent waiting on rate limits) is recorded
+  in the metrics and in the active trace
+  '''
+  def instrumentDiscordHttp(self):
+    http = self.bot.http
+    request = http.request
+    requestDuration = self.metrics.histogram('showdown_discord_request_duration_seconds', 'Time spent on a Discord API call, including rate limit waits', ('method', 'route', 'status'))
+    async def instrumentedRequest(route, *args, **kwargs):
+      start = time.perf_counter()
+      status = 'error'
+      try:
+        with self.tracer.span('discord ' + route.method + ' ' + route.path):
+          response = await request(route, *args, **kwargs)
+        status = 'success'
+        return response
+      except HTTPException as e:
+        status = str(e.status)
+        raise
+      finally:
+        requestDuration.observe(time.perf_counter() - start, method=route.method, route=route.path, status=status)
+    http.request = instrumentedRequest
+
+  '''
+  Helper method to get the number of seconds since competition info was last loaded (NaN if it never was)
+  '''
+  def competitionInfoAge(self):
+    if(self.competitionLoadedAt is None):
+      return math.nan
+    return time.monotonic() - self.competitionLoadedAt
 
   '''
   Helper method to check if the event is currently in progress
@@ -70,16 +244,24 @@ class ShowdownBot:
   Helper method to make sure the person submitting the command is a competitor and is in the right channel
   '''
   async def submissionPreChecks(self, interaction):
-    if(not self.competitionLoaded):
-      raise errors.UserError('The event is not currently in progress')
-    if(not self.eventInProgress()):
-      raise errors.UserError('The event is not currently in progress')
-    if(interaction.user.name not in self.discordUserRSNs):
-      raise errors.UserError(f'{interaction.user.display_name} is not a registered player in this event')
-    team = self.discordUserTeams[interaction.user.name]
-    teamChannel = self.teamSubmissionChannels[team]
-    if(teamChannel is None or interaction.channel != teamChannel):
-      raise errors.UserError("Please only submit commands in your team's bot submission channel")
+    with self.tracer.span('submissionPreChecks'):
+      if(not self.competitionLoaded):
+        raise errors.UserError('The event is not currently in progress')
+      if(not self.eventInProgress()):
+        raise errors.UserError('The event is not currently in progress')
+      if(not self.roster.contains(interaction.user)):
+        raise errors.UserError(f'{interaction.user.display_name} is not a registered player in this event')
+      team = self.roster.teams[interaction.user.id]
+      teamChannel = self.teamSubmissionChannel(team)
+      if(teamChannel is None or interaction.channel != teamChannel):
+        raise errors.UserError("Please only submit commands in your team's bot submission channel")
+
+
+  '''
+  Returns the bot submission channel for a team, or None if the team doesn't have one
+  '''
+  def teamSubmissionChannel(self, team):
+    return self.channelIndex.get(self.teamChannelNames.get(team))
     
   async def adminCheck(self, interaction):
     staffRole = utils.find(lambda r: r.name == 'Event staff' or r.name == 'Technical Lead', self.bot.get_guild(self.guildId).roles)
@@ -100,32 +282,201 @@ class ShowdownBot:
       raise errors.UserError('User is not a screenshot approver')
 
   '''
-  Helper method to send a message to the error channel to report an error, and respond to the original interaction to notify the user that the error has been reported
+  Helper method to raise a UserError if the submission in the message the user is acting on is claimed by another reviewer
   '''
-  async def sendErrorMessageToErrorChannel(self, interaction, submission, error):
-    errorText = 'Unexpected error occurred:\n'
-    if(submission):
-      errorText += 'Processing submission: \n' + str(submission) + '\n'
-    if(hasattr(error, 'original')):
-      errorText += f'Error: {str(error.original)}'
-    else:
-      errorText += f'Error: {str(error)}'
+  async def checkForClaim(self, interaction):
+    lease = self.dispatcher.leaseFor(interaction.message.id)
+    if(lease is not None and lease.reviewerId != interaction.user.id):
+      raise errors.UserError(f'This submission is claimed by <@{lease.reviewerId}> until <t:{int(time.time() + lease.expiresAt - time.monotonic())}:T>')
+
+  '''
+  Helper method to report an error to the error channel (immediately the first time it occurs, otherwise in the next
+  digest), and respond to the original interaction to notify the user that the error has been reported
+  '''
+  async def reportError(self, interaction, error):
+    describeSample = None
+    if(interaction and self.roster.contains(interaction.user)): # Only players' commands can be described as a submission
+      describeSample = lambda: submissions.Submission(self, interaction).summary()
+    await self.errorAggregator.report(error, describeSample)
+    if(interaction):
+      await respond(interaction, 'Unexpected error: The admins have been notified to review this error')
+
+  async def sendToErrorsChannel(self, text):
+    channel = self.bot.get_channel(self.errorsChannelId)
+    await channel.send(text)
+
+  '''
+  Helper method to send a message to the error channel to report that the event loop was blocked
+  '''
+  async def reportEventLoopStall(self, stall):
+    errorText = f'Event loop was blocked for {stall.duration:.2f}s in {stall.culprit()}\n'
+    errorText += '```\n' + stall.stackText[-1500:] + '```'
     channel = self.bot.get_channel(self.errorsChannelId)
     await channel.send(errorText)
-    if(interaction):
-      await interaction.response.send_message('Unexpected error: The admins have been notified to review this error')
 
   '''
   Helper method to send a message to the submission queue to request approval for a submission
   '''
   async def sendSubmissionToQueue(self, submission):
     log.info('Submission created:\n' + str(submission))
-    submissionText = '# New submission:\n'
-    submissionText += str(submission)
     view = ui.View()
     view.add_item(ui.Button(style=ButtonStyle.success, custom_id='approve', label='Approve'))
     view.add_item(ui.Button(style=ButtonStyle.danger, custom_id='deny', label='Deny'))
-    await self.bot.get_channel(self.submissionQueueChannelId).send(submissionText, view=view)
+    view.add_item(ui.Button(style=ButtonStyle.secondary, custom_id='claim', label='Claim'))
+    shard = self.submissionQueue.route(submission)
+    message = await self.bot.get_channel(shard.channelId).send(**submission.message('# New submission:', 'queue'), view=view)
+    shard.depth += 1
+    self.dispatcher.add(message.id, shard.channelId)
+    if(self.attachmentMirror is not None):
+      self.attachmentMirror.enqueue(submission, message)
+
+  '''
+  Helper method to handle a new submission: it's either left for auto-approval or sent to the submission queue, and the
+  player is told which
+  '''
+  async def acceptSubmission(self, interaction, submission):
+    if(self.autoApproval is not None and await self.autoApproval.offer(submission)):
+      log.info('Submission created for auto-approval:\n' + str(submission))
+      if(self.attachmentMirror is not None):
+        self.attachmentMirror.enqueue(submission)
+      header = '# Submission received (it will be approved automatically):'
+    else:
+      await self.sendSubmissionToQueue(submission)
+      header = '# Submission received:'
+    await respond(interaction, **submission.message(header, 'player'))
+    self.lastSubmissionAt = time.time()
+
+  '''
+  Applies a decision on a submission: sends it to the backend, then publishes it (see publishDecision())
+  '''
+  async def decideSubmission(self, submission, approved, reviewerName, queueMessage = None):
+    self.sendDecisionToBackend(submission, approved, reviewerName)
+    await self.publishDecision(submission, approved, reviewerName, queueMessage)
+
+  def sendDecisionToBackend(self, submission, approved, reviewerName):
+    for id in submission.ids:
+      if(approved):
+        self.backendClient.approveSubmission(id, reviewerName)
+      else:
+        self.backendClient.denySubmission(id, reviewerName)
+
+  '''
+  Follows up on a decision the backend has accepted: records it, removes the submission from the queue (if it's in the
+  queue), and posts it to the submission log (with a button to undo it) and to the player's team submission channel
+  '''
+  async def publishDecision(self, submission, approved, reviewerName, queueMessage = None):
+    decision = 'approved' if approved else 'denied'
+    await self.journalDecision(decision, submission, reviewerName)
+    if(approved and self.autoApproval is not None):
+      self.autoApproval.rules.recordApproval(submission)
+
+    # Delete the submission message and any replies (which could exist because of error messages)
+    if(queueMessage is not None):
+      await self.deleteQueuedSubmission(queueMessage)
+
+    view = ui.View()
+    view.add_item(ui.Button(style=ButtonStyle.grey, custom_id='undo', label='Undo'))
+    await self.bot.get_channel(self.submissionLogChannelId).send(**submission.message(f'# Submission {decision} by {reviewerName}:', 'log'), view=view)
+    await self.teamSubmissionChannel(submission.team).send(f'<@{submission.user.id}> Your {submission.shortDesc} has been {decision} by {reviewerName}')
+
+  '''
+  Helper method to record a decision ("approved", "denied" or "undone") in the decision journal. The decision has
+  already been made in the backend, so a failure to record it is logged rather than raised. The insert and commit block
+  on the disk, so they run on a worker thread.
+  '''
+  async def journalDecision(self, decision, submission, reviewerName):
+    if(self.decisionJournal is None):
+      return
+    try:
+      await asyncio.to_thread(self.decisionJournal.record, decision, submission, reviewerName)
+    except Exception as e:
+      log.error(f'Failed to record decision on submission {submission.ids} in the decision journal', exc_info=e)
+
+  '''
+  Sends the submissions that were waiting for auto-approval when the bot last stopped to the submission queue: their
+  batch and any checks on them were lost, so a reviewer decides them instead
+  '''
+  async def requeueInterruptedAutoApprovals(self):
+    interrupted, self.autoApproval.interrupted = self.autoApproval.interrupted, []
+    for submissionJson in interrupted:
+      try:
+        await self.sendSubmissionToQueue(submissions.fromJson(submissionJson, self))
+      except Exception as e:
+        log.error(f'Failed to send interrupted auto-approval to the queue: {submissionJson}', exc_info=e)
+    if(len(interrupted) > 0):
+      log.info(f'Sent {len(interrupted)} submissions interrupted while waiting for auto-approval to the queue')
+      await self.autoApproval.savePending()
+
+  '''
+  Approves a submission accepted by the auto-approval rules (called by the auto-approver's batches). Only raises if the
+  backend didn't approve it, in which case the auto-approver sends it to the queue: once it is approved, a failure to
+  publish the approval is logged, since sending it to the queue would have it reviewed (and approved) again.
+  '''
+  async def approveAutomatically(self, submission):
+    log.info('Submission auto-approved:\n' + submission.view('json'))
+    self.sendDecisionToBackend(submission, True, REVIEWER_NAME)
+    try:
+      await self.publishDecision(submission, True, REVIEWER_NAME)
+    except Exception as e:
+      log.error(f'Submission {submission.ids} was auto-approved in the backend, but posting the approval failed', exc_info=e)
+
+  '''
+  Checks a newly mirrored screenshot of a submission against the screenshots submitted before it, and flags the
+  submission if the screenshot matches one from another submission. A submission waiting for auto-approval has no queue
+  message yet: the flag sends it to the queue instead. If its batch approved it before the check finished, the flag is
+  posted to the submission log, so that a reviewer can undo the approval.
+  '''
+  async def checkForDuplicateScreenshot(self, submission, message, mirrored):
+    match = await self.duplicateIndex.check(mirrored.sha256, mirrored.path, submission.ids)
+    if(match is None):
+      return
+    originalId, kind = match
+    self.duplicateScreenshots.inc(kind=kind)
+    log.info(f'Screenshot {mirrored.paramName} of submission {submission.ids} is {kind} to a screenshot of submission {originalId}')
+    flag = f':warning: **Possible duplicate:** {mirrored.paramName} is {kind} to a screenshot from submission {originalId}'
+    submission.flags.append(flag)
+    if(message is None):
+      if(self.autoApproval is not None and not self.autoApproval.isWaiting(submission)):
+        log.warning(f'Submission {submission.ids} was auto-approved before its screenshot {mirrored.paramName} was found to be {kind} to one from submission {originalId}')
+        await self.bot.get_channel(self.submissionLogChannelId).send(f'{flag}\nSubmission {submission.ids} ({submission.rsn}, {submission.shortDesc}) was auto-approved before this was found: undo its approval in this channel if it is a duplicate')
+      return
+    try:
+      await message.edit(content=submission.message('# New submission:', 'queue')['content'])
+    except NotFound: # Already approved or denied
+      pass
+
+  '''
+  Counts the submissions currently waiting in each submission queue shard, indexes the replies to them, and adds them to
+  the review dispatcher, so that the queue depth metric starts out accurate, replies can be deleted without searching
+  the channel, and reviewers can claim submissions made before a restart
+  '''
+  async def countQueuedSubmissions(self):
+    self.dispatcher.clear()
+    for shard in self.submissionQueue.shards:
+      shard.depth = 0
+      shard.replies = {}
+      async for message in self.bot.get_channel(shard.channelId).history(limit=None):
+        if('Submission json: `' in message.content):
+          shard.depth += 1
+          self.dispatcher.add(message.id, shard.channelId)
+        if(message.reference):
+          shard.addReply(message.reference.message_id, message.id)
+
+  '''
+  Deletes a submission message from the queue, along with any replies to it (which could exist because of error
+  messages)
+  '''
+  async def deleteQueuedSubmission(self, message):
+    shard = self.submissionQueue.shardForChannel(message.channel.id)
+    if(shard is not None):
+      for replyId in shard.takeReplies(message.id):
+        try:
+          await message.channel.get_partial_message(replyId).delete()
+        except NotFound: # Already deleted by hand
+          pass
+      shard.depth -= 1
+    self.dispatcher.remove(message.id)
+    await message.delete()
   
   '''
   Populates instance variables coming from the backend
@@ -133,8 +484,8 @@ class ShowdownBot:
   async def loadCompetitionInfo(self):
     log.info('Loading competition info...')
     try:
-      guild = self.bot.get_guild(self.guildId)
-      channels = guild.channels
+      if(not self.channelIndex.built):
+        self.channelIndex.rebuild(self.bot.get_guild(self.guildId).channels)
       self.competitionInfo = self.backendClient.getCompetitionInfo()
       self.tiles = self.backendClient.getTiles()
       self.contributionMethods = self.backendClient.getContributionMethods()
@@ -145,40 +496,31 @@ class ShowdownBot:
       self.purchaseItems = []
       for method in self.contributionMethods:
         for item in method['purchaseItems']:
-          self.purchaseItems.append({
-            'name': item['name'],
-            'cost': item['cost'],
-            'methodName': method['name']
-          })
-      self.purchaseItemNames = []
-      for item in self.purchaseItems:
-        if(item['name'] not in self.purchaseItemNames):
-          self.purchaseItemNames.append(item['name'])
+          self.purchaseItems.append(CatalogPurchaseItem(item['name'], item['cost'], method['name']))
       self.monsters = self.backendClient.getContributionMethodNamesByType('SUBMISSION_KC')
       self.itemDrops = self.backendClient.getContributionMethodNamesByType('SUBMISSION_ITEM_DROP')
       self.clogItems = self.backendClient.getCollectionLogItems()
       self.records = self.backendClient.getRecords()
       self.challenges = self.backendClient.getChallenges()
+      self.speedrunChallenges = [challenge for challenge in self.challenges if challenge.type == 'SPEEDRUN']
+      self.pointChallenges = [challenge for challenge in self.challenges if challenge.type == 'POINTS']
+      self.relayChallenges = [challenge for challenge in self.challenges if challenge.type == 'RELAY']
 
       teamRosters = self.backendClient.getTeamRosters()
       teamInfo = self.backendClient.getTeamInfo()
       self.players = []
       self.discordNames = []
       self.teams = []
+      self.teamChannelNames = {}
+      roster = []
       for teamName in teamRosters:
         self.teams.append(teamName)
-        teamTag = teamInfo[teamName]['tag']
-        teamBotSubmissionChannelName = teamTag.lower() + '-bot-submissions'
-        for channel in channels:
-          if(channel.name == teamBotSubmissionChannelName):
-            self.teamSubmissionChannels[teamName] = channel
-        if(teamName not in self.teamSubmissionChannels):
-          self.teamSubmissionChannels[teamName] = None
+        self.teamChannelNames[teamName] = teamInfo[teamName]['tag'].lower() + '-bot-submissions'
         for player in teamRosters[teamName]:
           self.players.append(player['rsn'])
           self.discordNames.append(player['discordName'])
-          self.discordUserRSNs[player['discordName'].lower()] = player['rsn']
-          self.discordUserTeams[player['discordName'].lower()] = teamName
+          roster.append((player['discordName'], player['rsn'], teamName))
+      self.roster.rebuild(roster, self.bot.get_guild(self.guildId).members)
 
       self.players.sort()
       self.discordNames.sort()
@@ -188,14 +530,26 @@ class ShowdownBot:
       self.monsters.sort()
       self.itemDrops.sort()
       self.clogItems.sort()
-      self.purchaseItemNames.sort()
+      self.catalog = ValidationCatalog(
+        players = self.players,
+        teams = self.teams,
+        tiles = self.tiles,
+        monsters = self.monsters,
+        itemDrops = self.itemDrops,
+        clogItems = self.clogItems,
+        discordNames = self.discordNames,
+        methods = self.contributionMethodNames,
+        purchaseItems = self.purchaseItems,
+        challenges = self.challenges
+      )
+      self.purchaseItemNames = sorted(self.catalog.purchaseMethods)
 
       self.competitionLoaded = True
+      self.competitionLoadedAt = time.monotonic()
       log.info('Competition info loaded!')
     except Exception as e: # The backend is likely not running, but we can still silently succeed without actually changing anything
-      self.discordUserTeams = {}
-      self.discordUserRSNs = {}
-      self.teamSubmissionChannels = {}
+      self.roster.clear()
+      self.teamChannelNames = {}
       self.competitionInfo = {}
       self.players = []
       self.discordNames = []
@@ -205,693 +559,18 @@ class ShowdownBot:
       self.monsters = []
       self.itemDrops = []
       self.clogItems = []
+      self.purchaseItems = []
+      self.purchaseItemNames = []
       self.records = []
       self.challenges = []
+      self.speedrunChallenges = []
+      self.pointChallenges = []
+      self.relayChallenges = []
+      self.catalog = ValidationCatalog()
       self.competitionLoaded = False
-      log.warning('Failed to load competition info.', e)
+      self.competitionLoadedAt = None
+      log.warning('Failed to load competition info.', exc_info=e)
   
-  '''
-  Registers slash command callbacks to the bot
-  '''
-  def registerCommands(self):
-
-    log.info('Registering commands...')
-    # Set up autocomplete callbacks
-    async def tile_autocomplete(
-      interaction: Interaction,
-      current: str
-    ) -> list[app_commands.Choice[str]]:
-      results = [
-        app_commands.Choice(name = tile, value = tile)
-        for tile in self.tiles if current.lower() in tile.lower()
-      ]
-      if(len(results) > 25):
-        results = results[:25]
-      return results
-
-    async def team_autocomplete(
-      interaction: Interaction,
-      current: str
-    ) -> list[app_commands.Choice[str]]:
-      results = [
-        app_commands.Choice(name = team, value = team)
-        for team in self.teams if current.lower() in team.lower()
-      ]
-      if(len(results) > 25):
-        results = results[:25]
-      return results
-    
-    async def player_autocomplete(
-      interaction: Interaction,
-      current: str
-    ) -> list[app_commands.Choice[str]]:
-      results = [
-        app_commands.Choice(name = player, value = player)
-        for player in self.players if current.lower() in player.lower()
-      ]
-      if(len(results) > 25):
-        results = results[:25]
-      return results
-    
-    async def discord_name_autocomplete(
-      interaction: Interaction,
-      current: str
-    ) -> list[app_commands.Choice[str]]:
-      results = [
-        app_commands.Choice(name = discordName, value = discordName)
-        for discordName in self.discordNames if current.lower() in discordName.lower()
-      ]
-      if(len(results) > 25):
-        results = results[:25]
-      return results
-    
-    async def method_autocomplete(
-      interaction: Interaction,
-      current: str
-    ) -> list[app_commands.Choice[str]]:
-      results = [
-        app_commands.Choice(name = method, value = method)
-        for method in self.contributionMethodNames if current.lower() in method.lower()
-      ]
-      if(len(results) > 25):
-        results = results[:25]
-      return results
-    
-    async def monster_autocomplete(
-      interaction: Interaction,
-      current: str
-    ) -> list[app_commands.Choice[str]]:
-      results = [
-        app_commands.Choice(name = monster, value = monster)
-        for monster in self.monsters if current.lower() in monster.lower()
-      ]
-      if(len(results) > 25):
-        results = results[:25]
-      return results
-    
-    async def item_drop_autocomplete(
-      interaction: Interaction,
-      current: str
-    ) -> list[app_commands.Choice[str]]:
-      results = [
-        app_commands.Choice(name = drop, value = drop)
-        for drop in self.itemDrops if current.lower() in drop.lower()
-      ]
-      if(len(results) > 25):
-        results = results[:25]
-      return results
-    
-    async def purchase_item_autocomplete(
-        interaction: Interaction,
-        current: str
-    ) -> list[app_commands.Choice[str]]:
-      results = [
-        app_commands.Choice(name = itemName, value = itemName)
-        for itemName in self.purchaseItemNames if current.lower() in itemName.lower()
-      ]
-      if(len(results) > 25):
-        results = results[:25]
-      return results
-
-    async def clog_autocomplete(
-      interaction: Interaction,
-      current: str
-    ) -> list[app_commands.Choice[str]]:
-      results = [
-        app_commands.Choice(name = item, value = item)
-        for item in self.clogItems if current.lower() in item.lower()
-      ]
-      if(len(results) > 25):
-        results = results[:25]
-      return results
-    
-    async def record_autocomplete(
-      interaction: Interaction,
-      current: str
-    ) -> list[app_commands.Choice[str]]:
-      results = [
-        app_commands.Choice(name = record['nameAndHandicap'], value = record['name'] + '|' + str(record['handicap']))
-        for record in self.records if current.lower() in record['nameAndHandicap'].lower()
-      ]
-      if(len(results) > 25):
-        results = results[:25]
-      return results
-    
-    async def team_speedrun_autocomplete(
-      interaction: Interaction,
-      current: str
-    ) -> list[app_commands.Choice[str]]:
-      results = [
-        app_commands.Choice(name = challenge['name'], value = challenge['name'])
-        for challenge in self.challenges if current.lower() in challenge['name'].lower() and challenge['type'] == 'SPEEDRUN'
-      ]
-      if(len(results) > 25):
-        results = results[:25]
-      return results
-    
-    async def point_challenge_autocomplete(
-      interaction: Interaction,
-      current: str
-    ) -> list[app_commands.Choice[str]]:
-      results = [
-        app_commands.Choice(name = challenge['name'], value = challenge['name'])
-        for challenge in self.challenges if current.lower() in challenge['name'].lower() and challenge['type'] == 'POINTS'
-      ]
-      if(len(results) > 25):
-        results = results[:25]
-      return results
-    
-    async def relay_autocomplete(
-      interaction: Interaction,
-      current: str
-    ) -> list[app_commands.Choice[str]]:
-      results = [
-        app_commands.Choice(name = challenge['nameAndRelayComponent'], value = challenge['name'] + '|' + str(challenge['relayComponent']))
-        for challenge in self.challenges if current.lower() in challenge['nameAndRelayComponent'].lower() and challenge['type'] == 'RELAY'
-      ]
-      if(len(results) > 25):
-        results = results[:25]
-      return results
-
-    # Register commands
-    @self.bot.tree.command(name='initialize_backend', description='ADMIN ONLY: Initialize the backend (will not work if the event is in progress)')
-    async def initialize_backend(interaction: Interaction):
-      await self.adminCheck(interaction)
-      if(not self.competitionLoaded):
-        raise errors.UserError('Competition not loaded')
-      if(self.eventInProgress()):
-        raise errors.UserError('The event is currently in progress')
-      await interaction.response.send_message('Initializing backend...')
-      self.backendClient.initializeBackend()
-      await self.loadCompetitionInfo()
-      await interaction.followup.send('Success: Backend initialized')
-
-    @self.bot.tree.command(name='update_competitor_role', description='ADMIN ONLY: Update the Competitor role (This happens automatically every 60 minutes)')
-    async def update_competitor_role(interaction: Interaction):
-      await self.adminCheck(interaction)
-      if(not self.competitionLoaded):
-        raise errors.UserError('Competition not loaded')
-      await interaction.response.send_message('Updating competitor role...')
-      response = self.backendClient.updateCompetitorRole()
-      if(len(response['signupsNotFound']) == 0):
-        await interaction.followup.send('Success: Competitor role updated. All Discord names were found on the server.')
-      elif(len(response['signupsNotFound']) > 50):
-        await interaction.followup.send(f'Success: Competitor role updated. {str(len(response['namesNotFound']))} names were not found on the server.')
-      else:
-        message = 'Success: Competitor role updated. The following signups were not found on the server:\n'
-        for signup in response['signupsNotFound']:
-          message += f'RSN: "{signup['rsn']}" / Discord name: "{signup['discordName']}"\n'
-        message = message[:-1]
-        await interaction.followup.send(message)
-
-    @self.bot.tree.command(name='setup_discord_server', description='ADMIN ONLY: Create team channels and create/assign team roles')
-    async def setup_discord_server(interaction: Interaction):
-      await self.adminCheck(interaction)
-      if(not self.competitionLoaded):
-        raise errors.UserError('Competition not loaded')
-      if(self.eventInProgress()):
-        raise errors.UserError('The event is currently in progress')
-      await interaction.response.send_message('Setting up Discord server...')
-      response = self.backendClient.setupDiscordServer()
-      if(len(response['namesNotFound']) == 0):
-        await interaction.followup.send('Success: Team roles/channels created. All Discord names were found on the server.')
-      elif(len(response['namesNotFound']) > 50):
-        await interaction.followup.send('Success: Team roles/channels created. ' + str(len(response['namesNotFound'])) + ' names were not found on the server.')
-      else:
-        message = 'Success: Team roles/channels created. The following Discord names were not found on the server:\n'
-        for name in response['namesNotFound']:
-          message += name + "\n"
-        message = message[:-1]
-        await interaction.followup.send(message)
-
-    @self.bot.tree.command(name='teardown_discord_server', description='ADMIN ONLY: Delete team channels/roles and de-assign Competitor/Captain roles')
-    async def teardown_discord_server(interaction: Interaction):
-      await self.adminCheck(interaction)
-      if(not self.competitionLoaded):
-        raise errors.UserError('Competition not loaded')
-      if(self.eventInProgress()):
-        raise errors.UserError('The event is currently in progress')
-      await interaction.response.send_message('Tearing down Discord server...')
-      self.backendClient.teardownDiscordServer()
-      await interaction.followup.send('Success: Team roles/channels deleted; Competitor/Captain roles de-assigned.')
-
-    @self.bot.tree.command(name='update_backend', description='ADMIN ONLY: Update the backend (This happens automatically every 60 seconds)')
-    async def update_backend(interaction: Interaction, force: Optional[bool] = False):
-      await self.adminCheck(interaction)
-      if(not self.competitionLoaded):
-        raise errors.UserError('Competition not loaded')
-      if(not force and not self.eventInProgress()):
-        raise errors.UserError('The event is not currently in progress')
-      await interaction.response.send_message('Updating backend...')
-      self.backendClient.updateBackend(force)
-      await interaction.followup.send('Success: Backend updated')
-
-    @self.bot.tree.command(name='sychronize_temple_comp', description='ADMIN ONLY: Synchronize the team rosters in the Temple comp')
-    async def sychronize_temple_comp(interaction: Interaction):
-      await self.adminCheck(interaction)
-      if(not self.competitionLoaded):
-        raise errors.UserError('Competition not loaded')
-      await interaction.response.send_message('Sychronizing Temple comp...')
-      self.backendClient.synchronizeTempleComp()
-      await interaction.followup.send('Success: Temple comp synchronized')
-
-    @self.bot.tree.command(name='reload_competition_info', description='ADMIN ONLY: Reload competition info from the backend')
-    async def reload_competition_info(interaction: Interaction):
-      await self.adminCheck(interaction)
-      await interaction.response.send_message('Reloading competition info...')
-      await self.loadCompetitionInfo()
-      if(self.competitionLoaded):
-        await interaction.followup.send('Successfully reloaded competition info')
-      else:
-        await interaction.followup.send('Failed to reload competition info. The backend might not be running.')
-
-    @self.bot.tree.command(name='reinitialize_tile', description='ADMIN ONLY: Reinitialize a tile in the backend')
-    @app_commands.autocomplete(tile=tile_autocomplete)
-    async def reinitialize_tile(interaction: Interaction, tile: str):
-      await self.adminCheck(interaction)
-      if(not self.competitionLoaded):
-        raise errors.UserError('Competition not loaded')
-      if(tile not in self.tiles):
-        raise errors.UserError('Tile not found - Make sure to click the autocomplete option')
-      await interaction.response.send_message('Reinitializing tile...')
-      self.backendClient.reinitializeTile(tile)
-      await interaction.followup.send('Success: Tile ' + tile + ' has been reinitialized')
-
-    @self.bot.tree.command(name='add_player', description='ADMIN ONLY: Add a player to the competition, and assign the relevant role.')
-    @app_commands.autocomplete(team=team_autocomplete)
-    async def add_player(interaction: Interaction, rsn: str, discord_name: str, team: str, synchronize_temple_comp: Optional[bool] = True):
-      await self.adminCheck(interaction)
-      if(not self.competitionLoaded):
-        raise errors.UserError('Competition not loaded')
-      guild = self.bot.get_guild(self.guildId)
-      if(not guild.get_member_named(discord_name.lower())):
-        raise errors.UserError('Discord member not found')
-      if(team not in self.teams):
-        raise errors.UserError('Team not found - Make sure to click the autocomplete option')
-      await interaction.response.send_message('Adding player...')
-      self.backendClient.addPlayer(rsn, discord_name, team, synchronize_temple_comp)
-      await self.loadCompetitionInfo()
-      await interaction.followup.send('Success: Player ' + rsn + ' added on team: ' + team)
-
-    @self.bot.tree.command(name='change_player_team', description='ADMIN ONLY: Change the team of a player. Also handles role changes.')
-    @app_commands.autocomplete(player=player_autocomplete, team=team_autocomplete)
-    async def change_player_team(interaction: Interaction, player: str, team: str, synchronize_temple_comp: Optional[bool] = True):
-      await self.adminCheck(interaction)
-      if(not self.competitionLoaded):
-        raise errors.UserError('Competition not loaded')
-      if(player not in self.players):
-        raise errors.UserError('Player not found - Make sure to click the autocomplete option')
-      if(team not in self.teams):
-        raise errors.UserError('Team not found - Make sure to click the autocomplete option')
-      await interaction.response.send_message('Changing player team...')
-      self.backendClient.changePlayerTeam(player, team, synchronize_temple_comp)
-      await self.loadCompetitionInfo()
-      await interaction.followup.send('Success: Player ' + player + ' is now on team ' + team)
-
-    @self.bot.tree.command(name='change_player_rsn', description='ADMIN ONLY: Change the RSN of a player.')
-    @app_commands.autocomplete(old_rsn=player_autocomplete)
-    async def change_player_rsn(interaction: Interaction, old_rsn: str, new_rsn: str, synchronize_temple_comp: Optional[bool] = True):
-      await self.adminCheck(interaction)
-      if(not self.competitionLoaded):
-        raise errors.UserError('Competition not loaded')
-      if(old_rsn not in self.players):
-        raise errors.UserError('Player not found - Make sure to click the autocomplete option')
-      await interaction.response.send_message('Changing player RSN...')
-      self.backendClient.changePlayerRsn(old_rsn, new_rsn, synchronize_temple_comp)
-      await self.loadCompetitionInfo()
-      await interaction.followup.send('Success: The RSN ' + old_rsn + ' has been changed to ' + new_rsn)
-
-    @self.bot.tree.command(name='change_player_discord_name', description='ADMIN ONLY: Change the Discord name of a player.')
-    @app_commands.autocomplete(old_discord_name=discord_name_autocomplete)
-    async def change_player_discord_name(interaction: Interaction, old_discord_name: str, new_discord_name: str):
-      await self.adminCheck(interaction)
-      if(not self.competitionLoaded):
-        raise errors.UserError('Competition not loaded')
-      if(old_discord_name not in self.discordNames):
-        raise errors.UserError('Player not found - Make sure to click the autocomplete option')
-      await interaction.response.send_message('Changing player Discord name...')
-      self.backendClient.changePlayerDiscordName(old_discord_name, new_discord_name)
-      await self.loadCompetitionInfo()
-      await interaction.followup.send('Success: The Discord name ' + old_discord_name + ' has been changed to ' + new_discord_name)
-
-    @self.bot.tree.command(name='set_staff_adjustment', description='ADMIN ONLY: Set the staff adjustment for a contribution method on a player')
-    @app_commands.autocomplete(player=player_autocomplete, method=method_autocomplete)
-    async def set_staff_adjustment(interaction: Interaction, player: str, method: str, adjustment: int):
-      await self.adminCheck(interaction)
-      if(not self.competitionLoaded):
-        raise errors.UserError('Competition not loaded')
-      if(player not in self.players):
-        raise errors.UserError('Player not found - Make sure to click the autocomplete option')
-      await interaction.response.send_message('Setting staff adjustment...')
-      self.backendClient.setStaffAdjustment(player, method, adjustment)
-      await self.loadCompetitionInfo()
-      await interaction.followup.send('Success: Player ' + player + ' now has a staff adjustment of ' + str(adjustment) + ' for ' + method)
-
-    @self.bot.tree.command(name='submit_monster_killcount', description='Submit a monster killcount for the competition!')
-    @app_commands.autocomplete(monster=monster_autocomplete)
-    async def submit_monster_killcount(interaction: Interaction, screenshot: Attachment, monster: str, kc: int):
-      await self.submissionPreChecks(interaction)
-      if(kc < 0):
-        raise errors.UserError('KC cannot be negative')
-      if(monster not in self.monsters):
-        raise errors.UserError('Invalid monster name (make sure to click on the autocomplete option)')
-      description = f'{kc} KC of {monster}'
-      ids = [self.backendClient.submitContribution(self.discordUserRSNs[interaction.user.name], monster, kc, [screenshot.url], description)]
-      submission = submissions.Submission(self, interaction, ids, description)
-      await self.sendSubmissionToQueue(submission)
-      responseText = '# Submission received:\n'
-      responseText += str(submission)
-      await interaction.response.send_message(responseText)
-
-    @self.bot.tree.command(name='submit_collection_log', description='Submit a collection log item for the competition! (Make sure the drop is in the screenshot)')
-    @app_commands.autocomplete(item=clog_autocomplete)
-    async def submit_collection_log(interaction: Interaction, screenshot: Attachment, item: str):
-      await self.submissionPreChecks(interaction)
-      if(item not in self.clogItems):
-        raise errors.UserError('Invalid item name (make sure to click on the autocomplete option)')
-      description = f'Collection log item "{item}"'
-      ids = [self.backendClient.submitCollectionLogItem(self.discordUserRSNs[interaction.user.name], item, [screenshot.url], description)]
-      submission = submissions.Submission(self, interaction, ids, description)
-      await self.sendSubmissionToQueue(submission)
-      responseText = '# Submission received:\n'
-      responseText += str(submission)
-      await interaction.response.send_message(responseText)
-
-    @self.bot.tree.command(name='submit_pest_control', description='Submit your pest control games for the competition!')
-    async def submit_pest_control(interaction: Interaction, screenshot: Attachment, novice_games: int, intermediate_games: int, veteran_games: int):
-      await self.submissionPreChecks(interaction)
-      if(novice_games < 0 or intermediate_games < 0 or veteran_games < 0):
-        raise errors.UserError('Number of PC games cannot be negative')
-      total_games = novice_games + intermediate_games + veteran_games
-      description = f'{total_games} games of pest control'
-      ids = [self.backendClient.submitContribution(self.discordUserRSNs[interaction.user.name], 'Pest Control: Games', total_games, [screenshot.url], description)]
-      submission = submissions.Submission(self, interaction, ids, description)
-      await self.sendSubmissionToQueue(submission)
-      responseText = '# Submission received:\n'
-      responseText += str(submission)
-      await interaction.response.send_message(responseText)
-
-    @self.bot.tree.command(name='submit_lms', description='Submit your LMS kills for the competition!')
-    async def submit_lms(interaction: Interaction, screenshot: Attachment, kills: int, wins: int):
-      await self.submissionPreChecks(interaction)
-      if(kills < 0):
-        raise errors.UserError('Kills cannot be negative')
-      if(wins < 0):
-        raise errors.UserError('Wins cannot be negative')
-      description = f'{kills} kills and {wins} wins in LMS'
-      ids = []
-      ids.append(self.backendClient.submitContribution(self.discordUserRSNs[interaction.user.name], 'LMS: Kills', kills, [screenshot.url], description))
-      ids.append(self.backendClient.submitContribution(self.discordUserRSNs[interaction.user.name], 'LMS: Wins', wins, [screenshot.url], description))
-      submission = submissions.Submission(self, interaction, ids, description)
-      await self.sendSubmissionToQueue(submission)
-      responseText = '# Submission received:\n'
-      responseText += str(submission)
-      await interaction.response.send_message(responseText)
-
-    @self.bot.tree.command(name='submit_mta', description='Submit your MTA points for the competition!')
-    async def submit_mta(interaction: Interaction, screenshot: Attachment, telekinetic_points: int, alchemy_points: int, enchanting_points: int, graveyard_points: int):
-      await self.submissionPreChecks(interaction)
-      if(alchemy_points < 0 or graveyard_points < 0 or enchanting_points < 0 or telekinetic_points < 0):
-        raise errors.UserError('Points cannot be negative')
-      description = f'{alchemy_points}/{graveyard_points}/{enchanting_points}/{telekinetic_points} MTA points'
-      ids = []
-      ids.append(self.backendClient.submitContribution(self.discordUserRSNs[interaction.user.name], "MTA: Alchemist's Playground", alchemy_points, [screenshot.url], description))
-      ids.append(self.backendClient.submitContribution(self.discordUserRSNs[interaction.user.name], "MTA: Creature Graveyard", graveyard_points, [screenshot.url], description))
-      ids.append(self.backendClient.submitContribution(self.discordUserRSNs[interaction.user.name], "MTA: Enchanting Chamber", enchanting_points, [screenshot.url], description))
-      ids.append(self.backendClient.submitContribution(self.discordUserRSNs[interaction.user.name], "MTA: Telekinetic Theatre", telekinetic_points, [screenshot.url], description))
-      submission = submissions.Submission(self, interaction, ids, description)
-      await self.sendSubmissionToQueue(submission)
-      responseText = '# Submission received:\n'
-      responseText += str(submission)
-      await interaction.response.send_message(responseText)
-
-    @self.bot.tree.command(name='submit_tithe_farm', description='Submit your tithe farm points for the competition!')
-    async def submit_tithe_farm(interaction: Interaction, screenshot: Attachment, points: int):
-      await self.submissionPreChecks(interaction)
-      if(points < 0):
-        raise errors.UserError('Points cannot be negative')
-      description = f'{points} tithe farm points'
-      ids = [self.backendClient.submitContribution(self.discordUserRSNs[interaction.user.name], 'Tithe Farm Points', points, [screenshot.url], description)]
-      submission = submissions.Submission(self, interaction, ids, description)
-      await self.sendSubmissionToQueue(submission)
-      responseText = '# Submission received:\n'
-      responseText += str(submission)
-      await interaction.response.send_message(responseText)
-
-    @self.bot.tree.command(name='submit_farming_contracts', description='Submit your farming contracts for the competition!')
-    async def submit_farming_contracts(interaction: Interaction, screenshot: Attachment, contracts: int):
-      await self.submissionPreChecks(interaction)
-      if(contracts < 0):
-        raise errors.UserError('Contracts cannot be negative')
-      description = f'{contracts} farming contracts'
-      ids = [self.backendClient.submitContribution(self.discordUserRSNs[interaction.user.name], 'Farming Contracts', contracts, [screenshot.url], description)]
-      submission = submissions.Submission(self, interaction, ids, description)
-      await self.sendSubmissionToQueue(submission)
-      responseText = '# Submission received:\n'
-      responseText += str(submission)
-      await interaction.response.send_message(responseText)
-
-    @self.bot.tree.command(name='submit_nex_nihil_shards', description='Submit your nihil shards from Nex for the competition!')
-    async def submit_nex_nihil_shards(interaction: Interaction, screenshot: Attachment, shards: int):
-      await self.submissionPreChecks(interaction)
-      if(shards < 0):
-        raise errors.UserError('Shards cannot be negative')
-      description = f'{shards} nihil shards'
-      ids = [self.backendClient.submitContribution(self.discordUserRSNs[interaction.user.name], 'Nex: Nihil Shards', shards, [screenshot.url], description)]
-      submission = submissions.Submission(self, interaction, ids, description)
-      await self.sendSubmissionToQueue(submission)
-      responseText = '# Submission received:\n'
-      responseText += str(submission)
-      await interaction.response.send_message(responseText)
-
-    @self.bot.tree.command(name='submit_revenant_ether', description='Submit your revenant ether for the competition!')
-    async def submit_revenant_ether(interaction: Interaction, screenshot: Attachment, ether: int):
-      await self.submissionPreChecks(interaction)
-      if(ether < 0):
-        raise errors.UserError('Ether cannot be negative')
-      description = f'{ether} revenant ether'
-      ids = [self.backendClient.submitContribution(self.discordUserRSNs[interaction.user.name], 'Revenants: Ether', ether, [screenshot.url], description)]
-      submission = submissions.Submission(self, interaction, ids, description)
-      await self.sendSubmissionToQueue(submission)
-      responseText = '# Submission received:\n'
-      responseText += str(submission)
-      await interaction.response.send_message(responseText)
-    
-    @self.bot.tree.command(name='submit_hueycoatl_hides', description='Submit your Hueycoatl hides for the competition!')
-    async def submit_hueycoatl_hides(interaction: Interaction, screenshot: Attachment, hides: int):
-      await self.submissionPreChecks(interaction)
-      if(hides < 0):
-        raise errors.UserError('Hides cannot be negative')
-      description = f'{hides} Hueycoatl hides'
-      ids = [self.backendClient.submitContribution(self.discordUserRSNs[interaction.user.name], 'Hueycoatl: Hides', hides, [screenshot.url], description)]
-      submission = submissions.Submission(self, interaction, ids, description)
-      await self.sendSubmissionToQueue(submission)
-      responseText = '# Submission received:\n'
-      responseText += str(submission)
-      await interaction.response.send_message(responseText)
-
-    @self.bot.tree.command(name='submit_mixology', description='Submit your mixology resin counts for the competition!')
-    async def submit_mixology(interaction: Interaction, screenshot: Attachment, mox_resin: int, aga_resin: int, lye_resin: int):
-      await self.submissionPreChecks(interaction)
-      if(mox_resin < 0 or aga_resin < 0 or lye_resin < 0):
-        raise errors.UserError('Resin counts cannot be negative')
-      totalResin = mox_resin + aga_resin + lye_resin
-      description = f'{totalResin} mixology resin'
-      ids = [self.backendClient.submitContribution(self.discordUserRSNs[interaction.user.name], 'Mixology: Resin', totalResin, [screenshot.url], description)]
-      submission = submissions.Submission(self, interaction, ids, description)
-      await self.sendSubmissionToQueue(submission)
-      responseText = '# Submission received:\n'
-      responseText += str(submission)
-      await interaction.response.send_message(responseText)
-
-    @self.bot.tree.command(name='submit_barbarian_assault', description='Submit your BA points for the competition!')
-    async def submit_barbarian_assault(interaction: Interaction, screenshot: Attachment,
-      attacker_level: int,
-      defender_level: int,
-      collector_level: int,
-      healer_level: int,
-      attacker_points: int,
-      defender_points: int,
-      collector_points: int,
-      healer_points: int,
-    ):
-      await self.submissionPreChecks(interaction)
-      for param in submit_barbarian_assault.parameters:
-        argName = param.name
-        argValue = locals()[argName]
-        if(isinstance(argValue, int) and argValue < 0):
-          raise errors.UserError('BA arguments cannot be negative')
-        if("level" in argName and (argValue < 1 or argValue > 5)):
-          raise errors.UserError('BA levels must be between 1 and 5')
-      points = attacker_points + defender_points + collector_points + healer_points
-      for level in [attacker_level, defender_level, collector_level, healer_level]:
-        if(level > 1):
-          points += 200
-        if(level > 2):
-          points += 300
-        if(level > 3):
-          points += 400
-        if(level > 4):
-          points += 500
-      description = f'{points} BA points'
-      ids = [self.backendClient.submitContribution(self.discordUserRSNs[interaction.user.name], 'Barbarian Assault Points', points, [screenshot.url], description)]
-      submission = submissions.Submission(self, interaction, ids, description)
-      await self.sendSubmissionToQueue(submission)
-      responseText = '# Submission received:\n'
-      responseText += str(submission)
-      await interaction.response.send_message(responseText)
-
-    @self.bot.tree.command(name='submit_doom_of_mokhaiotl', description='Submit your delve completions for the Doom of Mokhaiotl boss!')
-    async def submit_doom_of_mokhaiotl(interaction: Interaction, screenshot: Attachment,
-      delve_1: int,
-      delve_2: int,
-      delve_3: int,
-      delve_4: int,
-      delve_5: int,
-      delve_6: int,
-      delve_7: int,
-      delve_8: int,
-      delve_8_plus: int
-    ):
-      await self.submissionPreChecks(interaction)
-      totalDelves = 0
-      for param in submit_doom_of_mokhaiotl.parameters:
-        argName = param.name
-        argValue = locals()[argName]
-        if(isinstance(argValue, int) and argValue < 0):
-          raise errors.UserError('Delve completions cannot be negative')
-        if(isinstance(argValue, int)):
-          totalDelves += argValue
-      description = f'{totalDelves} total delves at Doom of Mokhaiotl'
-      ids = []
-      ids.append(self.backendClient.submitContribution(self.discordUserRSNs[interaction.user.name], 'Doom of Mokhaiotl - Delve Level 1', delve_1, [screenshot.url], description))
-      ids.append(self.backendClient.submitContribution(self.discordUserRSNs[interaction.user.name], 'Doom of Mokhaiotl - Delve Level 2', delve_2, [screenshot.url], description))
-      ids.append(self.backendClient.submitContribution(self.discordUserRSNs[interaction.user.name], 'Doom of Mokhaiotl - Delve Level 3', delve_3, [screenshot.url], description))
-      ids.append(self.backendClient.submitContribution(self.discordUserRSNs[interaction.user.name], 'Doom of Mokhaiotl - Delve Level 4', delve_4, [screenshot.url], description))
-      ids.append(self.backendClient.submitContribution(self.discordUserRSNs[interaction.user.name], 'Doom of Mokhaiotl - Delve Level 5', delve_5, [screenshot.url], description))
-      ids.append(self.backendClient.submitContribution(self.discordUserRSNs[interaction.user.name], 'Doom of Mokhaiotl - Delve Level 6', delve_6, [screenshot.url], description))
-      ids.append(self.backendClient.submitContribution(self.discordUserRSNs[interaction.user.name], 'Doom of Mokhaiotl - Delve Level 7', delve_7, [screenshot.url], description))
-      ids.append(self.backendClient.submitContribution(self.discordUserRSNs[interaction.user.name], 'Doom of Mokhaiotl - Delve Level 8', delve_8, [screenshot.url], description))
-      ids.append(self.backendClient.submitContribution(self.discordUserRSNs[interaction.user.name], 'Doom of Mokhaiotl - Delve Level 8+', delve_8_plus, [screenshot.url], description))
-      submission = submissions.Submission(self, interaction, ids, description)
-      await self.sendSubmissionToQueue(submission)
-      responseText = '# Submission received:\n'
-      responseText += str(submission)
-      await interaction.response.send_message(responseText)
-    
-    @self.bot.tree.command(name='submit_team_speedrun', description='Submit your team speedruns for the competition! (Make sure to have precise timing enabled.)')
-    @app_commands.autocomplete(challenge=team_speedrun_autocomplete, rsn_1=player_autocomplete, rsn_2=player_autocomplete, rsn_3=player_autocomplete, rsn_4=player_autocomplete, rsn_5=player_autocomplete)
-    async def submit_team_speedrun(interaction: Interaction, screenshot: Attachment, minutes: int, seconds: int, tenths_of_seconds: int, challenge: str, rsn_1: str, rsn_2: Optional[str], rsn_3: Optional[str], rsn_4: Optional[str], rsn_5: Optional[str]):
-      await self.submissionPreChecks(interaction)
-      if(minutes < 0 or seconds < 0 or tenths_of_seconds < 0):
-        raise errors.UserError('Times cannot be negative')
-      if(tenths_of_seconds > 9):
-        raise errors.UserError('tenths_of_seconds cannot be greater than 9')
-      finalSeconds = (minutes * 60) + seconds + (tenths_of_seconds * 0.1)
-      description = '{0} time of {1:0>2}:{2:0>2}.{3}'.format(challenge, minutes, seconds, tenths_of_seconds)
-      ids = [self.backendClient.submitSpeedChallenge(rsn_1, challenge, finalSeconds, [screenshot.url], description)]
-      if(rsn_2 is not None):
-        ids.append(self.backendClient.submitSpeedChallenge(rsn_2, challenge, finalSeconds, [screenshot.url], description))
-      if(rsn_3 is not None):
-        ids.append(self.backendClient.submitSpeedChallenge(rsn_3, challenge, finalSeconds, [screenshot.url], description))
-      if(rsn_4 is not None):
-        ids.append(self.backendClient.submitSpeedChallenge(rsn_4, challenge, finalSeconds, [screenshot.url], description))
-      if(rsn_5 is not None):
-        ids.append(self.backendClient.submitSpeedChallenge(rsn_5, challenge, finalSeconds, [screenshot.url], description))
-      submission = submissions.Submission(self, interaction, ids, description)
-      await self.sendSubmissionToQueue(submission)
-      responseText = '# Submission received:\n'
-      responseText += str(submission)
-      await interaction.response.send_message(responseText)
-
-    @self.bot.tree.command(name='submit_relay_time', description='Submit your relay times for the competition! (Make sure to have precise timing enabled.)')
-    @app_commands.autocomplete(challenge=relay_autocomplete)
-    async def submit_relay_time(interaction: Interaction, screenshot: Attachment, minutes: int, seconds: int, tenths_of_seconds: int, challenge: str):
-      await self.submissionPreChecks(interaction)
-      if(minutes < 0 or seconds < 0 or tenths_of_seconds < 0):
-        raise errors.UserError('Times cannot be negative')
-      if(tenths_of_seconds > 9):
-        raise errors.UserError('tenths_of_seconds cannot be greater than 9')
-      finalSeconds = (minutes * 60) + seconds + (tenths_of_seconds * 0.1)
-      challengeName = challenge.split('|')[0]
-      if(challenge.split('|')[1] != 'None'):
-        challengeName += ' - ' + challenge.split('|')[1]
-      description = '{0} time of {1:0>2}:{2:0>2}.{3}'.format(challengeName, minutes, seconds, tenths_of_seconds)
-      ids = [self.backendClient.submitSpeedChallenge(self.discordUserRSNs[interaction.user.name], challenge, finalSeconds, [screenshot.url], description)]
-      submission = submissions.Submission(self, interaction, ids, description)
-      await self.sendSubmissionToQueue(submission)
-      responseText = '# Submission received:\n'
-      responseText += str(submission)
-      await interaction.response.send_message(responseText)
-
-    @self.bot.tree.command(name='submit_point_challenge', description='Submit your point-based challenge entry for the competition!')
-    @app_commands.autocomplete(challenge=point_challenge_autocomplete, rsn_1=player_autocomplete, rsn_2=player_autocomplete, rsn_3=player_autocomplete, rsn_4=player_autocomplete, rsn_5=player_autocomplete)
-    async def submit_point_challenge(interaction: Interaction, screenshot: Attachment, points: int, challenge: str, rsn_1: str, rsn_2: Optional[str], rsn_3: Optional[str], rsn_4: Optional[str], rsn_5: Optional[str]):
-      await self.submissionPreChecks(interaction)
-      if(points < 0):
-        raise errors.UserError('Points cannot be negative')
-      description = '{0} entry of {1}'.format(challenge, points)
-      ids = [self.backendClient.submitPointChallenge(rsn_1, challenge, points, [screenshot.url], description)]
-      if(rsn_2 is not None):
-        ids.append(self.backendClient.submitPointChallenge(rsn_2, challenge, points, [screenshot.url], description))
-      if(rsn_3 is not None):
-        ids.append(self.backendClient.submitPointChallenge(rsn_3, challenge, points, [screenshot.url], description))
-      if(rsn_4 is not None):
-        ids.append(self.backendClient.submitPointChallenge(rsn_4, challenge, points, [screenshot.url], description))
-      if(rsn_5 is not None):
-        ids.append(self.backendClient.submitPointChallenge(rsn_5, challenge, points, [screenshot.url], description))
-      submission = submissions.Submission(self, interaction, ids, description)
-      await self.sendSubmissionToQueue(submission)
-      responseText = '# Submission received:\n'
-      responseText += str(submission)
-      await interaction.response.send_message(responseText)
-
-    @self.bot.tree.command(name='submit_record', description='Submit your record values for the competition!')
-    @app_commands.autocomplete(record=record_autocomplete)
-    async def submit_record(interaction: Interaction, video_url: str, value: int, record: str):
-      await self.submissionPreChecks(interaction)
-      if(value < 0):
-        raise errors.UserError('Value cannot be negative')
-      description = 'Record of {0} XP in {1}'.format(value, record.split('|')[0])
-      if(record.split('|')[1] != 'None'):
-        description += ' with handicap ' + record.split('|')[1]
-      ids = [self.backendClient.submitRecord(self.discordUserRSNs[interaction.user.name], record, value, video_url, description)]
-      submission = submissions.Submission(self, interaction, ids, description)
-      await self.sendSubmissionToQueue(submission)
-      responseText = '# Submission received:\n'
-      responseText += str(submission)
-      await interaction.response.send_message(responseText)
-
-    @self.bot.tree.command(name='submit_item_drops', description='Submit an item drop from an activity!')
-    @app_commands.autocomplete(item_type=item_drop_autocomplete)
-    async def submit_item_drops(interaction: Interaction, screenshot: Attachment, item_type: str):
-      await self.submissionPreChecks(interaction)
-      description = 'Item drop for {0}'.format(item_type)
-      ids = [self.backendClient.submitContributionIncrement(self.discordUserRSNs[interaction.user.name], item_type, 1, [screenshot.url], description)]
-      submission = submissions.Submission(self, interaction, ids, description)
-      await self.sendSubmissionToQueue(submission)
-      responseText = '# Submission received:\n'
-      responseText += str(submission)
-      await interaction.response.send_message(responseText)
-
-    @self.bot.tree.command(name='submit_minigame_purchase', description='Submit an item purchase for a minigame!')
-    @app_commands.autocomplete(item_name=purchase_item_autocomplete)
-    async def submit_item_drops(interaction: Interaction, before_screenshot: Attachment, after_screenshot: Attachment, item_name: str, quantity: int):
-      await self.submissionPreChecks(interaction)
-      if(quantity < 1):
-        raise errors.UserError('Quantity cannot be 0 or negative')
-      description = 'Purchase of {0} {1}'.format(quantity, item_name)
-      ids = []
-      for item in self.purchaseItems:
-        if(item['name'] == item_name):
-          totalCost = quantity * item['cost']
-          ids.append(self.backendClient.submitContributionPurchase(self.discordUserRSNs[interaction.user.name], item['methodName'], totalCost, [before_screenshot.url, after_screenshot.url], description))
-      submission = submissions.Submission(self, interaction, ids, description)
-      await self.sendSubmissionToQueue(submission)
-      responseText = '# Submission received:\n'
-      responseText += str(submission)
-      await interaction.response.send_message(responseText)
-
   '''
   Registers an error handler callback to the bot
   '''
@@ -900,133 +579,185 @@ class ShowdownBot:
     @self.bot.tree.error
     async def handleCommandErrors(interaction, error):
       if(isinstance(error.original, errors.UserError)):
-        await interaction.response.send_message(f'Error: {str(error.original)}')
+        interaction.extras['status'] = 'user_error'
+        await respond(interaction, f'Error: {str(error.original)}')
       else:
+        interaction.extras['status'] = 'error'
         log.error('Error', exc_info=error)
-        submission = submissions.Submission(self, interaction)
-        await self.sendErrorMessageToErrorChannel(interaction, submission, error)
+        await self.reportError(interaction, error)
 
   '''
-  Registers an interaction hook callback to the bot
+  Registers listeners that track whether the bot is connected to the Discord gateway, for the readiness check
   '''
-  def registerInteractionHook(self):
-    log.info('Registering interaction hook...')
-    @self.bot.event
-    async def on_interaction(interaction):
-      data = interaction.data
-      if(interaction.type == InteractionType.component and data['component_type'] == 2): # This is a button click interaction
-        if(not self.competitionLoaded):
-          await interaction.response.send_message('Event not loaded')
-          return
-        # Parse the Submission out of the message contents
-        message = interaction.message.content
-        submissionJson = None
-        for line in message.splitlines():
-          if(line.startswith('Submission json: `')): # This is the line that has our json on it
-            submissionJson = line.replace('Submission json: ', '').replace('`', '')
-            break
-        if(submissionJson == None):
-          return # Not a submission message
-        if(data['custom_id'] == 'approve'): # User has clicked the "Approve" button
+  def registerConnectionHooks(self):
+    log.info('Registering connection hooks...')
+    async def connected():
+      self.gatewayConnected = True
+    async def disconnected():
+      self.gatewayConnected = False
+    self.bot.add_listener(connected, 'on_connect')
+    self.bot.add_listener(connected, 'on_resumed')
+    self.bot.add_listener(disconnected, 'on_disconnect')
 
-          # Make sure the user is a screenshot approver
-          try:
-            await self.checkForScreenshotApprover(interaction)
-          except errors.UserError as error:
-            log.error('Error', exc_info=error)
-            await interaction.response.send_message(f'Error: {interaction.user.display_name} tried to approve this submission but is not a screenshot approver')
-            return
-          
-          # Log the approval
-          submission = submissions.fromJson(submissionJson, self)
-          log.info('Submission approved by ' + interaction.user.name + ':\n' + submissionJson)
-
-          # Send the approval to the backend
-          for id in submission.ids:
-            response = self.backendClient.approveSubmission(id, interaction.user.display_name)
+  '''
+  Liveness check for the process supervisor: fails if the event loop hasn't run its heartbeat for livenessTimeout
+  seconds. Called on the status server thread.
+  '''
+  def liveness(self):
+    sinceHeartbeat = self.watchdog.sinceHeartbeat()
+    if(sinceHeartbeat is not None and sinceHeartbeat > self.livenessTimeout):
+      return 503, 'text/plain; charset=utf-8', f'Event loop has been blocked for {sinceHeartbeat:.1f}s\n'
+    return 200, 'text/plain; charset=utf-8', 'OK\n'
 
-          # Delete the submission message and any replies (which could exist because of error messages)
-          submissionQueueChannel = self.bot.get_channel(self.submissionQueueChannelId)
-          async for message in submissionQueueChannel.history(limit=None):
-            if(message.reference and message.reference.message_id == interaction.message.id): # The message we're looking at is a reply to the submission message
-              await message.delete()
-          await interaction.message.delete()
+  '''
+  Returns the readiness checks: whether startup finished, the gateway is connected, competition info is loaded and the
+  backend circuit is closed
+  '''
+  def readinessChecks(self):
+    return {
+      'startupComplete': self.startupComplete,
+      'gatewayConnected': self.gatewayConnected,
+      'competitionLoaded': self.competitionLoaded,
+      'backendCircuitClosed': not self.backendClient.circuitOpen()
+    }
 
-          # Send a message to the submission log
-          submissionLogChannel = self.bot.get_channel(self.submissionLogChannelId)
-          view = ui.View()
-          view.add_item(ui.Button(style=ButtonStyle.grey, custom_id='undo', label='Undo'))
-          await submissionLogChannel.send(f'# Submission approved by {interaction.user.display_name}:\n' + str(submission), view=view)
+  '''
+  Readiness check for the process supervisor: fails, listing the failing checks, unless the bot can serve commands.
+  Called on the status server thread.
+  '''
+  def readiness(self):
+    failing = [name for name, passed in self.readinessChecks().items() if not passed]
+    if(len(failing) > 0):
+      return 503, 'text/plain; charset=utf-8', 'Not ready: ' + ', '.join(failing) + '\n'
+    return 200, 'text/plain; charset=utf-8', 'OK\n'
 
-          # Send a message to the player's team submission channel
-          submissionsChannel = self.teamSubmissionChannels[submission.team]
-          await submissionsChannel.send(f'<@{submission.user.id}> Your {submission.shortDesc} has been approved by {interaction.user.display_name}')
-          
-        elif(data['custom_id'] == 'deny'): # User has clicked the "Deny" button
+  '''
+  JSON status page: the readiness checks and the state an operator looks at first. Called on the status server thread,
+  so it must only read state (e.g. the dispatcher's unclaimedCount() leaves expired leases to the event loop).
+  '''
+  def status(self):
+    checks = self.readinessChecks()
+    competitionInfoAge = self.competitionInfoAge()
+    sinceHeartbeat = self.watchdog.sinceHeartbeat()
+    status = {
+      'ready': all(checks.values()),
+      'checks': checks,
+      'eventLoopSinceHeartbeatSeconds': None if sinceHeartbeat is None else round(sinceHeartbeat, 3),
+      'competitionInfoAgeSeconds': None if math.isnan(competitionInfoAge) else round(competitionInfoAge, 1),
+      'submissionQueueDepth': {shard.name: shard.depth for shard in self.submissionQueue.shards},
+      'submissionsUnclaimed': self.dispatcher.unclaimedCount(),
+      'backendInFlight': self.backendClient.inFlight,
+      'backendConsecutiveFailures': self.backendClient.consecutiveFailures,
+      'lastSubmissionAt': datetime.fromtimestamp(self.lastSubmissionAt).astimezone().isoformat(timespec='seconds') if self.lastSubmissionAt else None
+    }
+    return 200, 'application/json', json.dumps(status, indent=2) + '\n'
 
-          # Make sure the user is a screenshot approver
-          try:
-            await self.checkForScreenshotApprover(interaction)
-          except errors.UserError as error:
-            log.error('Error', exc_info=error)
-            await interaction.response.send_message(f'Error: {interaction.user.display_name} tried to deny this submission but is not a screenshot approver')
-            return
-          
-          # Log the denial
-          submission = submissions.fromJson(submissionJson, self)
-          log.info('Submission denied by ' + interaction.user.name + ':\n' + submissionJson)
+  '''
+  Registers hooks that keep the channel index current as channels are created, deleted and renamed
+  '''
+  def registerChannelHooks(self):
+    log.info('Registering channel hooks...')
+    @self.bot.event
+    async def on_guild_channel_create(channel):
+      if(channel.guild.id == self.guildId):
+        self.channelIndex.add(channel)
 
-          # Send the denial to the backend
-          for id in submission.ids:
-            response = self.backendClient.denySubmission(id, interaction.user.display_name)
+    @self.bot.event
+    async def on_guild_channel_delete(channel):
+      if(channel.guild.id == self.guildId):
+        self.channelIndex.remove(channel)
 
-          # Delete the submission message and any replies (which could exist because of error messages)
-          submissionQueueChannel = self.bot.get_channel(self.submissionQueueChannelId)
-          async for message in submissionQueueChannel.history(limit=None):
-            if(message.reference and message.reference.message_id == interaction.message.id): # The message we're looking at is a reply to the submission message
-              await message.delete()
-          await interaction.message.delete()
+    @self.bot.event
+    async def on_guild_channel_update(before, after):
+      if(after.guild.id == self.guildId and before.name != after.name):
+        self.channelIndex.update(before, after)
 
-          # Send a message to the submission log
-          submissionLogChannel = self.bot.get_channel(self.submissionLogChannelId)
-          view = ui.View()
-          view.add_item(ui.Button(style=ButtonStyle.grey, custom_id='undo', label='Undo'))
-          await submissionLogChannel.send(f'# Submission denied by {interaction.user.display_name}:\n' + str(submission), view=view)
+  '''
+  Registers a message hook that indexes replies to submissions in the submission queue, so that they can be deleted
+  along with the submission
+  '''
+  def registerMessageHook(self):
+    log.info('Registering message hook...')
+    async def indexQueueReply(message):
+      if(message.reference is None):
+        return
+      shard = self.submissionQueue.shardForChannel(message.channel.id)
+      if(shard is not None):
+        shard.addReply(message.reference.message_id, message.id)
+    self.bot.add_listener(indexQueueReply, 'on_message') # A listener rather than an event, so the commands extension still gets on_message
 
-          # Send a message to the player's team submission channel
-          submissionsChannel = self.teamSubmissionChannels[submission.team]
-          await submissionsChannel.send(f'<@{submission.user.id}> Your {submission.shortDesc} has been denied by {interaction.user.display_name}')
+  '''
+  Registers hooks that keep the roster index current as members join the server and change their username
+  '''
+  def registerMemberHooks(self):
+    log.info('Registering member hooks...')
+    @self.bot.event
+    async def on_member_join(member):
+      if(member.guild.id == self.guildId and self.roster.resolve(member)):
+        log.info(f'Player {self.roster.rsns[member.id]} joined the server as {member.name}')
 
-        elif(data['custom_id'] == 'undo'): # User has clicked the "Undo" button in the submission log
+    @self.bot.event
+    async def on_member_update(before, after):
+      if(after.guild.id == self.guildId and before.name != after.name):
+        self.noteRename(after)
 
-          # Make sure the user is a screenshot approver
-          try:
-            await self.checkForScreenshotApprover(interaction)
-          except errors.UserError as error:
-            log.error('Error', exc_info=error)
-            await interaction.response.send_message(f'Error: {interaction.user.display_name} tried to undo this decision but is not a screenshot approver')
-            return
-          
-          # Log the undo
-          submission = submissions.fromJson(submissionJson, self)
-          log.info('Submission undone by ' + interaction.user.name + ':\n' + submissionJson)
+    @self.bot.event
+    async def on_user_update(before, after): # Username changes are user updates rather than member updates
+      if(before.name != after.name):
+        self.noteRename(after)
 
-          # Send the undo to the backend
-          for id in submission.ids:
-            response = self.backendClient.undoDecision(id)
+  '''
+  Records a player's username change, to be pushed to the backend by the next Discord name sync
+  '''
+  def noteRename(self, user):
+    oldName = self.roster.discordNames.get(user.id)
+    if(self.roster.rename(user)):
+      log.info(f'Player {self.roster.rsns[user.id]} changed their Discord name from {oldName} to {user.name}')
 
-          # Delete the submission message and any replies (which could exist because of error messages)
-          submissionQueueChannel = self.bot.get_channel(self.submissionQueueChannelId)
-          async for message in submissionQueueChannel.history(limit=None):
-            if(message.reference and message.reference.message_id == interaction.message.id): # The message we're looking at is a reply to the submission message
-              await message.delete()
-          await interaction.message.delete()
+  '''
+  Periodically pushes the Discord name changes recorded since the last sync to the backend. The backend calls block, so
+  they run on a worker thread; the name lists are only updated back on the event loop.
+  '''
+  async def syncDiscordNames(self):
+    while(True):
+      await asyncio.sleep(self.discordNameSyncInterval)
+      renames = self.roster.takePendingRenames()
+      if(len(renames) == 0):
+        continue
+      failed = []
+      for userId, oldName, newName in renames:
+        try:
+          await asyncio.to_thread(self.backendClient.changePlayerDiscordName, oldName, newName)
+        except Exception as e:
+          log.warning(f'Failed to change Discord name {oldName} to {newName} in the backend: {e}')
+          failed.append((userId, oldName, newName))
+          continue
+        if(oldName in self.discordNames):
+          self.discordNames[self.discordNames.index(oldName)] = newName
+        self.catalog.discordNames = self.catalog.discordNames - {oldName} | {newName}
+      self.discordNames.sort()
+      self.roster.restorePendingRenames(failed)
+      log.info(f'Pushed {len(renames) - len(failed)} Discord name changes to the backend ({len(failed)} failed)')
 
-          # Send the submission back to the queue
-          await self.sendSubmissionToQueue(submission)
+  '''
+  Loads the command cogs (called by the bot before it connects)
+  '''
+  async def loadExtensions(self):
+    for extension in cogs.EXTENSIONS:
+      await self.bot.load_extension(extension)
+    log.info(f'Loaded {len(cogs.EXTENSIONS)} command extensions')
 
-        else: # Something unexpected
-          pass
+  '''
+  Reloads command cogs from disk without reconnecting to the gateway, then syncs any commands that changed. The shared
+  autocomplete module is reloaded first so that the reloaded cogs pick up its changes.
+  '''
+  async def reloadExtensions(self, extensions = cogs.EXTENSIONS):
+    importlib.reload(autocomplete)
+    for extension in extensions:
+      log.info(f'Reloading {extension}...')
+      await self.bot.reload_extension(extension) # Rolls back to the loaded version if the new one fails to import
+    if(self.commandSyncEnabled):
+      await commandsync.syncChangedCommands(self.bot.tree, self.commandSyncStateFile)
 
   '''
   Registers a ready hook callback to the bot
@@ -1036,6 +767,7 @@ class ShowdownBot:
     @self.bot.event
     async def on_ready():
       log.info(f'Logged in as {self.bot.user.name}')
+      self.watchdog.start()
 
       if(commandLineArgs.clearcommands):
         log.info('Clearing commands...')
@@ -1044,20 +776,44 @@ class ShowdownBot:
         self.bot.tree.clear_commands(guild=guild)
         await self.bot.tree.sync(guild=None)
         await self.bot.tree.sync(guild=guild)
+        commandsync.clearHashes(self.commandSyncStateFile)
         log.info('Commands cleared')
+        logsetup.stopLogging()
         os._exit(0)
       if(commandLineArgs.updatecommands):
         log.info('Updating commands...')
-        synced = await self.bot.tree.sync()
+        synced = await commandsync.fullSync(self.bot.tree, self.commandSyncStateFile)
         log.info(f'Synced {len(synced)} commands.')
+        logsetup.stopLogging()
         os._exit(0)
+      if(self.commandSyncEnabled):
+        await commandsync.syncChangedCommands(self.bot.tree, self.commandSyncStateFile)
           
+      self.channelIndex.rebuild(self.bot.get_guild(self.guildId).channels) # The channel cache is rebuilt on every connect
       await self.loadCompetitionInfo()
-
+      await self.countQueuedSubmissions()
+      if(self.discordNameSyncTask is None):
+        self.discordNameSyncTask = asyncio.create_task(self.syncDiscordNames(), name='ShowdownBot-syncDiscordNames')
+      if(self.errorDigestTask is None):
+        self.errorDigestTask = asyncio.create_task(self.errorAggregator.run(), name='ShowdownBot-errorDigest')
+      if(self.attachmentMirror is not None):
+        self.attachmentMirror.start()
+      if(self.autoApproval is not None and self.autoApprovalTask is None):
+        await self.requeueInterruptedAutoApprovals()
+        self.autoApprovalTask = asyncio.create_task(self.autoApproval.run(), name='ShowdownBot-autoApproval')
+
+      self.startupComplete = True
       log.info('Startup complete, ready to accept commands!')
   
   '''
   Connects the bot to the server to begin accepting commands
   '''
   def start(self):
+    if(self.monitoringPort is not None):
+      self.statusServer = StatusServer(self.monitoringHost, self.monitoringPort)
+      self.statusServer.addRoute('/metrics', lambda: (200, 'text/plain; version=0.0.4; charset=utf-8', self.metrics.render()))
+      self.statusServer.addRoute('/healthz', self.liveness)
+      self.statusServer.addRoute('/readyz', self.readiness)
+      self.statusServer.addRoute('/status', self.status)
+      self.statusServer.start()
     self.bot.run(self.token)
\ No newline at end of file
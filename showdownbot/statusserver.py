@@ -0,0 +1,66 @@
+import logging
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+log = logging.getLogger('showdown')
+
+# Small local HTTP server for monitoring endpoints. It runs on its own thread so that it keeps answering even when
+# the bot's event loop is busy or blocked.
+
+class StatusServer():
+
+  def __init__(self, host, port):
+    self.host = host
+    self.port = port
+    self.routes = {}
+    self.server = None
+    self.thread = None
+
+  '''
+  Registers a handler for a path. The handler takes no arguments and returns a (statusCode, contentType, body) tuple.
+  '''
+  def addRoute(self, path, handler):
+    self.routes[path] = handler
+
+  '''
+  Starts serving requests on a daemon thread
+  '''
+  def start(self):
+    routes = self.routes
+
+    class RequestHandler(BaseHTTPRequestHandler):
+
+      def do_GET(self):
+        handler = routes.get(self.path.split('?')[0])
+        if(handler is None):
+          self.sendResponse(404, 'text/plain; charset=utf-8', 'Not found\n')
+          return
+        try:
+          statusCode, contentType, body = handler()
+        except Exception as e:
+          log.error('Error serving ' + self.path, exc_info=e)
+          statusCode, contentType, body = 500, 'text/plain; charset=utf-8', 'Internal error\n'
+        self.sendResponse(statusCode, contentType, body)
+
+      def sendResponse(self, statusCode, contentType, body):
+        encodedBody = body.encode('utf-8')
+        self.send_response(statusCode)
+        self.send_header('Content-Type', contentType)
+        self.send_header('Content-Length', str(len(encodedBody)))
+        self.end_headers()
+        self.wfile.write(encodedBody)
+
+      def log_message(self, format, *args):
+        pass # Scrapes happen every few seconds, don't flood the log with them
+
+    self.server = ThreadingHTTPServer((self.host, self.port), RequestHandler)
+    self.server.daemon_threads = True
+    self.thread = threading.Thread(target=self.server.serve_forever, name='StatusServer', daemon=True)
+    self.thread.start()
+    log.info(f'Status server listening on http://{self.host}:{self.server.server_address[1]}')
+
+  def stop(self):
+    if(self.server):
+      self.server.shutdown()
+      self.server.server_close()
+      self.server = None
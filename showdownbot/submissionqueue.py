@@ -0,0 +1,92 @@
+import itertools
+import logging
+import zlib
+
+log = logging.getLogger('showdown')
+
+# Submission type of each submit command, used by the "type" routing; anything not listed here is "other"
+COMMAND_CATEGORIES = {
+  'submit_collection_log': 'clog',
+  'submit_monster_killcount': 'kc',
+  'submit_record': 'records',
+  'submit_team_speedrun': 'speedruns',
+  'submit_relay_time': 'speedruns',
+  'submit_point_challenge': 'challenges'
+}
+
+ROUTINGS = ('type', 'team', 'roundrobin')
+
+'''
+Returns the submission type of a submit command
+'''
+def commandCategory(commandName):
+  return COMMAND_CATEGORIES.get(commandName, 'other')
+
+'''
+Parses a list of shards from config, in the format "name:channelId, name:channelId, ..."
+'''
+def parseShards(text):
+  shards = []
+  for entry in text.split(','):
+    if(entry.strip() == ''):
+      continue
+    name, channelId = entry.split(':')
+    shards.append(QueueShard(name.strip(), int(channelId)))
+  return shards
+
+# One channel of the submission queue, with the number of submissions waiting in it and the replies to each of them
+class QueueShard():
+
+  def __init__(self, name, channelId):
+    self.name = name
+    self.channelId = channelId
+    self.depth = 0
+    self.replies = {} # Submission message ID -> IDs of the messages replying to it
+
+  def addReply(self, messageId, replyId):
+    self.replies.setdefault(messageId, []).append(replyId)
+
+  '''
+  Removes and returns the IDs of the replies to a submission message
+  '''
+  def takeReplies(self, messageId):
+    return self.replies.pop(messageId, [])
+
+'''
+The submission queue, split across one or more review channels (shards). New submissions are routed to a shard by
+submission type, by team, or round-robin; decisions find the shard a submission is in from the channel of its message.
+'''
+class SubmissionQueue():
+
+  def __init__(self, shards, routing = 'type'):
+    if(len(shards) == 0):
+      raise Exception('The submission queue needs at least one channel')
+    if(routing not in ROUTINGS):
+      raise Exception(f'Unknown submission queue routing "{routing}", expected one of: {', '.join(ROUTINGS)}')
+    self.shards = shards
+    self.routing = routing
+    self.shardsByName = {shard.name: shard for shard in shards}
+    self.shardsByChannel = {shard.channelId: shard for shard in shards}
+    self.defaultShard = self.shardsByName.get('default', shards[0])
+    self.nextShard = itertools.cycle(shards)
+
+  '''
+  Picks the shard a new submission goes to
+  '''
+  def route(self, submission):
+    if(len(self.shards) == 1):
+      return self.shards[0]
+    if(self.routing == 'type'):
+      return self.shardsByName.get(commandCategory(submission.commandName), self.defaultShard)
+    if(self.routing == 'team'): # Stable across restarts, so a team's submissions always land in the same channel
+      return self.shards[zlib.crc32(submission.team.encode('utf-8')) % len(self.shards)]
+    return next(self.nextShard)
+
+  '''
+  Returns the shard with the given channel, or None if the channel isn't part of the queue
+  '''
+  def shardForChannel(self, channelId):
+    return self.shardsByChannel.get(channelId)
+
+  def totalDepth(self):
+    return sum(shard.depth for shard in self.shards)
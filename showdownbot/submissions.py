@@ -1,6 +1,6 @@
 import logging
 import json
-from discord import Interaction
+from discord import Interaction, Embed, Colour
 
 '''
 Serializes a Submission to a json string
@@ -8,13 +8,14 @@ Serializes a Submission to a json string
 def toJson(submission):
   jsonObject = {}
   jsonObject['user'] = submission.user.name
+  jsonObject['userId'] = submission.user.id
   jsonObject['rsn'] = submission.rsn
   jsonObject['team'] = submission.team
   jsonObject['commandName'] = submission.commandName
   jsonObject['params'] = submission.params
   jsonObject['shortDesc'] = submission.shortDesc
   jsonObject['ids'] = submission.ids
-  return json.dumps(jsonObject)
+  return json.dumps(jsonObject, separators=(',', ':'))
 
 '''
 Deserializes a Submission from a json string
@@ -22,7 +23,10 @@ Deserializes a Submission from a json string
 def fromJson(jsonString, showdownBot):
   jsonObject = json.loads(jsonString)
   guild = showdownBot.bot.get_guild(showdownBot.guildId)
-  user = guild.get_member_named(jsonObject['user'])
+  if('userId' in jsonObject):
+    user = guild.get_member(jsonObject['userId'])
+  else: # Submissions queued before user IDs were included
+    user = guild.get_member_named(jsonObject['user'])
   return Submission(
     showdownBot = showdownBot,
     user = user,
@@ -41,8 +45,8 @@ class Submission():
       self.showdownBot = showdownBot
       self.ids = ids
       self.user = interaction.user
-      self.rsn = self.showdownBot.discordUserRSNs[self.user.name]
-      self.team = self.showdownBot.discordUserTeams[self.user.name]
+      self.rsn = self.showdownBot.roster.rsns[self.user.id]
+      self.team = self.showdownBot.roster.teams[self.user.id]
       self.commandName = interaction.command.name
       self.params = {}
       self.shortDesc = shortDesc
@@ -60,15 +64,80 @@ class Submission():
       self.commandName = commandName
       self.params = params
       self.shortDesc = shortDesc
+    self.views = {} # View name -> rendered view, built on first use (a submission doesn't change once created)
+    self.flags = [] # Warnings for reviewers, shown under the header of the queue message
 
   def __str__(self):
-    submissionText = 'IDs: ' + str(self.ids) + '\n'
-    submissionText += 'RSN: ' + self.rsn + '\n'
-    submissionText += 'Team: ' + self.team + '\n'
-    submissionText += 'Command: /' + self.commandName
-    for paramName in self.params:
-      submissionText += '\n' + paramName + ': ' + self.params[paramName]
-    if('Record of' in self.shortDesc):
-      submissionText += '\n' + f'Temple link to verify record: https://templeosrs.com/player/updatetable.php?player={self.rsn.lower().replace(' ', '+')}'
-    submissionText += '\n' + 'Submission json: `' + toJson(self) + '`'
-    return submissionText
\ No newline at end of file
+    return self.view('queue')
+
+  '''
+  Returns one of the submission's rendered views, rendering it the first time it's asked for:
+  * "json": the compact json that the approve/deny/undo buttons recover the submission from
+  * "queue": the text used in the queue and log messages (and the log file), ending with the json
+  * "player": the text of the confirmation sent to the player, without the json
+  * "embed": an Embed with the same details as the player view
+  '''
+  def view(self, name):
+    rendered = self.views.get(name)
+    if(rendered is None):
+      with self.showdownBot.tracer.span('Submission.render', view=name):
+        rendered = self.views[name] = getattr(self, 'render' + name.capitalize())()
+    return rendered
+
+  def renderJson(self):
+    return toJson(self)
+
+  def renderQueue(self):
+    return self.view('player') + '\nSubmission json: `' + self.view('json') + '`'
+
+  def renderPlayer(self):
+    lines = ['IDs: ' + str(self.ids), 'RSN: ' + self.rsn, 'Team: ' + self.team, 'Command: /' + self.commandName]
+    lines.extend(paramName + ': ' + value for paramName, value in self.params.items())
+    if(self.templeLink()):
+      lines.append('Temple link to verify record: ' + self.templeLink())
+    return '\n'.join(lines)
+
+  def renderEmbed(self):
+    embed = Embed(title=self.shortDesc or '/' + self.commandName, colour=Colour.blurple())
+    embed.add_field(name='RSN', value=self.rsn)
+    embed.add_field(name='Team', value=self.team)
+    embed.add_field(name='Command', value='/' + self.commandName)
+    for paramName, value in self.params.items():
+      if('screenshot' in paramName.lower()):
+        if(embed.image.url is None): # Show the first screenshot in the embed, and link to all of them by file name
+          embed.set_image(url=value)
+        embed.add_field(name=paramName, value=f'[{value.rsplit('/', 1)[-1].split('?')[0]}]({value})', inline=False)
+      else:
+        embed.add_field(name=paramName, value=value[:1024] if value.strip() else '-') # Discord rejects empty field values
+    if(self.templeLink()):
+      embed.add_field(name='Verify record', value=f'[Temple]({self.templeLink()})', inline=False)
+    embed.set_footer(text='IDs: ' + str(self.ids))
+    return embed
+
+  def templeLink(self):
+    if(self.shortDesc and 'Record of' in self.shortDesc):
+      return f'https://templeosrs.com/player/updatetable.php?player={self.rsn.lower().replace(' ', '+')}'
+    return None
+
+  '''
+  Builds a message showing the submission under a header, returning the keyword arguments to pass to send() or
+  send_message(). The "queue" and "log" messages carry the json that their buttons need; the "player" message doesn't.
+  If submission embeds are enabled, the details go in an embed and only the header (and json) are sent as text.
+  '''
+  def message(self, header, kind):
+    withJson = kind != 'player'
+    if(kind == 'queue' and len(self.flags) > 0):
+      header += '\n' + '\n'.join(self.flags)
+    if(self.showdownBot.submissionEmbeds):
+      content = header
+      if(withJson):
+        content += '\nSubmission json: `' + self.view('json') + '`'
+      return {'content': content, 'embed': self.view('embed')}
+    return {'content': header + '\n' + self.view('queue' if withJson else 'player')}
+
+  '''
+  Describes the submission in one line, e.g. for error reports
+  '''
+  def summary(self):
+    params = ', '.join(f'{paramName}={value}' for paramName, value in self.params.items())
+    return f'{self.rsn} ({self.team}): /{self.commandName} {params}'
\ No newline at end of file
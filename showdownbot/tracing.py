@@ -0,0 +1,159 @@
+import contextvars
+import json
+import logging
+import queue
+import random
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+log = logging.getLogger('showdown')
+
+# The span that is currently open in this task (asyncio tasks each get their own copy of the context)
+currentSpan = contextvars.ContextVar('currentSpan', default=None)
+
+# A timed operation within a trace
+class Span():
+
+  def __init__(self, trace, name, parent, attributes):
+    self.trace = trace
+    self.spanId = uuid.uuid4().hex[:16]
+    self.name = name
+    self.parent = parent
+    self.attributes = attributes
+    self.children = []
+    self.start = time.perf_counter()
+    self.duration = None
+    self.status = 'success'
+
+  def setAttribute(self, name, value):
+    self.attributes[name] = value
+
+  '''
+  Spans still open when their trace is exported (e.g. in a task started while handling the interaction) have no
+  duration, and the status "open"
+  '''
+  def toDict(self):
+    if(self.duration is None):
+      duration = selfDuration = None
+    else:
+      duration = round(self.duration, 6)
+      selfDuration = round(max(0.0, self.duration - sum(child.duration or 0 for child in self.children)), 6)
+    return {
+      'spanId': self.spanId,
+      'parentId': self.parent.spanId if self.parent else None,
+      'name': self.name,
+      'offset': round(self.start - self.trace.root.start, 6),
+      'duration': duration,
+      'selfDuration': selfDuration,
+      'status': self.status if self.duration is not None else 'open',
+      'attributes': dict(self.attributes)
+    }
+
+# All of the spans recorded while handling a single interaction
+class Trace():
+
+  def __init__(self):
+    self.traceId = uuid.uuid4().hex
+    self.startedAt = time.time()
+    self.root = None
+    self.spans = []
+
+  def toDict(self):
+    return {
+      'traceId': self.traceId,
+      'name': self.root.name,
+      'startedAt': self.startedAt,
+      'duration': round(self.root.duration, 6),
+      'status': self.root.status,
+      'attributes': self.root.attributes,
+      'spans': [span.toDict() for span in self.spans]
+    }
+
+'''
+Records spans for each interaction and exports finished traces to a JSONL file.
+
+A trace is started once per interaction, in the command tree and the interaction hook. Spans opened inside it
+(prechecks, backend requests, rendering, Discord calls) become its children. When the root span closes, the trace is
+exported if it was slower than the slow threshold, or randomly at the sample rate otherwise.
+'''
+class Tracer():
+
+  def __init__(self, exportPath = None, slowThreshold = 1.0, sampleRate = 0.0):
+    self.exportPath = exportPath
+    self.slowThreshold = slowThreshold
+    self.sampleRate = sampleRate
+    self.enabled = exportPath is not None
+    self.exportQueue = queue.Queue()
+    if(self.enabled):
+      threading.Thread(target=self.exportWorker, name='TraceExporter', daemon=True).start()
+
+  '''
+  Context manager that starts a new trace around the block it wraps (or records a span, if a trace is already active)
+  '''
+  @contextmanager
+  def trace(self, name, **attributes):
+    with self.openSpan(name, attributes, True) as span:
+      yield span
+
+  '''
+  Context manager that records a span around the block it wraps, if a trace is active
+  '''
+  @contextmanager
+  def span(self, name, **attributes):
+    with self.openSpan(name, attributes, False) as span:
+      yield span
+
+  @contextmanager
+  def openSpan(self, name, attributes, startTrace):
+    parent = currentSpan.get()
+    if(not self.enabled or (parent is None and not startTrace)):
+      yield None
+      return
+    trace = parent.trace if parent else Trace()
+    span = Span(trace, name, parent, attributes)
+    if(parent):
+      parent.children.append(span)
+    else:
+      trace.root = span
+    trace.spans.append(span)
+    token = currentSpan.set(span)
+    try:
+      yield span
+    except BaseException as e:
+      span.status = 'error'
+      span.setAttribute('error', type(e).__name__)
+      raise
+    finally:
+      span.duration = time.perf_counter() - span.start
+      currentSpan.reset(token)
+      if(parent is None):
+        self.finishTrace(trace)
+
+  '''
+  Returns the ID of the active trace, or None if there isn't one
+  '''
+  def currentTraceId(self):
+    span = currentSpan.get()
+    return span.trace.traceId if span else None
+
+  '''
+  Queues a trace for export when its root span closes. It is converted to a dict here, on the event loop, since spans
+  that are still open can change while the exporter thread writes it.
+  '''
+  def finishTrace(self, trace):
+    if(trace.root.duration >= self.slowThreshold or random.random() < self.sampleRate):
+      self.exportQueue.put(trace.toDict())
+
+  '''
+  Runs on the exporter thread, so that writing traces never blocks the event loop
+  '''
+  def exportWorker(self):
+    while True:
+      trace = self.exportQueue.get()
+      try:
+        with open(self.exportPath, 'a', encoding='utf-8') as exportFile:
+          exportFile.write(json.dumps(trace) + '\n')
+      except Exception as e:
+        log.error('Failed to export trace', exc_info=e)
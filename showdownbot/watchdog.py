@@ -0,0 +1,160 @@
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+
+log = logging.getLogger('showdown')
+
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Modules that wrap every handler, which are never the interesting part of a stack
+INFRASTRUCTURE_FILES = {'watchdog.py', 'commandtree.py', 'metrics.py', 'tracing.py'}
+
+'''
+Returns the stack of the given thread as a list of frames, outermost first
+'''
+def threadStack(threadId):
+  frame = sys._current_frames().get(threadId)
+  stack = []
+  while frame is not None:
+    stack.append(frame)
+    frame = frame.f_back
+  stack.reverse()
+  return stack
+
+'''
+Helper method to check if a frame is running code from this package (excluding the infrastructure modules)
+'''
+def isOwnFrame(frame):
+  filename = os.path.abspath(frame.f_code.co_filename)
+  return filename.startswith(PACKAGE_DIR) and os.path.basename(filename) not in INFRASTRUCTURE_FILES
+
+'''
+Describes a frame as "qualified.name (file.py:line)"
+'''
+def describeFrame(frame):
+  return f'{frame.f_code.co_qualname} ({os.path.basename(frame.f_code.co_filename)}:{frame.f_lineno})'
+
+'''
+Finds the code responsible for a stack: the outermost frame from this package (usually the command or event handler)
+and the innermost one (e.g. the BackendClient method that is doing blocking I/O)
+'''
+def findCulprit(stack):
+  ownFrames = [frame for frame in stack if isOwnFrame(frame)]
+  if(len(ownFrames) == 0):
+    if(len(stack) == 0):
+      return None, None
+    return None, describeFrame(stack[-1])
+  return describeFrame(ownFrames[0]), describeFrame(ownFrames[-1])
+
+# Represents a single period during which the event loop did not run
+class Stall():
+
+  def __init__(self, startedAt, handler, blockingFrame, stackText):
+    self.startedAt = startedAt
+    self.handler = handler
+    self.blockingFrame = blockingFrame
+    self.stackText = stackText
+    self.duration = None
+
+  def culprit(self):
+    if(self.handler and self.handler != self.blockingFrame):
+      return f'{self.blockingFrame} called from {self.handler}'
+    return str(self.blockingFrame)
+
+'''
+Measures event loop lag continuously, and captures the stack of whatever is blocking the loop when it stalls for
+longer than a threshold.
+
+A coroutine on the loop records a heartbeat at a fixed interval (the lag is how late each heartbeat is), and a separate
+thread watches the heartbeat. Because that thread keeps running while the loop is blocked, it can take a snapshot of
+the loop thread's stack in the middle of the stall.
+'''
+class LoopWatchdog():
+
+  def __init__(self, metrics, interval = 0.25, stallThreshold = 1.0, reportCooldown = 600, reporter = None):
+    self.interval = interval
+    self.stallThreshold = stallThreshold
+    self.reportCooldown = reportCooldown
+    self.reporter = reporter
+    self.lagHistogram = metrics.histogram('showdown_event_loop_lag_seconds', 'How late the event loop was in running a scheduled heartbeat', buckets = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0))
+    self.stallCounter = metrics.counter('showdown_event_loop_stalls_total', 'Number of times the event loop was blocked for longer than the stall threshold', ('culprit',))
+    self.loop = None
+    self.loopThreadId = None
+    self.lastTick = None
+    self.currentStall = None
+    self.lastReported = {}
+    self.running = False
+
+  '''
+  Starts the heartbeat coroutine and the watcher thread. Must be called from the event loop.
+  '''
+  def start(self):
+    if(self.running):
+      return
+    self.running = True
+    self.loop = asyncio.get_running_loop()
+    self.loopThreadId = threading.get_ident()
+    self.lastTick = time.monotonic()
+    self.loop.create_task(self.heartbeat(), name='LoopWatchdog-heartbeat')
+    threading.Thread(target=self.watch, name='LoopWatchdog', daemon=True).start()
+    log.info(f'Event loop watchdog started (stall threshold: {self.stallThreshold}s)')
+
+  def stop(self):
+    self.running = False
+
+  '''
+  Returns the seconds since the last heartbeat ran on the event loop, or None if the watchdog hasn't been started
+  '''
+  def sinceHeartbeat(self):
+    if(not self.running):
+      return None
+    return time.monotonic() - self.lastTick
+
+  async def heartbeat(self):
+    while self.running:
+      expected = time.monotonic() + self.interval
+      await asyncio.sleep(self.interval)
+      now = time.monotonic()
+      self.lastTick = now
+      self.lagHistogram.observe(max(0.0, now - expected))
+
+  '''
+  Runs on the watcher thread: captures the loop thread's stack once a stall passes the threshold, and finishes the stall
+  once the heartbeat resumes
+  '''
+  def watch(self):
+    while self.running:
+      time.sleep(self.interval / 2)
+      sinceTick = time.monotonic() - self.lastTick
+      if(self.currentStall is None and sinceTick > self.stallThreshold):
+        stack = threadStack(self.loopThreadId)
+        handler, blockingFrame = findCulprit(stack)
+        stackText = ''.join(traceback.format_stack(stack[-1])) if len(stack) > 0 else ''
+        self.currentStall = Stall(self.lastTick, handler, blockingFrame, stackText)
+      elif(self.currentStall is not None and self.lastTick > self.currentStall.startedAt):
+        stall = self.currentStall
+        self.currentStall = None
+        stall.duration = self.lastTick - stall.startedAt - self.interval
+        self.finishStall(stall)
+
+  def finishStall(self, stall):
+    culprit = stall.culprit()
+    self.stallCounter.inc(culprit=culprit)
+    log.warning(f'Event loop blocked for {stall.duration:.2f}s in {culprit}\n{stall.stackText}')
+    now = time.monotonic()
+    if(self.reporter is None):
+      return
+    if(culprit in self.lastReported and now - self.lastReported[culprit] < self.reportCooldown):
+      return
+    self.lastReported[culprit] = now
+    asyncio.run_coroutine_threadsafe(self.report(stall), self.loop)
+
+  async def report(self, stall):
+    try:
+      await self.reporter(stall)
+    except Exception as e:
+      log.error('Failed to report event loop stall', exc_info=e)
@@ -1,16 +1,16 @@
 import argparse
 import configparser
 import logging
+import showdownbot.logsetup as logsetup
 import showdownbot.showdownbot as showdownbot
 
+# Load config file
+config = configparser.ConfigParser()
+config.read('config.ini')
+
 # Set up logging
-logging.basicConfig(filename='showdown.log', encoding='utf-8', level=logging.ERROR, format='%(asctime)s.%(msecs)03d %(levelname)s %(module)s - %(funcName)s: %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
-logging.getLogger('discord.client').setLevel(logging.WARN)
-logging.getLogger('discord.gateway').setLevel(logging.WARN)
-logging.getLogger('discord.http').setLevel(logging.WARN)
+logsetup.setupLogging(config)
 log = logging.getLogger('showdown')
-log.addHandler(logging.StreamHandler())
-log.setLevel(logging.INFO)
 log.info('Starting Showdown Bot')
 
 # Parse command-line args
@@ -22,9 +22,5 @@ parser.add_argument('--clearcommands', action='store_true', help='Clears command
 parser.add_argument('--updatecommands', action='store_true', help='Updates command list on the Discord server - DO NOT SPAM THIS OR YOU WILL BE RATE LIMITED')
 commandLineArgs = parser.parse_args()
 
-# Load config file
-config = configparser.ConfigParser()
-config.read('config.ini')
-
 showdownBot = showdownbot.ShowdownBot(commandLineArgs, config)
 showdownBot.start()
\ No newline at end of file